@@ -32,6 +32,8 @@ from models import refresh_token_orm
 from models import budget_orm
 from models import ingestion_log_orm
 from models import merchant_category_learning_orm
+from models import ingestion_job_orm
+from models import ocr_cache_orm
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,47 @@
+"""add ingestion_job queue table
+
+Revision ID: 3f1a9c2b7d40
+Revises: 097c6344a1bb
+Create Date: 2026-03-10 10:12:41.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2b7d40'
+down_revision: Union[str, Sequence[str], None] = '097c6344a1bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ingestion_log_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['ingestion_log_id'], ['ingestion_log.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ingestion_log_id'),
+    )
+    op.create_index(op.f('ix_ingestion_job_id'), 'ingestion_job', ['id'], unique=False)
+    op.create_index(op.f('ix_ingestion_job_status'), 'ingestion_job', ['status'], unique=False)
+    op.create_index(op.f('ix_ingestion_job_run_after'), 'ingestion_job', ['run_after'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingestion_job_run_after'), table_name='ingestion_job')
+    op.drop_index(op.f('ix_ingestion_job_status'), table_name='ingestion_job')
+    op.drop_index(op.f('ix_ingestion_job_id'), table_name='ingestion_job')
+    op.drop_table('ingestion_job')
@@ -0,0 +1,34 @@
+"""add ocr_cache table
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1a9c2b7d40
+Create Date: 2026-03-11 14:37:05.913520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a93'
+down_revision: Union[str, Sequence[str], None] = '3f1a9c2b7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ocr_cache',
+        sa.Column('cache_key', sa.String(length=128), nullable=False),
+        sa.Column('raw_text', sa.Text(), nullable=False),
+        sa.Column('fields', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ocr_cache')
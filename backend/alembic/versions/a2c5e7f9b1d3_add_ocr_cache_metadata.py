@@ -0,0 +1,27 @@
+"""add ocr_cache metadata
+
+Revision ID: a2c5e7f9b1d3
+Revises: f1a7c3e9b5d2
+Create Date: 2026-04-02 10:12:44.208316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c5e7f9b1d3'
+down_revision: Union[str, Sequence[str], None] = 'f1a7c3e9b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ocr_cache', sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('ocr_cache', 'metadata')
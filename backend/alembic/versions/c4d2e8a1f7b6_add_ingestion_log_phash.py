@@ -0,0 +1,45 @@
+"""add ingestion_log phash and duplicate_of_id
+
+Revision ID: c4d2e8a1f7b6
+Revises: 8b2e4d6f1a93
+Create Date: 2026-03-18 10:12:44.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2e8a1f7b6'
+down_revision: Union[str, Sequence[str], None] = '8b2e4d6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ingestion_log', sa.Column('phash', sa.BigInteger(), nullable=True))
+    op.add_column('ingestion_log', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'ingestion_log_duplicate_of_id_fkey',
+        'ingestion_log',
+        'ingestion_log',
+        ['duplicate_of_id'],
+        ['id'],
+        ondelete='SET NULL',
+    )
+    # Duplicate index refresh: WHERE user_id = ? AND id > ? AND phash IS NOT NULL
+    op.create_index(
+        'ix_ingestion_log_user_id_id_phash',
+        'ingestion_log',
+        ['user_id', 'id'],
+        postgresql_where=sa.text('phash IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_log_user_id_id_phash', table_name='ingestion_log')
+    op.drop_constraint('ingestion_log_duplicate_of_id_fkey', 'ingestion_log', type_='foreignkey')
+    op.drop_column('ingestion_log', 'duplicate_of_id')
+    op.drop_column('ingestion_log', 'phash')
@@ -0,0 +1,29 @@
+"""add ingestion_log file_path expression index
+
+Revision ID: f1a7c3e9b5d2
+Revises: c4d2e8a1f7b6
+Create Date: 2026-03-24 09:41:17.530226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7c3e9b5d2'
+down_revision: Union[str, Sequence[str], None] = 'c4d2e8a1f7b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Upload GC: WHERE raw_payload->'metadata'->>'file_path' IN (...)
+    op.execute(
+        "CREATE INDEX ix_ingestion_log_file_path "
+        "ON ingestion_log ((raw_payload -> 'metadata' ->> 'file_path'))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_log_file_path', table_name='ingestion_log')
@@ -0,0 +1,98 @@
+"""
+IngestionEngineV2 batch throughput.
+
+    cd backend && python -m benchmarks.ingestion_batch_bench [--sizes 1000,10000,100000] [--workers 4]
+                                                            [--duplicates 0.1]
+
+Runs a synthetic mix of bank SMS, card alerts and short receipts (with
+--duplicates of them repeats of earlier texts) through:
+
+- one IngestionEngineV2() per text, as process_ingestion used to
+- process_many on the shared engine, in process
+- process_many with a process pool of --workers (batches of
+  IngestionEngineV2.POOL_MIN_TEXTS or more)
+
+and reports texts per second for each.
+"""
+import argparse
+import os
+import random
+import time
+from typing import Callable, List
+
+from services.ingestion_v2.engine import IngestionEngineV2, ingestion_engine
+
+MERCHANTS = ["SWIGGY", "AMAZON", "UBER INDIA", "BIGBASKET", "APOLLO PHARMACY", "CAFE COFFEE DAY", "SHELL FUEL"]
+
+
+def synthetic_text(rng: random.Random) -> str:
+    merchant = rng.choice(MERCHANTS)
+    amount = f"{rng.randint(10, 9999)}.{rng.randint(0, 99):02d}"
+    day = rng.randint(1, 28)
+
+    kind = rng.random()
+    if kind < 0.45:
+        return (
+            f"Rs.{amount} debited from A/c XX{rng.randint(1000, 9999)} on {day:02d}-03-25 "
+            f"to VPA {merchant.lower().replace(' ', '')}@upi. Avl Bal Rs {rng.randint(1000, 99999):,}.00"
+        )
+    if kind < 0.8:
+        return (
+            f"Dear Customer, INR {amount} spent on Card x{rng.randint(1000, 9999)} at {merchant} "
+            f"on 2025-03-{day:02d}.\nNot you? Call 18002586161"
+        )
+
+    items = [f"ITEM {i} {rng.randint(1, 3)} x {rng.randint(10, 500)}.00" for i in range(rng.randint(2, 8))]
+    return "\n".join([merchant, "MG Road", f"Date: {day}/03/2025", *items, f"Total Rs {amount}", "Thank you"])
+
+
+def synthetic_batch(rng: random.Random, size: int, duplicates: float) -> List[str]:
+    texts: List[str] = []
+    for _ in range(size):
+        if texts and rng.random() < duplicates:
+            texts.append(rng.choice(texts))
+        else:
+            texts.append(synthetic_text(rng))
+    return texts
+
+
+def per_text_engines(texts: List[str]) -> None:
+    for text in texts:
+        IngestionEngineV2().process(text)
+
+
+def timed(fn: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duplicates", type=float, default=0.0, help="share of repeated texts")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(
+        f"pool: {args.workers} workers from {IngestionEngineV2.POOL_MIN_TEXTS} texts, "
+        f"{args.duplicates:.0%} duplicates"
+    )
+
+    for size in [int(n) for n in args.sizes.split(",")]:
+        texts = synthetic_batch(rng, size, args.duplicates)
+
+        fresh_s = timed(lambda: per_text_engines(texts))
+        batch_s = timed(lambda: ingestion_engine.process_many(texts))
+        pooled_s = timed(lambda: ingestion_engine.process_many(texts, workers=args.workers))
+
+        print(
+            f"{size:7d} texts  engine per text {size / fresh_s:8.0f}/s  "
+            f"process_many {size / batch_s:8.0f}/s  "
+            f"pooled {size / pooled_s:8.0f}/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
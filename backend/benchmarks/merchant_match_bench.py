@@ -0,0 +1,83 @@
+"""
+Fuzzy merchant lookup: MerchantIndex vs the plain list of known names.
+
+    cd backend && python -m benchmarks.merchant_match_bench [--sizes 1000,10000,100000,1000000]
+                                                           [--list-max 10000]
+
+For each size, builds a MerchantIndex of that many synthetic merchant
+names and matches OCR-style misspellings of known names plus unknown
+names against it. Sizes up to --list-max are also matched against the
+plain list (every name scored, as MerchantNormalizer.match did before
+the index), with how often the two answers differ.
+"""
+import argparse
+import random
+import string
+import time
+from typing import List, Optional
+
+from services.ingestion_v2.merchant_normalizer import MerchantIndex, MerchantNormalizer
+
+WORDS = [
+    "CAFE", "COFFEE", "DAY", "FRESH", "MART", "SUPER", "BAZAAR", "PHARMACY", "MEDICAL", "FUEL",
+    "STATION", "RESTAURANT", "KITCHEN", "BAKERY", "STORES", "TRADERS", "FOODS", "HOTEL", "DHABA", "GENERAL",
+]
+
+QUERIES = 400
+
+
+def merchant_name(rng: random.Random) -> str:
+    brand = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(4, 9)))
+    return " ".join([brand, *rng.sample(WORDS, rng.randint(0, 2))])
+
+
+def misspelled(rng: random.Random, name: str) -> str:
+    """name with one OCR-style slip: a dropped, doubled or swapped letter."""
+    i = rng.randrange(len(name))
+    slip = rng.random()
+    if slip < 0.33:
+        return name[:i] + name[i + 1:]
+    if slip < 0.66:
+        return name[:i] + name[i] + name[i:]
+    return name[:i] + rng.choice(string.ascii_uppercase) + name[i + 1:]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--list-max", type=int, default=10000, help="largest size also matched against the list")
+    args = parser.parse_args()
+
+    normalizer = MerchantNormalizer()
+
+    for size in [int(n) for n in args.sizes.split(",")]:
+        rng = random.Random(size)
+        known = [merchant_name(rng) for _ in range(size)]
+        queries = [misspelled(rng, rng.choice(known)) for _ in range(QUERIES * 3 // 4)]
+        queries += [merchant_name(rng) for _ in range(QUERIES - len(queries))]
+
+        started = time.perf_counter()
+        index = MerchantIndex(known, normalizer)
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        indexed: List[Optional[str]] = [normalizer.match(query, index) for query in queries]
+        index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        line = (
+            f"{size:8d} merchants  build {build_s:6.1f} s  "
+            f"index {index_ms:7.2f} ms/lookup  matched {sum(m is not None for m in indexed)}/{len(queries)}"
+        )
+
+        if size <= args.list_max:
+            started = time.perf_counter()
+            listed = [normalizer.match(query, known) for query in queries]
+            list_ms = (time.perf_counter() - started) * 1000 / len(queries)
+            differ = sum(a != b for a, b in zip(indexed, listed))
+            line += f"  list {list_ms:8.2f} ms/lookup  answers differ {differ}"
+
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
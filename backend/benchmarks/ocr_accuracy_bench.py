@@ -0,0 +1,265 @@
+"""
+OCR accuracy vs latency, per preprocessing variant.
+
+    cd backend && python -m benchmarks.ocr_accuracy_bench [--size 60] [--variants baseline,h1600]
+                                                         [--corpus DIR] [--json results.json]
+
+Runs the full receipt pipeline (services.ocr_pipeline.extract_text:
+decode → quality gate → orient → preprocess → tesseract →
+IngestionEngineV2) over a corpus of receipt images with known fields,
+through the same OCR process pool the API uses, once per variant.
+
+Reports per variant: amount / merchant accuracy, receipts per second per
+core, end-to-end p50 / p95 and per-stage p50 / p95 wall time side by side.
+
+The corpus is a directory of images plus manifest.json
+([{"file", "amount", "merchant", "date"}]). A synthetic one (rendered
+locally with some blur / noise / tilt) is generated when DIR has no
+manifest; put real receipts with hand-written expectations in a
+directory of their own to benchmark those.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services.ingestion_v2.merchant_normalizer import MerchantNormalizer
+from services.ocr_executor import OCRExecutor
+from services.ocr_pipeline import DEFAULT_PREPROCESS, PreprocessParams, _cpu_seconds, extract_text
+
+VARIANTS: Dict[str, PreprocessParams] = {
+    "baseline": DEFAULT_PREPROCESS,
+    "h1600": replace(DEFAULT_PREPROCESS, target_height=1600),
+    "h2400": replace(DEFAULT_PREPROCESS, target_height=2400),
+    "block21": replace(DEFAULT_PREPROCESS, block_size=21),
+    "block41": replace(DEFAULT_PREPROCESS, block_size=41),
+    "no_morph": replace(DEFAULT_PREPROCESS, morph_kernel=0),
+    "kernel3": replace(DEFAULT_PREPROCESS, morph_kernel=3),
+}
+
+MERCHANTS = [
+    "GREEN VALLEY MART", "CAFE MOCHA", "CITY PHARMACY", "SPICE GARDEN RESTAURANT",
+    "QUICK FUEL STATION", "FRESH BAKES", "METRO SUPERMARKET", "BLUE TOKAI COFFEE",
+    "HEALTHY LIFE MEDICAL", "PIZZA CORNER",
+]
+
+ITEMS = [
+    "MILK", "BREAD", "EGGS", "RICE 5KG", "COFFEE", "SANDWICH", "PARACETAMOL",
+    "PETROL", "TEA", "BUTTER", "PIZZA", "JUICE", "BISCUITS", "SOAP",
+]
+
+FONTS = [cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_PLAIN]
+
+
+# ----------------------------------------
+# Synthetic corpus
+# ----------------------------------------
+def render_receipt(seed: int) -> Tuple[bytes, Dict[str, Any]]:
+    """A receipt photo-alike (JPEG bytes) plus the fields it should yield."""
+    rng = np.random.default_rng(seed)
+
+    merchant = MERCHANTS[seed % len(MERCHANTS)]
+    date = f"{int(rng.integers(1, 29)):02d}/{int(rng.integers(1, 13)):02d}/2025"
+
+    lines = [merchant, f"{int(rng.integers(1, 300))} MG ROAD", f"DATE: {date}", ""]
+    subtotal = 0.0
+    for _ in range(int(rng.integers(3, 12))):
+        qty = int(rng.integers(1, 4))
+        price = float(rng.integers(10, 400))
+        subtotal += qty * price
+        lines.append(f"{ITEMS[int(rng.integers(len(ITEMS)))]:<12s} {qty} x {price:7.2f} {qty * price:8.2f}")
+
+    tax = round(subtotal * 0.05, 2)
+    total = round(subtotal + tax, 2)
+    lines += ["", f"SUBTOTAL {subtotal:10.2f}", f"GST 5% {tax:10.2f}", f"TOTAL {total:10.2f}", "THANK YOU VISIT AGAIN"]
+
+    font = FONTS[int(rng.integers(len(FONTS)))]
+    scale = 1.6 if font == cv2.FONT_HERSHEY_PLAIN else 0.9
+    line_height = 46
+
+    img = np.full((120 + line_height * len(lines), 760), 240, np.uint8)
+    for i, text in enumerate(lines):
+        cv2.putText(img, text, (30, 70 + i * line_height), font, scale, 25, 2, cv2.LINE_AA)
+
+    # Phone photo artefacts: a slight tilt, uneven light, blur, sensor noise
+    height, width = img.shape
+    angle = float(rng.uniform(-1.5, 1.5))
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    img = cv2.warpAffine(img, matrix, (width, height), borderValue=240)
+
+    gradient = np.linspace(float(rng.uniform(0.8, 1.0)), 1.0, width, dtype=np.float32)
+    img = img.astype(np.float32) * gradient[None, :]
+    img = cv2.GaussianBlur(img, (0, 0), float(rng.uniform(0.3, 1.1)))
+    img += rng.normal(0, float(rng.uniform(2, 8)), img.shape).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, int(rng.integers(60, 95))])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+
+    return encoded.tobytes(), {"amount": total, "merchant": merchant, "date": date}
+
+
+def build_corpus(directory: Path, size: int) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = []
+    for seed in range(size):
+        data, expected = render_receipt(seed)
+        name = f"receipt_{seed:04d}.jpg"
+        (directory / name).write_bytes(data)
+        manifest.append({"file": name, **expected})
+
+    with open(directory / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=1)
+
+
+def load_corpus(directory: Path) -> List[Dict[str, Any]]:
+    with open(directory / "manifest.json") as f:
+        entries = json.load(f)
+    for entry in entries:
+        entry["path"] = str((directory / entry["file"]).resolve())
+    return entries
+
+
+# ----------------------------------------
+# Measurement
+# ----------------------------------------
+def measure_one(path: str, params: PreprocessParams) -> Dict[str, Any]:
+    """Runs in an OCR worker: one receipt through the pipeline, timed."""
+    started = time.perf_counter()
+    cpu_started = _cpu_seconds()
+    try:
+        _, fields, info = extract_text(path, params)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "wall_ms": (time.perf_counter() - started) * 1000,
+        "cpu_ms": (_cpu_seconds() - cpu_started) * 1000,
+        "stages": info.get("stages", {}),
+        "ocr_pass": info.get("ocr_pass"),
+        "amount": fields.amount,
+        "merchant": fields.merchant_name,
+    }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _merchant_matches(normalizer: MerchantNormalizer, got: Optional[str], expected: str) -> bool:
+    return bool(got) and normalizer.normalize_basic(got) == normalizer.normalize_basic(expected)
+
+
+async def run_variant(executor: OCRExecutor, corpus: List[Dict[str, Any]], params: PreprocessParams) -> Dict[str, Any]:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(executor.run(measure_one, entry["path"], params) for entry in corpus))
+    elapsed = time.perf_counter() - started
+
+    normalizer = MerchantNormalizer()
+    ok = [(entry, r) for entry, r in zip(corpus, results) if "error" not in r]
+
+    stages: Dict[str, List[float]] = {}
+    for _, r in ok:
+        for name, entry in r["stages"].items():
+            stages.setdefault(name, []).append(entry["wall_ms"])
+
+    wall = [r["wall_ms"] for _, r in ok] or [0.0]
+    return {
+        "params": asdict(params),
+        "receipts": len(corpus),
+        "errors": len(corpus) - len(ok),
+        "amount_accuracy": sum(
+            r["amount"] is not None and abs(r["amount"] - entry["amount"]) < 0.01 for entry, r in ok
+        ) / len(corpus),
+        "merchant_accuracy": sum(
+            _merchant_matches(normalizer, r["merchant"], entry["merchant"]) for entry, r in ok
+        ) / len(corpus),
+        "fast_pass_share": sum(r["ocr_pass"] == "fast" for _, r in ok) / len(corpus),
+        "per_core_rps": len(corpus) / elapsed / executor.max_workers,
+        "cpu_ms_mean": statistics.mean(r["cpu_ms"] for _, r in ok) if ok else 0.0,
+        "p50_ms": percentile(wall, 0.5),
+        "p95_ms": percentile(wall, 0.95),
+        "stages": {
+            name: {"p50_ms": percentile(samples, 0.5), "p95_ms": percentile(samples, 0.95)}
+            for name, samples in stages.items()
+        },
+        "error_samples": sorted({r["error"] for r in results if "error" in r})[:3],
+    }
+
+
+def print_report(summaries: Dict[str, Dict[str, Any]]) -> None:
+    names = list(summaries)
+    width = max(14, *(len(n) + 2 for n in names))
+
+    def row(label: str, cells: List[str]) -> None:
+        print(f"{label:18s}" + "".join(f"{c:>{width}s}" for c in cells))
+
+    row("", names)
+    row("amount acc", [f"{s['amount_accuracy']:.1%}" for s in summaries.values()])
+    row("merchant acc", [f"{s['merchant_accuracy']:.1%}" for s in summaries.values()])
+    row("errors", [str(s["errors"]) for s in summaries.values()])
+    row("fast pass", [f"{s['fast_pass_share']:.0%}" for s in summaries.values()])
+    row("rcpt/s/core", [f"{s['per_core_rps']:.2f}" for s in summaries.values()])
+    row("cpu ms/rcpt", [f"{s['cpu_ms_mean']:.0f}" for s in summaries.values()])
+    row("total p50/p95", [f"{s['p50_ms']:.0f}/{s['p95_ms']:.0f}" for s in summaries.values()])
+
+    stage_names: List[str] = []
+    for s in summaries.values():
+        stage_names += [n for n in s["stages"] if n not in stage_names]
+
+    for stage in stage_names:
+        cells = []
+        for s in summaries.values():
+            entry = s["stages"].get(stage)
+            cells.append(f"{entry['p50_ms']:.1f}/{entry['p95_ms']:.1f}" if entry else "-")
+        row(f"  {stage} p50/p95", cells)
+
+    for name, s in summaries.items():
+        for error in s["error_samples"]:
+            print(f"{name}: {error}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", type=Path, default=Path(tempfile.gettempdir()) / "expense-tracker-ocr-corpus")
+    parser.add_argument("--size", type=int, default=60, help="synthetic receipts to generate")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"comma separated: {', '.join(VARIANTS)}")
+    parser.add_argument("--json", type=Path, help="also write the summaries here")
+    args = parser.parse_args()
+
+    if not (args.corpus / "manifest.json").exists():
+        print(f"generating {args.size} synthetic receipts in {args.corpus}")
+        build_corpus(args.corpus, args.size)
+    corpus = load_corpus(args.corpus)
+
+    executor = OCRExecutor(queue_size=len(corpus), timeout_seconds=600)
+    executor.start()
+    print(f"{len(corpus)} receipts, {executor.max_workers} OCR workers (cpu_count={os.cpu_count()})\n")
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    try:
+        for name in args.variants.split(","):
+            summaries[name] = await run_variant(executor, corpus, VARIANTS[name])
+    finally:
+        executor.shutdown()
+
+    print_report(summaries)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Per-call overhead of the OCR backends.
+
+    cd backend && python -m benchmarks.ocr_backend_bench [--calls 20]
+
+Times the same recognition on every installed backend. The "tiny" image
+has almost nothing to read, so its time is essentially the fixed cost of
+one call: process spawn + traineddata load for pytesseract, close to zero
+for a warm tesserocr handle.
+"""
+import argparse
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from services.ocr_backends import BACKENDS
+from services.ocr_pipeline import TESSERACT_CONFIG
+
+
+def _tiny_image() -> np.ndarray:
+    img = np.full((40, 120), 255, np.uint8)
+    cv2.putText(img, "12.50", (5, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+    return img
+
+
+def _line_image() -> np.ndarray:
+    img = np.full((400, 900), 255, np.uint8)
+    lines = ["GROCERY MART", "MILK 2 x 45.00 90.00", "BREAD 1 x 40.00 40.00", "TOTAL 130.00"]
+    for i, text in enumerate(lines):
+        cv2.putText(img, text, (20, 60 + i * 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 2)
+    return img
+
+
+def _time_calls(backend, image: np.ndarray, calls: int):
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        backend.image_to_string(image, TESSERACT_CONFIG)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    images = {"tiny": _tiny_image(), "lines": _line_image()}
+    results = {}
+
+    for name, backend_cls in BACKENDS.items():
+        try:
+            started = time.perf_counter()
+            backend = backend_cls()
+            backend.image_to_string(images["tiny"], TESSERACT_CONFIG)
+            cold_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            print(f"{name:12s} unavailable: {e}")
+            continue
+
+        results[name] = {}
+        print(f"{name:12s} cold start {cold_ms:8.1f} ms")
+        for label, image in images.items():
+            samples = _time_calls(backend, image, args.calls)
+            results[name][label] = statistics.median(samples)
+            print(
+                f"{'':12s} {label:6s} median {statistics.median(samples):8.1f} ms"
+                f"  p90 {sorted(samples)[int(len(samples) * 0.9) - 1]:8.1f} ms"
+            )
+
+    if "pytesseract" in results and "tesserocr" in results:
+        saved = results["pytesseract"]["tiny"] - results["tesserocr"]["tiny"]
+        print(f"\nper-call startup overhead removed: ~{saved:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
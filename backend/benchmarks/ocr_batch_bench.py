@@ -0,0 +1,98 @@
+"""
+Latency vs throughput of OCR micro-batching.
+
+    cd backend && python -m benchmarks.ocr_batch_bench [--requests 64] [--concurrency 16]
+
+Fires synthetic receipt images through OCRBatcher with a fixed number of
+concurrent clients, once per (window_ms, max_size) setting. max_size 1 is
+the unbatched baseline. Prints throughput and p50 / p99 request latency.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from services.ocr_batcher import OCRBatcher
+from services.ocr_executor import OCRExecutor
+
+SETTINGS = [(0, 1), (10, 4), (25, 8), (50, 16)]
+
+
+def synthetic_receipt(seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    img = np.full((1400, 700), 245, np.uint8)
+
+    lines = [f"STORE {seed:03d}", "MAIN ROAD", ""]
+    total = 0.0
+    for i in range(int(rng.integers(5, 15))):
+        price = float(rng.integers(10, 500))
+        total += price
+        lines.append(f"ITEM {i + 1:02d}      {price:8.2f}")
+    lines += ["", f"TOTAL        {total:8.2f}", "THANK YOU"]
+
+    for i, text in enumerate(lines):
+        cv2.putText(img, text, (30, 60 + i * 55), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 20, 2)
+
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run_setting(
+    executor: OCRExecutor,
+    images: List[bytes],
+    window_ms: int,
+    max_size: int,
+    concurrency: int,
+) -> None:
+    batcher = OCRBatcher(executor, window_ms=window_ms, max_size=max_size)
+    latencies: List[float] = []
+    queue = list(images)
+
+    async def client():
+        while queue:
+            image = queue.pop()
+            started = time.perf_counter()
+            await batcher.submit(image)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"window={window_ms:3d}ms max_size={max_size:3d}  "
+        f"throughput {len(latencies) / elapsed:6.2f} req/s  "
+        f"p50 {statistics.median(latencies):8.1f} ms  "
+        f"p99 {percentile(latencies, 0.99):8.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    images = [synthetic_receipt(i) for i in range(args.requests)]
+
+    # Queue sized so the benchmark measures waiting, not 503s
+    executor = OCRExecutor(queue_size=args.requests, timeout_seconds=600)
+    executor.start()
+    try:
+        for window_ms, max_size in SETTINGS:
+            await run_setting(executor, images, window_ms, max_size, args.concurrency)
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
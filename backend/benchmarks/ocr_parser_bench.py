@@ -0,0 +1,111 @@
+"""
+OCRParser parse latency on a corpus of receipt texts.
+
+    cd backend && python -m benchmarks.ocr_parser_bench [--size 2000] [--repeat 5] [--corpus texts.json]
+
+Parses every text of the corpus (a JSON list of strings, or a synthetic
+one of short receipts and long multi-page statements) and reports the
+per-parse mean / p50 / p95, split by short and long texts.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from services.parsers.ocr import OCRParser
+
+MERCHANTS = [
+    "SWIGGY INSTAMART PVT LTD", "AMAZON SELLER SERVICES", "INDIAN OIL PETROL PUMP",
+    "CAFE COFFEE DAY", "GREEN VALLEY GROCERY", "HP SRVICE CENTRE_", "UBER INDIA",
+    "PVR MOVIE TICKETS", "Flipkrt Internet", "DOMINOS PIZZA",
+]
+
+ITEMS = ["MILK", "BREAD", "EGGS", "RICE 5KG", "COFFEE", "PETROL 2L", "TEA", "BUTTER", "PIZZA", "SOAP"]
+
+HINTS = ["Total", "Grand Total", "Net Amount", "Amount Payable", "Balance", "Sale"]
+
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"]
+
+
+def synthetic_text(rng: random.Random, items: int) -> str:
+    day = time.struct_time((2026, rng.randint(1, 12), rng.randint(1, 28), 0, 0, 0, 0, 0, -1))
+    lines = [
+        rng.choice(MERCHANTS),
+        f"{rng.randint(1, 300)} MG Road",
+        f"Invoice No {rng.randint(10000, 999999)}",
+        f"Date: {time.strftime(rng.choice(DATE_FORMATS), day)}",
+    ]
+    subtotal = 0.0
+    for _ in range(items):
+        qty = rng.randint(1, 4)
+        price = rng.randint(10, 900) + rng.choice([0, 0.5, 0.25])
+        subtotal += qty * price
+        lines.append(f"{rng.choice(ITEMS)} {qty} x {price:.2f} {qty * price:,.2f}")
+    lines += [
+        f"Subtotal {subtotal:,.2f}",
+        f"GST 5% {subtotal * 0.05:.2f}",
+        f"{rng.choice(HINTS)}: Rs {subtotal * 1.05:,.2f}",
+        "Thank you, visit again",
+    ]
+    return "\n".join(lines)
+
+
+def synthetic_corpus(size: int, seed: int = 0) -> List[str]:
+    """Mostly short receipts; one in ten is a long statement-like text."""
+    rng = random.Random(seed)
+    return [
+        synthetic_text(rng, rng.randint(150, 400) if i % 10 == 0 else rng.randint(3, 15))
+        for i in range(size)
+    ]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def measure(parser: OCRParser, corpus: List[str], repeat: int) -> List[float]:
+    """Best-of-repeat parse time per text, in ms."""
+    best = [float("inf")] * len(corpus)
+    for _ in range(repeat):
+        for i, text in enumerate(corpus):
+            started = time.perf_counter()
+            parser.parse(text, None, None)
+            best[i] = min(best[i], (time.perf_counter() - started) * 1000)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--corpus", type=Path, help="JSON list of OCR texts (default: synthetic)")
+    arg_parser.add_argument("--size", type=int, default=2000, help="synthetic texts to generate")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = json.load(f)
+    else:
+        corpus = synthetic_corpus(args.size)
+
+    timings = measure(OCRParser(), corpus, args.repeat)
+
+    groups: Dict[str, List[float]] = {"all": timings}
+    groups["short (<50 lines)"] = [t for t, text in zip(timings, corpus) if text.count("\n") < 50]
+    groups["long (>=50 lines)"] = [t for t, text in zip(timings, corpus) if text.count("\n") >= 50]
+
+    print(f"{len(corpus)} texts, best of {args.repeat}")
+    for name, samples in groups.items():
+        if not samples:
+            continue
+        print(
+            f"  {name:18s} n={len(samples):5d}  mean {statistics.mean(samples):7.3f} ms  "
+            f"p50 {percentile(samples, 0.5):7.3f} ms  p95 {percentile(samples, 0.95):7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,3 +13,273 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(
 REFRESH_TOKEN_EXPIRE_DAYS = int(
     os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7)
 )
+
+
+# ----------------------------------------
+# OCR executor
+# ----------------------------------------
+OCR_WORKERS = int(
+    os.getenv("OCR_WORKERS", os.cpu_count() or 1)
+)
+
+# Jobs allowed to wait for a free worker before new uploads get a 503
+OCR_QUEUE_SIZE = int(
+    os.getenv("OCR_QUEUE_SIZE", 16)
+)
+
+OCR_JOB_TIMEOUT_SECONDS = float(
+    os.getenv("OCR_JOB_TIMEOUT_SECONDS", 60)
+)
+
+# Threads each worker may use for tesseract / OpenCV (OMP_THREAD_LIMIT)
+OCR_THREADS_PER_WORKER = int(
+    os.getenv("OCR_THREADS_PER_WORKER", 1)
+)
+
+
+# ----------------------------------------
+# Ingestion jobs
+# ----------------------------------------
+# "sync": /ingest and /ingest/ocr parse inside the request
+# "job":  they enqueue an ingestion_job and return 202 (see services.ingestion_worker)
+INGESTION_MODE = os.getenv("INGESTION_MODE", "sync").strip().lower()
+
+INGESTION_JOB_MAX_ATTEMPTS = int(
+    os.getenv("INGESTION_JOB_MAX_ATTEMPTS", 5)
+)
+
+# Retry delay = base * 2 ** (attempt - 1), capped
+INGESTION_JOB_BACKOFF_SECONDS = float(
+    os.getenv("INGESTION_JOB_BACKOFF_SECONDS", 5)
+)
+
+INGESTION_JOB_BACKOFF_MAX_SECONDS = float(
+    os.getenv("INGESTION_JOB_BACKOFF_MAX_SECONDS", 600)
+)
+
+# A running job not finished within this window is assumed lost and re-claimed
+INGESTION_JOB_LEASE_SECONDS = int(
+    os.getenv("INGESTION_JOB_LEASE_SECONDS", 300)
+)
+
+INGESTION_WORKER_POLL_SECONDS = float(
+    os.getenv("INGESTION_WORKER_POLL_SECONDS", 1)
+)
+
+
+# ----------------------------------------
+# OCR result cache
+# ----------------------------------------
+# Bump whenever preprocessing / tesseract settings change so stale text is not reused
+OCR_CONFIG_VERSION = os.getenv("OCR_CONFIG_VERSION", "1")
+
+# In-process LRU budget (bytes of cached text + fields)
+OCR_CACHE_MAX_BYTES = int(
+    os.getenv("OCR_CACHE_MAX_BYTES", 8 * 1024 * 1024)
+)
+
+# Also share results across workers through the ocr_cache table
+OCR_CACHE_PERSISTENT = os.getenv("OCR_CACHE_PERSISTENT", "false").strip().lower() in ("1", "true", "yes")
+
+# Multi-page PDFs: pages beyond the cap are ignored
+OCR_PDF_MAX_PAGES = int(
+    os.getenv("OCR_PDF_MAX_PAGES", 10)
+)
+
+OCR_PDF_DPI = int(
+    os.getenv("OCR_PDF_DPI", 200)
+)
+
+# Digital PDFs whose text layer has at least this many letters/digits skip OCR
+OCR_PDF_TEXT_LAYER_MIN_CHARS = int(
+    os.getenv("OCR_PDF_TEXT_LAYER_MIN_CHARS", 20)
+)
+
+
+# ----------------------------------------
+# OCR preprocessing
+# ----------------------------------------
+# Bump OCR_CONFIG_VERSION after changing these (cached text would be stale).
+# Compare settings with python -m benchmarks.ocr_accuracy_bench first.
+
+# Page height tesseract reads at (~300 DPI for a receipt)
+OCR_TARGET_HEIGHT = int(
+    os.getenv("OCR_TARGET_HEIGHT", 2000)
+)
+
+# Adaptive threshold window at OCR_TARGET_HEIGHT; scaled with the pass height, kept odd
+OCR_THRESHOLD_BLOCK_SIZE = int(
+    os.getenv("OCR_THRESHOLD_BLOCK_SIZE", 31)
+)
+
+OCR_THRESHOLD_C = int(
+    os.getenv("OCR_THRESHOLD_C", 15)
+)
+
+# Side of the morphological close kernel; 0 skips the close
+OCR_MORPH_KERNEL = int(
+    os.getenv("OCR_MORPH_KERNEL", 2)
+)
+
+
+# ----------------------------------------
+# Orientation detection
+# ----------------------------------------
+# Minimum (empty-row share − empty-column share) on the downscaled page to
+# accept "upright" without running tesseract OSD
+ORIENTATION_MIN_MARGIN = float(
+    os.getenv("ORIENTATION_MIN_MARGIN", 0.15)
+)
+
+
+# ----------------------------------------
+# OCR resolution cascade
+# ----------------------------------------
+# Height of the cheap first OCR pass; 0 disables the cascade (full pass only)
+OCR_FAST_PASS_HEIGHT = int(
+    os.getenv("OCR_FAST_PASS_HEIGHT", 1200)
+)
+
+# Full-resolution stage reads header + totals bands first, middle only if needed
+OCR_REGION_PASS = os.getenv("OCR_REGION_PASS", "true").strip().lower() in ("1", "true", "yes")
+
+
+# ----------------------------------------
+# OCR engine backend
+# ----------------------------------------
+# "pytesseract": tesseract subprocess per call
+# "tesserocr":   libtesseract kept warm inside each OCR worker (pip install tesserocr)
+OCR_BACKEND = os.getenv("OCR_BACKEND", "pytesseract").strip().lower()
+
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+
+
+# ----------------------------------------
+# OCR micro-batching
+# ----------------------------------------
+# Receipts arriving within OCR_BATCH_WINDOW_MS of each other share one
+# engine invocation (up to OCR_BATCH_MAX_SIZE). A max size of 1 disables it.
+OCR_BATCH_WINDOW_MS = int(
+    os.getenv("OCR_BATCH_WINDOW_MS", 25)
+)
+OCR_BATCH_MAX_SIZE = int(
+    os.getenv("OCR_BATCH_MAX_SIZE", 1)
+)
+
+
+# ----------------------------------------
+# Batch receipt upload (/ingest/ocr/batch)
+# ----------------------------------------
+OCR_BATCH_UPLOAD_MAX_FILES = int(
+    os.getenv("OCR_BATCH_UPLOAD_MAX_FILES", 50)
+)
+
+
+# ----------------------------------------
+# Image quality gate (before OCR)
+# ----------------------------------------
+QUALITY_GATE = os.getenv("QUALITY_GATE", "true").strip().lower() in ("1", "true", "yes")
+
+# Laplacian variance / pixel variance on the 512px inspection copy
+QUALITY_MIN_SHARPNESS = float(
+    os.getenv("QUALITY_MIN_SHARPNESS", 0.2)
+)
+
+# Std of pixel values (0-255)
+QUALITY_MIN_CONTRAST = float(
+    os.getenv("QUALITY_MIN_CONTRAST", 10)
+)
+
+# Share of edge pixels
+QUALITY_MIN_TEXT_DENSITY = float(
+    os.getenv("QUALITY_MIN_TEXT_DENSITY", 0.005)
+)
+QUALITY_MAX_TEXT_DENSITY = float(
+    os.getenv("QUALITY_MAX_TEXT_DENSITY", 0.3)
+)
+
+
+# ----------------------------------------
+# Near-duplicate receipt detection
+# ----------------------------------------
+DUPLICATE_DETECTION = os.getenv("DUPLICATE_DETECTION", "true").strip().lower() in ("1", "true", "yes")
+
+# Max differing bits (of 64) between two dHashes of the same receipt. Kept
+# strict: receipts with the same layout (same shop, same order) hash close
+PHASH_MAX_DISTANCE = int(
+    os.getenv("PHASH_MAX_DISTANCE", 3)
+)
+
+# Users whose hash index is kept in memory per API process
+DUPLICATE_INDEX_MAX_USERS = int(
+    os.getenv("DUPLICATE_INDEX_MAX_USERS", 1000)
+)
+
+
+# ----------------------------------------
+# Merchant resolution
+# ----------------------------------------
+# Opt-in: map an OCR'd merchant name to a known merchant with a
+# near-identical name ("SWIGY" -> "Swiggy") instead of creating a new one.
+# Each API / worker process keeps the merchant names indexed in memory,
+# built in the background at startup
+MERCHANT_FUZZY_MATCH = os.getenv("MERCHANT_FUZZY_MATCH", "false").strip().lower() in ("1", "true", "yes")
+
+
+# ----------------------------------------
+# Receipt file storage
+# ----------------------------------------
+# "local": content-addressed tree under UPLOADS_DIR
+# "s3":    S3 / S3-compatible bucket (pip install boto3), cached in S3_CACHE_DIR
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").strip().lower()
+
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+
+S3_BUCKET = os.getenv("S3_BUCKET", "expense-tracker-receipts")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_CACHE_DIR = os.getenv("S3_CACHE_DIR", "uploads")
+
+# WebP preview generated after upload (longest side, pixels)
+THUMBNAIL_MAX_SIZE = int(
+    os.getenv("THUMBNAIL_MAX_SIZE", 512)
+)
+
+THUMBNAIL_QUALITY = int(
+    os.getenv("THUMBNAIL_QUALITY", 70)
+)
+
+
+# ----------------------------------------
+# Upload garbage collection (python -m services.upload_gc)
+# ----------------------------------------
+# "delete" or "archive" (moved under archive/ in the same storage)
+UPLOAD_GC_MODE = os.getenv("UPLOAD_GC_MODE", "delete").strip().lower()
+
+# Files no ingestion log refers to are kept this long (an upload is saved
+# before its log is written)
+UPLOAD_GC_GRACE_HOURS = float(
+    os.getenv("UPLOAD_GC_GRACE_HOURS", 24)
+)
+
+# Receipts only referenced by failed / rejected / duplicate logs, or by
+# logs whose expense was deleted, are kept this long after the newest one
+UPLOAD_GC_RETENTION_DAYS = float(
+    os.getenv("UPLOAD_GC_RETENTION_DAYS", 30)
+)
+
+# Files looked up against ingestion_log per query
+UPLOAD_GC_BATCH_SIZE = int(
+    os.getenv("UPLOAD_GC_BATCH_SIZE", 500)
+)
+
+UPLOAD_GC_CHECKPOINT_FILE = os.getenv("UPLOAD_GC_CHECKPOINT_FILE", "upload_gc_checkpoint.json")
+
+
+# ----------------------------------------
+# OCR stage instrumentation
+# ----------------------------------------
+# Share of OCR runs that also record peak memory per stage (tracemalloc)
+STAGE_MEMORY_SAMPLE_RATE = float(
+    os.getenv("STAGE_MEMORY_SAMPLE_RATE", 0.01)
+)
@@ -0,0 +1,55 @@
+import importlib
+import os
+import pkgutil
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# database.py builds its (lazy) engine from these at import; tests use
+# their own SQLite databases and never connect to it
+for name, value in (
+    ("DB_HOST", "localhost"),
+    ("DB_PORT", "5432"),
+    ("DB_NAME", "expense_tracker"),
+    ("DB_USER", "postgres"),
+    ("DB_PASSWORD", ""),
+):
+    os.environ.setdefault(name, value)
+
+import models  # noqa: E402
+from models.base import Base  # noqa: E402
+
+for module in pkgutil.iter_modules(models.__path__):
+    if module.name.endswith("_orm"):
+        importlib.import_module(f"models.{module.name}")
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def session_factory():
+    """sessionmaker over a fresh in-memory SQLite database with every table, shared across threads."""
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    # merchant declares ix_merchant_normalized_key twice (index=True and an
+    # explicit Index), which SQLite refuses; the unique column is enough here
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "merchant"])
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE merchant (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+            "normalized_key TEXT NOT NULL UNIQUE, created_at TIMESTAMP)"
+        )
+
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
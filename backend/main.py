@@ -40,16 +40,27 @@ logging.basicConfig(
 logger = logging.getLogger("expense-tracker")
 
 from services.ingestion import create_expense_from_input
-from services.ingestion_service import process_ingestion
+from services.ingestion_service import process_ingestion, record_rejected_ingestion, known_merchants
+from services.ingestion_jobs import enqueue_ingestion
+from config import INGESTION_MODE, MERCHANT_FUZZY_MATCH
+from fastapi.responses import JSONResponse, StreamingResponse
 from models.ingestion_log_orm import IngestionLog
 from services.ingestion import INPUT_TYPE_TO_SOURCE
-from fastapi import UploadFile, File
-from pathlib import Path
+from fastapi import UploadFile, File, BackgroundTasks
 import uuid
 
-from services.ocr_utils import save_upload_file, image_from_bytes
-import pytesseract
-from pdf2image import convert_from_bytes
+from services.ocr_utils import save_upload_file, ImageDecodeError
+from services.ocr_executor import ocr_executor
+from services.ocr_cache import ocr_cache
+from services.receipt_ocr import ocr_receipt
+from services.quality_gate import LowQualityImageError
+from services.receipt_dedupe import check_duplicate
+from services.batch_ingestion import save_batch_uploads, store_batch, process_batch
+from services.storage import receipt_storage, thumbnail_key
+from services.thumbnails import create_thumbnail, create_thumbnails
+from services.stage_timer import StageTimer, export_stages
+from services import metrics
+from starlette.concurrency import run_in_threadpool
 
 
 from models.budget_orm import Budget
@@ -118,6 +129,23 @@ def ensure_source_seed_data():
     finally:
         db.close()
 
+
+@app.on_event("startup")
+def start_ocr_executor():
+    ocr_executor.start()
+
+
+@app.on_event("startup")
+def start_known_merchants():
+    # Built in the background: startup does not wait on the merchant table
+    if MERCHANT_FUZZY_MATCH:
+        known_merchants.start(SessionLocal)
+
+
+@app.on_event("shutdown")
+def stop_ocr_executor():
+    ocr_executor.shutdown()
+
 @app.get("/health")
 def health_check():
     try:
@@ -136,6 +164,15 @@ def health_check():
         }
 
 
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "counters": metrics.snapshot(),
+        "histograms": metrics.histograms(),
+        "ocr_cache": ocr_cache.stats(),
+    }
+
+
 @app.get("/")
 def root():
     return {"message": "Hello, the server is running"}
@@ -178,6 +215,8 @@ class IngestionLogResponse(BaseModel):
     parsed_category: Optional[str] = None
     parsed_merchant: Optional[str] = None
     expense_id: Optional[int] = None
+    error_message: Optional[str] = None
+    duplicate_of_id: Optional[int] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -196,13 +235,29 @@ def ingest(
 ):
     logger.info("ingest.submit input_type=%s user_id=%s", req.input_type, getattr(current_user, "id", None))
 
-    # create pending log and process synchronously for now
+    raw_text = req.payload.get("raw_text") if req.payload and "raw_text" in req.payload else None
+
     try:
+        # Job mode: persist pending log + job, a worker parses it later
+        if INGESTION_MODE == "job":
+            log = enqueue_ingestion(
+                db=db,
+                user=current_user,
+                input_type=req.input_type,
+                raw_text=raw_text,
+                payload=req.payload,
+                metadata=None,
+            )
+            return JSONResponse(
+                status_code=202,
+                content={"ingestion_id": log.id, "status": log.status},
+            )
+
         log = process_ingestion(
             db=db,
             user=current_user,
             input_type=req.input_type,
-            raw_text=req.payload.get("raw_text") if req.payload and "raw_text" in req.payload else None,
+            raw_text=raw_text,
             payload=req.payload,
             metadata=None,
         )
@@ -216,111 +271,105 @@ def ingest(
 
 @app.post("/ingest/ocr", response_model=IngestionLogResponse)
 async def ingest_ocr(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    allow_duplicate: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    uploads_dir = Path("uploads") / "receipts"
-    uploads_dir.mkdir(parents=True, exist_ok=True)
+    # API side stages; the OCR worker reports its own in ocr_metadata["stages"]
+    timer = StageTimer(trace_memory=False)
 
     try:
-        dest_path, file_bytes = save_upload_file(file, uploads_dir)
+        key, sha256_hex = await run_in_threadpool(timer.run, "save", save_upload_file, file)
+        local_path = await run_in_threadpool(receipt_storage.local_path, key)
+    except HTTPException:
+        raise
     except Exception:
         logger.exception("ingest_ocr.save_failure user_id=%s", getattr(current_user, "id", None))
         raise HTTPException(status_code=500, detail="Failed to save upload")
 
+    # Preview for the app; generated after the response, off the OCR path
+    background_tasks.add_task(create_thumbnail, key)
+
     try:
-        # Extract text
-        if file.content_type == "application/pdf":
-            pages = convert_from_bytes(file_bytes, first_page=1, last_page=1)
-            if not pages:
-                raise Exception("No pages found in PDF")
-            img = pages[0]
-        else:
-            img = image_from_bytes(file_bytes)
-
-        
-
-        # ----------------------------------------------------
-        # STABLE OCR PREPROCESSING (Production-Style)
-        # ----------------------------------------------------
-
-        import numpy as np
-        import cv2
-        from PIL import Image
-        import pytesseract
-
-        # Convert PIL to OpenCV
-        img_np = np.array(img)
-
-        # 1️⃣ Auto-rotate using Tesseract OSD
-        try:
-            osd = pytesseract.image_to_osd(img_np)
-            rotation = int(re.search(r"Rotate: (\d+)", osd).group(1))
-            if rotation != 0:
-                img_np = cv2.rotate(
-                    img_np,
-                    {
-                        90: cv2.ROTATE_90_CLOCKWISE,
-                        180: cv2.ROTATE_180,
-                        270: cv2.ROTATE_90_COUNTERCLOCKWISE
-                    }[rotation]
-                )
-        except Exception:
-            pass  # If OSD fails, continue
-
-        # 2️⃣ Convert to grayscale (proper)
-        gray = cv2.cvtColor(img_np, cv2.COLOR_BGR2GRAY)
-
-        # 3️⃣ Resize to stable DPI equivalent (~300 DPI height baseline)
-        target_height = 2000
-        scale = target_height / gray.shape[0]
-        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
-
-        # 4️⃣ Adaptive threshold (critical for receipts)
-        thresh = cv2.adaptiveThreshold(
-            gray,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            31,
-            15
+        raw_text, fields, ocr_metadata = await ocr_receipt(
+            local_path, sha256_hex, getattr(current_user, "id", None)
         )
-
-        # 5️⃣ Light morphological close to join broken characters
-        kernel = np.ones((2,2), np.uint8)
-        processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-
-        # OCR config tuned for receipts
-        custom_config = r'--oem 3 --psm 6'
-
-        raw_text = pytesseract.image_to_string(processed, config=custom_config)
-
-        raw_text = "\n".join(
-            [ln.strip() for ln in raw_text.splitlines() if ln.strip()]
+    except HTTPException:
+        raise
+    except ImageDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid or corrupt image")
+    except LowQualityImageError as e:
+        log = await run_in_threadpool(
+            record_rejected_ingestion,
+            db=db,
+            user=current_user,
+            input_type="ocr",
+            status="rejected_quality",
+            reason=e.reason,
+            metadata={"file_path": key, "quality": e.scores},
         )
-
-        print("Processed size:", processed.shape)
-        print("----- RAW OCR TEXT -----")
-        print(raw_text)
-        print("------------------------")
-
+        return IngestionLogResponse.from_orm(log)
     except Exception:
         logger.exception("ingest_ocr.ocr_failure user_id=%s", getattr(current_user, "id", None))
         raise HTTPException(status_code=500, detail="OCR extraction failed")
 
+    # Another photo of a receipt this user already uploaded → parsed, but
+    # linked to it and left for review, never auto-created. allow_duplicate=true
+    # lets the app re-send after the user confirms it is a different receipt
+    # (same shop, same order look alike)
+    phash, original = await run_in_threadpool(
+        check_duplicate, db, current_user.id, ocr_metadata.pop("phash", None), key
+    )
+    duplicate_of_id = None
+    if original is not None and not allow_duplicate:
+        metrics.increment("duplicates.detected")
+        duplicate_of_id = original.id
+
     try:
-        # IMPORTANT: DO NOT use relative_to()
-        safe_relative_path = f"receipts/{dest_path.name}"
+        metadata = {
+            "file_path": key,
+            **ocr_metadata,
+            "stages": {**timer.to_dict(), **ocr_metadata.get("stages", {})},
+        }
 
-        log = process_ingestion(
+        if INGESTION_MODE == "job":
+            log = await run_in_threadpool(
+                timer.run,
+                "db_write",
+                enqueue_ingestion,
+                db=db,
+                user=current_user,
+                input_type="ocr",
+                raw_text=raw_text,
+                payload=None,
+                metadata=metadata,
+                phash=phash,
+                fields=fields,
+                duplicate_of_id=duplicate_of_id,
+            )
+            export_stages(timer.to_dict())
+            return JSONResponse(
+                status_code=202,
+                content={"ingestion_id": log.id, "status": log.status},
+            )
+
+        log = await run_in_threadpool(
+            timer.run,
+            "db_write",
+            process_ingestion,
             db=db,
             user=current_user,
             input_type="ocr",
             raw_text=raw_text,
             payload=None,
-            metadata={"file_path": safe_relative_path},
+            metadata=metadata,
+            fields=fields,
+            phash=phash,
+            duplicate_of_id=duplicate_of_id,
         )
+        export_stages(timer.to_dict())
 
         return IngestionLogResponse.from_orm(log)
 
@@ -329,6 +378,38 @@ async def ingest_ocr(
         raise HTTPException(status_code=500, detail="Ingestion processing failed")
 
 
+@app.post("/ingest/ocr/batch", status_code=202)
+async def ingest_ocr_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    allow_duplicate: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Several receipts (or zip archives of them) in one request. Returns one
+    ingestion id per file immediately; OCR runs after the response and each
+    file's result is polled via GET /ingestion/{id}.
+    """
+    try:
+        batch_files = await run_in_threadpool(save_batch_uploads, files)
+        rows, to_process = await run_in_threadpool(store_batch, db, current_user, batch_files)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("ingest_ocr_batch.save_failure user_id=%s", getattr(current_user, "id", None))
+        raise HTTPException(status_code=500, detail="Failed to save uploads")
+
+    if to_process:
+        background_tasks.add_task(process_batch, current_user.id, to_process, allow_duplicate)
+
+    keys = [batch_file.key for batch_file in batch_files if batch_file.key is not None]
+    if keys:
+        background_tasks.add_task(create_thumbnails, keys)
+
+    return JSONResponse(status_code=202, content={"ingestions": rows})
+
+
 @app.get("/ingestion-logs")
 def get_ingestion_logs(
     db: Session = Depends(get_db),
@@ -380,9 +461,31 @@ def get_ingestion_log(
         },
         "expense_id": log.expense_id,
         "error_message": log.error_message,
+        "duplicate_of_id": log.duplicate_of_id,
     }
 
 
+@app.get("/ingestion/{ingestion_id}/thumbnail")
+def get_ingestion_thumbnail(
+    ingestion_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    log = db.query(IngestionLog).filter(IngestionLog.id == ingestion_id, IngestionLog.user_id == current_user.id).first()
+    if not log:
+        raise HTTPException(status_code=404, detail="Ingestion log not found")
+
+    file_path = ((log.raw_payload or {}).get("metadata") or {}).get("file_path")
+    if not file_path or not receipt_storage.exists(thumbnail_key(file_path)):
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+
+    return StreamingResponse(
+        receipt_storage.open(thumbnail_key(file_path)),
+        media_type="image/webp",
+        headers={"Cache-Control": "private, max-age=86400"},
+    )
+
+
 @app.patch("/ingestion/{ingestion_id}/approve", response_model=IngestionLogResponse)
 def approve_ingestion(
     ingestion_id: int,
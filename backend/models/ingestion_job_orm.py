@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from models.base import Base
+
+
+class IngestionJob(Base):
+    """
+    Durable work item for asynchronous ingestion.
+
+    status: queued → running → done
+                        ↘ queued (retry with backoff) ↘ dead (attempts exhausted)
+    """
+    __tablename__ = "ingestion_job"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    ingestion_log_id = Column(
+        Integer,
+        ForeignKey("ingestion_log.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+
+    # Not claimable before this time (retry backoff)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    ingestion_log = relationship("IngestionLog")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -26,7 +26,12 @@ class IngestionLog(Base):
     expense_id = Column(Integer, ForeignKey("expense.id"), nullable=True)
     error_message = Column(String, nullable=True)
 
+    # dHash of the receipt image (signed 64-bit) and the earlier upload it duplicates
+    phash = Column(BigInteger, nullable=True)
+    duplicate_of_id = Column(Integer, ForeignKey("ingestion_log.id", ondelete="SET NULL"), nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User")
-    expense = relationship("Expense")
\ No newline at end of file
+    expense = relationship("Expense")
+    duplicate_of = relationship("IngestionLog", remote_side=[id])
\ No newline at end of file
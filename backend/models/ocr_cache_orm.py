@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from models.base import Base
+
+
+class OCRCacheEntry(Base):
+    __tablename__ = "ocr_cache"
+
+    # "<OCR_CONFIG_VERSION>:<sha256 of upload bytes>"
+    cache_key = Column(String(128), primary_key=True)
+
+    raw_text = Column(Text, nullable=False)
+
+    # IngestionEngineV2 ExtractedFields for raw_text
+    fields = Column(JSONB, nullable=True)
+
+    # Metadata of the OCR run (extraction_path, ocr_pass, text_scope, ...);
+    # "metadata" itself is reserved on declarative models
+    ocr_metadata = Column("metadata", JSONB, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
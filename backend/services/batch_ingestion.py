@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import mimetypes
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from config import INGESTION_MODE, OCR_BATCH_UPLOAD_MAX_FILES
+from database import SessionLocal
+from models.ingestion_log_orm import IngestionLog
+from services.ingestion_jobs import add_job
+from services.ingestion_service import create_ingestion_log, run_ingestion
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.ocr_batcher import ocr_batcher
+from services.ocr_executor import ocr_executor
+from services.ocr_utils import save_upload_stream, ImageDecodeError, MAX_UPLOAD_BYTES
+from services.quality_gate import LowQualityImageError
+from services.receipt_dedupe import check_duplicate
+from services.receipt_ocr import ocr_receipt
+from services.stage_timer import StageTimer, export_stages
+from services.storage import receipt_storage
+
+logger = logging.getLogger("expense-tracker.batch_ingestion")
+
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+
+@dataclass
+class BatchFile:
+    filename: str
+    key: Optional[str] = None
+    sha256_hex: Optional[str] = None
+    error: Optional[str] = None
+
+
+# ----------------------------------------
+# Request side (one transaction, then 202)
+# ----------------------------------------
+def _is_zip(upload: UploadFile) -> bool:
+    if upload.content_type in ZIP_CONTENT_TYPES or (upload.filename or "").lower().endswith(".zip"):
+        return True
+    is_zip = zipfile.is_zipfile(upload.file)
+    upload.file.seek(0)
+    return is_zip
+
+
+def _save(filename: str, stream: BinaryIO, content_type: str) -> BatchFile:
+    try:
+        key, sha256_hex = save_upload_stream(stream, content_type)
+    except HTTPException as e:
+        return BatchFile(filename, error=e.detail)
+    return BatchFile(filename, key=key, sha256_hex=sha256_hex)
+
+
+def _save_zip_entries(upload: UploadFile) -> Iterator[BatchFile]:
+    with zipfile.ZipFile(upload.file) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or Path(name).name.startswith("."):
+                continue
+
+            # Declared size first; save_upload_stream still bounds the
+            # actual bytes in case the header lies
+            if info.file_size > MAX_UPLOAD_BYTES:
+                yield BatchFile(name, error="File too large")
+                continue
+
+            with archive.open(info) as entry:
+                yield _save(name, entry, mimetypes.guess_type(name)[0] or "")
+
+
+def save_batch_uploads(
+    uploads: List[UploadFile],
+    max_files: int = OCR_BATCH_UPLOAD_MAX_FILES,
+) -> List[BatchFile]:
+    """
+    Stream every uploaded file and zip entry into receipt storage (one
+    chunk in memory at a time). Per file validation errors are kept on the
+    entry.
+
+    Stored files are content addressed and may already back other
+    ingestions, so a rejected batch leaves them in place; files no log
+    refers to are removed by the upload GC.
+    """
+    files: List[BatchFile] = []
+
+    for upload in uploads:
+        if _is_zip(upload):
+            try:
+                for batch_file in _save_zip_entries(upload):
+                    files.append(batch_file)
+                    if len(files) > max_files:
+                        break
+            except zipfile.BadZipFile:
+                files.append(BatchFile(upload.filename or "", error="Invalid zip archive"))
+        else:
+            files.append(_save(upload.filename or "", upload.file, upload.content_type or ""))
+
+        if len(files) > max_files:
+            raise HTTPException(status_code=400, detail=f"Too many files (max {max_files})")
+
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+
+    return files
+
+
+def store_batch(
+    db: Session,
+    user,
+    files: List[BatchFile],
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str, str]]]:
+    """
+    Create one IngestionLog per saved file in a single transaction. Files
+    that failed validation get a "failed" log right away.
+
+    Returns (per-file response rows, [(log id, storage key, sha256)] to OCR).
+    """
+    rows: List[Dict[str, Any]] = []
+    to_process: List[Tuple[int, str, str]] = []
+
+    try:
+        for batch_file in files:
+            metadata = {"batch_filename": batch_file.filename}
+            if batch_file.key is not None:
+                metadata["file_path"] = batch_file.key
+
+            log = create_ingestion_log(db, user, "ocr", metadata=metadata)
+
+            if batch_file.error is not None:
+                log.status = "failed"
+                log.error_message = batch_file.error
+            else:
+                to_process.append((log.id, batch_file.key, batch_file.sha256_hex))
+
+            rows.append({
+                "ingestion_id": log.id,
+                "filename": batch_file.filename,
+                "status": log.status,
+                "error_message": log.error_message,
+            })
+
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        raise
+
+    return rows, to_process
+
+
+# ----------------------------------------
+# Background side (after the response)
+# ----------------------------------------
+def _mark_failed(log_id: int, message: str, status: str = "failed") -> None:
+    db = SessionLocal()
+    try:
+        log = db.query(IngestionLog).filter(IngestionLog.id == log_id).first()
+        if log is not None and log.status == "pending":
+            log.status = status
+            log.error_message = message
+            db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("batch_ingestion.mark_failed_failure ingestion_id=%s", log_id)
+    finally:
+        db.close()
+
+
+def _finish_ingestion(
+    log_id: int,
+    key: str,
+    raw_text: str,
+    fields: ExtractedFields,
+    metadata: Dict[str, Any],
+    allow_duplicate: bool = False,
+) -> None:
+    db = SessionLocal()
+    try:
+        log = db.query(IngestionLog).filter(IngestionLog.id == log_id).first()
+        if log is None or log.status != "pending":
+            return
+
+        # Repeat photo of an earlier receipt (also one already finished in
+        # this batch): parsed, but linked and left for review
+        log.phash, original = check_duplicate(db, log.user_id, metadata.pop("phash", None), key)
+        if original is not None and not allow_duplicate:
+            log.duplicate_of_id = original.id
+
+        raw_payload = dict(log.raw_payload or {})
+        raw_payload["raw_text"] = raw_text
+        raw_payload["metadata"] = {**(raw_payload.get("metadata") or {}), **metadata}
+        # The job worker runs the engine on these, not on raw_text again
+        raw_payload["fields"] = asdict(fields) if fields is not None else None
+        log.raw_payload = raw_payload
+
+        timer = StageTimer(trace_memory=False)
+        with timer.stage("db_write"):
+            if INGESTION_MODE == "job":
+                add_job(db, log)
+            else:
+                run_ingestion(db, log.user, log, fields=fields)
+
+            db.commit()
+        export_stages(timer.to_dict())
+        logger.info("batch_ingestion.done ingestion_id=%s status=%s", log_id, log.status)
+
+    except Exception:
+        db.rollback()
+        logger.exception("batch_ingestion.ingestion_failure ingestion_id=%s", log_id)
+        _mark_failed(log_id, "Ingestion processing failed")
+    finally:
+        db.close()
+
+
+async def _process_file(
+    user_id: int,
+    log_id: int,
+    key: str,
+    sha256_hex: str,
+    allow_duplicate: bool = False,
+) -> None:
+    try:
+        local_path = await run_in_threadpool(receipt_storage.local_path, key)
+        raw_text, fields, metadata = await ocr_receipt(local_path, sha256_hex, user_id)
+    except ImageDecodeError:
+        await run_in_threadpool(_mark_failed, log_id, "Invalid or corrupt image")
+        return
+    except LowQualityImageError as e:
+        await run_in_threadpool(_mark_failed, log_id, e.reason, "rejected_quality")
+        return
+    except HTTPException as e:
+        await run_in_threadpool(_mark_failed, log_id, str(e.detail))
+        return
+    except Exception:
+        logger.exception("batch_ingestion.ocr_failure ingestion_id=%s", log_id)
+        await run_in_threadpool(_mark_failed, log_id, "OCR extraction failed")
+        return
+
+    await run_in_threadpool(_finish_ingestion, log_id, key, raw_text, fields, metadata, allow_duplicate)
+
+
+async def process_batch(
+    user_id: int,
+    items: List[Tuple[int, str, str]],
+    allow_duplicate: bool = False,
+) -> None:
+    """
+    OCR + ingest every stored file, fanned out across the OCR pool. Each
+    log moves from pending to parsed / needs_review / failed on its own,
+    so clients poll GET /ingestion/{id} per file.
+    """
+    # Enough in flight to keep every worker (and micro-batch) busy without
+    # one batch filling the shared OCR queue
+    slots = asyncio.Semaphore(max(1, ocr_executor.max_workers * ocr_batcher.max_size))
+
+    async def run(item: Tuple[int, str, str]):
+        async with slots:
+            await _process_file(user_id, *item, allow_duplicate=allow_duplicate)
+
+    await asyncio.gather(*(run(item) for item in items))
+    logger.info("batch_ingestion.batch_done user_id=%s files=%s", user_id, len(items))
@@ -0,0 +1,197 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from config import (
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_BACKOFF_SECONDS,
+    INGESTION_JOB_BACKOFF_MAX_SECONDS,
+    INGESTION_JOB_LEASE_SECONDS,
+)
+from models.ingestion_job_orm import IngestionJob
+from models.ingestion_log_orm import IngestionLog
+from models.user_orm import User
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.ingestion_service import create_ingestion_log, run_ingestion
+
+logger = logging.getLogger("expense-tracker.ingestion_jobs")
+
+
+# ----------------------------------------
+# Producer side (API)
+# ----------------------------------------
+def add_job(db: Session, log: IngestionLog) -> IngestionJob:
+    """
+    Queue a job for an existing pending log. Caller commits.
+    """
+    job = IngestionJob(
+        ingestion_log_id=log.id,
+        status="queued",
+        attempts=0,
+        max_attempts=INGESTION_JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_ingestion(
+    db: Session,
+    user,
+    input_type: str,
+    raw_text: Optional[str] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    phash: Optional[int] = None,
+    fields: Optional[ExtractedFields] = None,
+    duplicate_of_id: Optional[int] = None,
+) -> IngestionLog:
+    """
+    Persist a pending IngestionLog plus its queued job in one transaction.
+
+    fields: engine output from OCR; stored on the log so the worker uses
+    it instead of re-parsing raw_text.
+    """
+    try:
+        log = create_ingestion_log(
+            db,
+            user,
+            input_type,
+            raw_text=raw_text,
+            payload=payload,
+            metadata=metadata,
+            phash=phash,
+            fields=fields,
+            duplicate_of_id=duplicate_of_id,
+        )
+
+        add_job(db, log)
+
+        db.commit()
+        db.refresh(log)
+
+        logger.info("ingestion_jobs.enqueued ingestion_id=%s user_id=%s", log.id, user.id)
+        return log
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+# ----------------------------------------
+# Consumer side (worker)
+# ----------------------------------------
+def claim_next_job(db: Session) -> Optional[IngestionJob]:
+    """
+    Atomically claim one runnable job.
+
+    FOR UPDATE SKIP LOCKED lets any number of workers poll the same table
+    without blocking on, or double-claiming, each other's rows. Jobs left
+    'running' past the lease (crashed worker) become claimable again.
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=INGESTION_JOB_LEASE_SECONDS)
+
+    job = (
+        db.query(IngestionJob)
+        .filter(
+            or_(
+                and_(IngestionJob.status == "queued", IngestionJob.run_after <= now),
+                and_(IngestionJob.status == "running", IngestionJob.locked_at < lease_expired),
+            )
+        )
+        .order_by(IngestionJob.run_after)
+        .with_for_update(skip_locked=True)
+        .limit(1)
+        .first()
+    )
+
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = "running"
+    job.attempts += 1
+    job.locked_at = now
+    db.commit()
+
+    return job
+
+
+def _backoff_seconds(attempts: int) -> float:
+    return min(
+        INGESTION_JOB_BACKOFF_MAX_SECONDS,
+        INGESTION_JOB_BACKOFF_SECONDS * (2 ** max(0, attempts - 1)),
+    )
+
+
+def run_job(db: Session, job: IngestionJob) -> None:
+    """
+    Process a claimed job. Failures are retried with exponential backoff
+    until max_attempts, then the job is dead-lettered and the log failed.
+    """
+    job_id = job.id
+    log = db.query(IngestionLog).filter(IngestionLog.id == job.ingestion_log_id).first()
+
+    if not log:
+        job.status = "dead"
+        job.last_error = "Ingestion log not found"
+        db.commit()
+        return
+
+    # Already handled by a previous attempt that died before marking the job
+    if log.status != "pending":
+        job.status = "done"
+        db.commit()
+        return
+
+    try:
+        user = db.query(User).filter(User.id == log.user_id).first()
+        if not user:
+            raise Exception(f"User {log.user_id} not found")
+
+        run_ingestion(db, user, log)
+
+        job.status = "done"
+        job.last_error = None
+        db.commit()
+
+        logger.info(
+            "ingestion_jobs.done job_id=%s ingestion_id=%s status=%s",
+            job_id,
+            log.id,
+            log.status,
+        )
+
+    except Exception as exc:
+        db.rollback()
+        error = getattr(exc, "detail", None) or str(exc) or exc.__class__.__name__
+
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+        job.last_error = str(error)
+
+        if job.attempts >= job.max_attempts:
+            job.status = "dead"
+            log = db.query(IngestionLog).filter(IngestionLog.id == job.ingestion_log_id).first()
+            if log:
+                log.status = "failed"
+                log.error_message = str(error)
+
+            logger.exception("ingestion_jobs.dead job_id=%s attempts=%s", job_id, job.attempts)
+        else:
+            delay = _backoff_seconds(job.attempts)
+            job.status = "queued"
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+
+            logger.warning(
+                "ingestion_jobs.retry job_id=%s attempts=%s retry_in=%ss error=%s",
+                job_id,
+                job.attempts,
+                delay,
+                error,
+            )
+
+        db.commit()
@@ -1,13 +1,18 @@
 import logging
 import re
-from typing import Any, Dict, Optional
+import threading
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Optional, Set
 from datetime import date, datetime
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from services.ingestion_v2.engine import IngestionEngineV2
+from config import MERCHANT_FUZZY_MATCH
+from services.ingestion_v2.engine import ingestion_engine
+from services.ingestion_v2.merchant_normalizer import MerchantIndex, MerchantNormalizer
+from services.ingestion_v2.receipt_model import ExtractedFields
 from models.ingestion_log_orm import IngestionLog
 from models.merchant_orm import Merchant
 from services.ingestion import create_expense_from_input
@@ -27,6 +32,118 @@ def _normalize_merchant_key(name: str) -> str:
     return re.sub(r"[^A-Z]", "", name.upper())
 
 
+class KnownMerchants:
+    """
+    MerchantIndex of the merchant table, kept in the process
+    (MERCHANT_FUZZY_MATCH).
+
+    start() builds it from the table on a background thread; until it is
+    built, lookups find nothing and merchants resolve by exact key only.
+    Each lookup then first indexes the merchants with newer ids, so
+    merchants created by other workers / processes are picked up
+    incrementally. Inserts commit out of id order, so the last REREAD_IDS
+    ids below the newest one seen are read again too. The table is read
+    outside the lock, which only serializes additions to the index;
+    matching never waits on it.
+    """
+
+    # Merchants read from the table per query
+    REFRESH_BATCH = 10000
+
+    # Ids below the newest seen whose insert may still be committing
+    REREAD_IDS = 200
+
+    def __init__(self):
+        self.normalizer = MerchantNormalizer()
+
+        self._index = MerchantIndex(normalizer=self.normalizer)
+        self._last_seen = 0
+        # Ids within REREAD_IDS of _last_seen already indexed
+        self._recent: Set[int] = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        """Build the index from the merchant table, in the background (once)."""
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(
+            target=self._build,
+            args=(session_factory,),
+            name="known-merchants",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _build(self, session_factory: Callable[[], Session]) -> None:
+        db = session_factory()
+        try:
+            self._refresh(db)
+            self._ready.set()
+            logger.info("known_merchants.built merchants=%s", len(self._index))
+        except Exception:
+            logger.exception("known_merchants.build_failed")
+        finally:
+            db.close()
+
+    def _refresh(self, db: Session) -> None:
+        after = max(0, self._last_seen - self.REREAD_IDS)
+        while True:
+            rows = (
+                db.query(Merchant.id, Merchant.name)
+                .filter(Merchant.id > after)
+                .order_by(Merchant.id)
+                .limit(self.REFRESH_BATCH)
+                .all()
+            )
+            if not rows:
+                return
+
+            # Concurrent refreshes may add the same names; the index keeps one per key
+            with self._lock:
+                for merchant_id, name in rows:
+                    if merchant_id not in self._recent:
+                        self._index.add(name)
+                        self._recent.add(merchant_id)
+
+                self._last_seen = max(self._last_seen, rows[-1][0])
+                floor = self._last_seen - self.REREAD_IDS
+                self._recent = {merchant_id for merchant_id in self._recent if merchant_id > floor}
+
+            if len(rows) < self.REFRESH_BATCH:
+                return
+            after = rows[-1][0]
+
+    def find(self, db: Session, merchant_name: str) -> Optional[Merchant]:
+        """Known merchant whose name is similar enough to merchant_name, or None."""
+        if not self.ready:
+            return None
+
+        self._refresh(db)
+
+        # strict: "BATA" must not become "BETA" because both read "BT"
+        matched = self.normalizer.match(merchant_name, self._index, strict=True)
+        if matched is None:
+            return None
+
+        # The index can hold names of merchants whose insert was rolled
+        # back; the table has the final say
+        return (
+            db.query(Merchant)
+            .filter(Merchant.normalized_key == _normalize_merchant_key(matched))
+            .first()
+        )
+
+
+known_merchants = KnownMerchants()
+
+
 def _resolve_or_create_merchant(db: Session, merchant_name: str) -> Optional[str]:
     if not merchant_name:
         return None
@@ -43,7 +160,20 @@ def _resolve_or_create_merchant(db: Session, merchant_name: str) -> Optional[str
     if merchant:
         return merchant.name
 
-    # 2️⃣ Create new (race-safe)
+    # 2️⃣ Near-identical known name (OCR typos, spacing)
+    if MERCHANT_FUZZY_MATCH:
+        try:
+            # Savepoint: a failed lookup must not abort the caller's transaction
+            with db.begin_nested():
+                merchant = known_merchants.find(db, merchant_name)
+        except Exception:
+            logger.exception("merchant_match_failed merchant=%r", merchant_name)
+            merchant = None
+
+        if merchant:
+            return merchant.name
+
+    # 3️⃣ Create new (race-safe)
     new_merchant = Merchant(
         name=merchant_name.strip(),
         normalized_key=normalized_key,
@@ -67,97 +197,191 @@ def _resolve_or_create_merchant(db: Session, merchant_name: str) -> Optional[str
         return merchant.name if merchant else merchant_name
 
 
-def process_ingestion(
+def create_ingestion_log(
     db: Session,
     user,
     input_type: str,
     raw_text: Optional[str] = None,
     payload: Optional[Dict[str, Any]] = None,
     metadata: Optional[Dict[str, Any]] = None,
+    phash: Optional[int] = None,
+    fields: Optional[ExtractedFields] = None,
+    duplicate_of_id: Optional[int] = None,
 ) -> IngestionLog:
-
+    """
+    Add a pending IngestionLog holding the raw input. Flushes, does not commit.
+
+    phash: receipt image dHash (signed 64-bit) for duplicate detection.
+    duplicate_of_id: earlier log this upload looks like another photo of;
+    run_ingestion then leaves it for review instead of creating an expense.
+    fields: engine output already computed upstream (OCR); run_ingestion
+    uses it instead of re-parsing raw_text, which may hold only the
+    regions OCR read (metadata["text_scope"]).
+    """
     input_type = (input_type or "").strip().lower()
 
     raw_payload = {
         "raw_text": raw_text,
         "structured_payload": payload,
         "metadata": metadata,
+        "fields": asdict(fields) if fields is not None else None,
     }
 
+    log = IngestionLog(
+        user_id=user.id,
+        input_type=input_type,
+        raw_payload=raw_payload,
+        status="pending",
+        phash=phash,
+        duplicate_of_id=duplicate_of_id,
+    )
+    db.add(log)
+    db.flush()
+    return log
+
+
+def record_rejected_ingestion(
+    db: Session,
+    user,
+    input_type: str,
+    status: str,
+    reason: str,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> IngestionLog:
+    """
+    Log an input that was turned away before parsing (e.g. rejected_quality).
+    """
     try:
-        log = IngestionLog(
-            user_id=user.id,
-            input_type=input_type,
-            raw_payload=raw_payload,
-            status="pending",
-        )
-        db.add(log)
-        db.flush()
-
-        # 🔥 V2 Engine
-        v2_engine = IngestionEngineV2()
-        fields = v2_engine.process(raw_text or "")
-
-        amount = fields.amount
-        transaction_date = fields.transaction_date
-        category_name = fields.category_name
-        merchant_name = fields.merchant_name
-        confidence = float(fields.confidence or 0.0)
-
-        # Normalize date
-        if isinstance(transaction_date, str):
-            try:
-                transaction_date = datetime.fromisoformat(transaction_date).date()
-            except Exception:
-                transaction_date = date.today()
-        elif transaction_date is None:
-            transaction_date = date.today()
+        log = create_ingestion_log(db, user, input_type, metadata=metadata)
+        log.status = status
+        log.error_message = reason
 
-        # 🔥 Production Merchant Resolution
-        merchant_name = _resolve_or_create_merchant(db, merchant_name)
-
-        # Optional learned mapping
-        if merchant_name:
-            try:
-                merchant_key = merchant_name.lower().strip()
-                learned = (
-                    db.query(MerchantCategoryLearning)
-                    .filter(
-                        MerchantCategoryLearning.user_id == user.id,
-                        MerchantCategoryLearning.merchant_key == merchant_key,
-                    )
-                    .first()
+        db.commit()
+        db.refresh(log)
+        return log
+
+    except Exception:
+        db.rollback()
+        logger.exception("ingestion_service.reject_failure user_id=%s", user.id)
+        raise HTTPException(status_code=500, detail="Internal ingestion error")
+
+
+def run_ingestion(
+    db: Session,
+    user,
+    log: IngestionLog,
+    fields: Optional[ExtractedFields] = None,
+) -> IngestionLog:
+    """
+    Parse a pending log with the V2 engine and create the expense when
+    confident enough and not a likely duplicate (log.duplicate_of_id).
+    Caller owns the transaction (commit / rollback).
+
+    fields: engine output computed earlier (e.g. OCR cache hit); skips the
+    engine. Defaults to the fields stored on the log, if any.
+    """
+    input_type = log.input_type
+    raw_payload = log.raw_payload or {}
+    raw_text = raw_payload.get("raw_text")
+
+    if fields is None and raw_payload.get("fields"):
+        fields = ExtractedFields(**raw_payload["fields"])
+
+    # 🔥 V2 Engine
+    if fields is None:
+        fields = ingestion_engine.process(raw_text or "")
+
+    amount = fields.amount
+    transaction_date = fields.transaction_date
+    category_name = fields.category_name
+    merchant_name = fields.merchant_name
+    confidence = float(fields.confidence or 0.0)
+
+    # Normalize date
+    if isinstance(transaction_date, str):
+        try:
+            transaction_date = datetime.fromisoformat(transaction_date).date()
+        except Exception:
+            transaction_date = date.today()
+    elif transaction_date is None:
+        transaction_date = date.today()
+
+    # 🔥 Production Merchant Resolution
+    merchant_name = _resolve_or_create_merchant(db, merchant_name)
+
+    # Optional learned mapping
+    if merchant_name:
+        try:
+            merchant_key = merchant_name.lower().strip()
+            learned = (
+                db.query(MerchantCategoryLearning)
+                .filter(
+                    MerchantCategoryLearning.user_id == user.id,
+                    MerchantCategoryLearning.merchant_key == merchant_key,
                 )
-                if learned:
-                    category_name = learned.category_name
-                    confidence = min(1.0, confidence + 0.2)
-            except Exception:
-                logger.exception("learning_lookup_failed user_id=%s", user.id)
-
-        log.parsed_amount = amount
-        log.parsed_category = category_name
-        log.parsed_merchant = merchant_name
-        log.confidence_score = confidence
-
-        if confidence >= AUTO_CREATE_THRESHOLD:
-            expense_payload = {
-                "amount": amount,
-                "transaction_date": transaction_date,
-                "category_name": category_name,
-                "merchant_name": merchant_name,
-            }
-
-            expense = create_expense_from_input(
-                db=db,
-                user=user,
-                input_type=input_type,
-                payload=expense_payload,
+                .first()
             )
+            if learned:
+                category_name = learned.category_name
+                confidence = min(1.0, confidence + 0.2)
+        except Exception:
+            logger.exception("learning_lookup_failed user_id=%s", user.id)
+
+    log.parsed_amount = amount
+    log.parsed_category = category_name
+    log.parsed_merchant = merchant_name
+    log.confidence_score = confidence
+
+    # A likely repeat photo of an earlier receipt: the user decides
+    if confidence >= AUTO_CREATE_THRESHOLD and log.duplicate_of_id is None:
+        expense_payload = {
+            "amount": amount,
+            "transaction_date": transaction_date,
+            "category_name": category_name,
+            "merchant_name": merchant_name,
+        }
+
+        expense = create_expense_from_input(
+            db=db,
+            user=user,
+            input_type=input_type,
+            payload=expense_payload,
+        )
+
+        log.expense_id = expense.id
+        log.status = "parsed"
+    else:
+        log.status = "needs_review"
+
+    return log
+
+
+def process_ingestion(
+    db: Session,
+    user,
+    input_type: str,
+    raw_text: Optional[str] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    fields: Optional[ExtractedFields] = None,
+    phash: Optional[int] = None,
+    duplicate_of_id: Optional[int] = None,
+) -> IngestionLog:
+
+    try:
+        log = create_ingestion_log(
+            db,
+            user,
+            input_type,
+            raw_text=raw_text,
+            payload=payload,
+            metadata=metadata,
+            phash=phash,
+            fields=fields,
+            duplicate_of_id=duplicate_of_id,
+        )
 
-            log.expense_id = expense.id
-            log.status = "parsed"
-        else:
-            log.status = "needs_review"
+        run_ingestion(db, user, log, fields=fields)
 
         db.commit()
         db.refresh(log)
@@ -1,6 +1,6 @@
 # services/ingestion_v2/confidence_engine.py
 
-from .receipt_model import ReceiptStructure, ExtractedFields
+from .receipt_model import TOTAL_SECTION, ReceiptStructure, ExtractedFields
 
 
 class ConfidenceEngine:
@@ -32,8 +32,9 @@ class ConfidenceEngine:
 
         # Amount found in totals region → strong boost
         if fields.amount:
-            for line in structure.total_lines:
-                if str(int(fields.amount)) in line.normalized:
+            amount_text = str(int(fields.amount))
+            for index in structure.indexes_in(TOTAL_SECTION):
+                if amount_text in structure.line(index).normalized:
                     score += 0.1
                     break
 
@@ -1,9 +1,14 @@
 # services/ingestion_v2/engine.py
 
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Iterable, List, Sequence, Set
+
 from .structure_builder import ReceiptStructureBuilder
 from .field_classifier import FieldClassifier
 from .confidence_engine import ConfidenceEngine
-from .receipt_model import ExtractedFields
+from .receipt_model import BatchResult, ExtractedFields, ReceiptStructure
 
 
 class IngestionEngineV2:
@@ -11,6 +16,12 @@ class IngestionEngineV2:
     Orchestrates structured receipt ingestion pipeline.
     """
 
+    # process_many: batches at least this large may use a process pool,
+    # smaller ones don't pay for spawning workers
+    POOL_MIN_TEXTS = 5000
+    # Texts sent to a pool worker at a time
+    POOL_CHUNK_SIZE = 1000
+
     def __init__(self):
         self.structure_builder = ReceiptStructureBuilder()
         self.field_classifier = FieldClassifier()
@@ -20,6 +31,21 @@ class IngestionEngineV2:
         # 1️⃣ Build structure
         structure = self.structure_builder.build(raw_text)
 
+        return self.process_structure(structure)
+
+    def process_pages(self, pages: Iterable[str]) -> ExtractedFields:
+        """
+        process() for a multi-page document; pages (e.g. a generator)
+        are read one at a time into one structure.
+        """
+        structure = self.structure_builder.build_pages(pages)
+
+        return self.process_structure(structure)
+
+    def process_structure(self, structure: ReceiptStructure) -> ExtractedFields:
+        """
+        Steps 2-3 for a structure built elsewhere (e.g. region-targeted OCR).
+        """
         # 2️⃣ Extract fields
         fields = self.field_classifier.classify(structure)
 
@@ -28,4 +54,82 @@ class IngestionEngineV2:
 
         fields.confidence = confidence
 
-        return fields
\ No newline at end of file
+        return fields
+
+    def process_many(self, texts: Iterable[str], workers: int = 1) -> List[BatchResult]:
+        """
+        process() over many texts (SMS imports, statement backfills).
+
+        Returns one BatchResult per text, in order; a text that fails
+        gets its error on its own result and the rest carry on.
+
+        Identical texts (a re-sent SMS, overlapping statement exports)
+        are parsed once; each gets its own copy of the fields.
+
+        workers > 1 spreads batches of POOL_MIN_TEXTS or more distinct
+        texts over that many worker processes, POOL_CHUNK_SIZE at a time.
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(text for text in texts if isinstance(text, str)))
+
+        if workers > 1 and len(unique) >= self.POOL_MIN_TEXTS:
+            parsed = dict(zip(unique, self._process_pooled(unique, workers)))
+        else:
+            parsed = {text: self._process_one(text) for text in unique}
+
+        results: List[BatchResult] = []
+        handed_out: Set[str] = set()
+
+        for text in texts:
+            if not isinstance(text, str):
+                results.append(BatchResult(error=f"TypeError: expected str, got {type(text).__name__}"))
+                continue
+
+            result = parsed[text]
+            if text in handed_out and result.fields is not None:
+                result = BatchResult(fields=replace(result.fields))
+            handed_out.add(text)
+            results.append(result)
+
+        return results
+
+    def _process_one(self, text: str) -> BatchResult:
+        try:
+            return BatchResult(fields=self.process(text))
+        except Exception as e:
+            return BatchResult(error=f"{type(e).__name__}: {e}")
+
+    def _process_pooled(self, texts: List[str], workers: int) -> List[BatchResult]:
+        chunks = [
+            texts[start:start + self.POOL_CHUNK_SIZE]
+            for start in range(0, len(texts), self.POOL_CHUNK_SIZE)
+        ]
+
+        results: List[BatchResult] = []
+
+        # spawn: never fork the API process with its threads and DB connections
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = [pool.submit(_process_chunk, chunk) for chunk in chunks]
+
+            for chunk, future in zip(chunks, futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # The worker died (or the chunk did not pickle): only
+                    # this chunk's texts are marked failed
+                    error = f"{type(e).__name__}: {e}"
+                    results.extend(BatchResult(error=error) for _ in chunk)
+
+        return results
+
+
+# Built once at import; shared by the API, the OCR pipeline and pool workers
+ingestion_engine = IngestionEngineV2()
+
+
+def _process_chunk(texts: Sequence[str]) -> List[BatchResult]:
+    """Runs in a process_many pool worker."""
+    return [ingestion_engine._process_one(text) for text in texts]
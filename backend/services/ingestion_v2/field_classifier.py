@@ -1,109 +1,142 @@
 import re
-from typing import List
-from .receipt_model import ReceiptStructure, ExtractedFields
-
-
-ADDRESS_KEYWORDS = [
-    "road", "street", "sector", "complex", "cross",
-    "near", "district", "state", "floor", "village",
-    "plot", "lane", "building"
-]
-
-META_KEYWORDS = [
-    "gst", "gstin", "invoice", "bill", "date",
-    "time", "mobile", "phone", "tel",
-    "order", "transaction", "receipt no"
-]
-
-CATEGORY_RULES = {
-    "coffee": "Food",
-    "pizzeria": "Food",
-    "restaurant": "Food",
-    "dine": "Food",
-    "cafe": "Food",
-    "petrol": "Transport",
-    "fuel": "Transport",
-    "hp service": "Transport",
-    "uber": "Transport",
-    "ola": "Transport",
-    "medical": "Health",
-    "pharmacy": "Health",
-    "mart": "Groceries",
-    "supermarket": "Groceries",
-}
+from typing import Dict, List, Optional
+from .receipt_keywords import (
+    ADDRESS,
+    META,
+    GRAND_TOTAL,
+    AMOUNT_PAYABLE,
+    NET_TOTAL,
+    TOTAL_WORD,
+    category_for,
+    receipt_keywords,
+)
+from .receipt_lexer import AMOUNT, DATE, HEADER, ReceiptToken, receipt_lexer
+from .receipt_model import BODY_SECTION, TOTAL_SECTION, ReceiptLine, ReceiptStructure, ExtractedFields
 
 
 class FieldClassifier:
 
     def classify(self, structure: ReceiptStructure) -> ExtractedFields:
-        amount = self._extract_amount(structure)
-        merchant = self._extract_merchant(structure)
+        # Lines are lexed on demand, each at most once: long statements
+        # only pay for the few lines the extractors actually read
+        tokens: Dict[int, List[ReceiptToken]] = {}
+
+        amount = self._extract_amount(structure, tokens)
+        merchant = self._extract_merchant(structure, tokens)
         category = self._infer_category(merchant)
 
         return ExtractedFields(
             amount=amount,
-            transaction_date=None,
+            transaction_date=self._extract_date(structure, tokens),
             merchant_name=merchant,
             category_name=category,
             confidence=0.0,
         )
 
+    def _line_tokens(
+        self,
+        structure: ReceiptStructure,
+        index: int,
+        tokens: Dict[int, List[ReceiptToken]],
+    ) -> List[ReceiptToken]:
+        line_tokens = tokens.get(index)
+        if line_tokens is None:
+            line_tokens = tokens[index] = receipt_lexer.tokenize(structure.line(index).normalized)
+        return line_tokens
+
     # =====================================================
     # AMOUNT (unchanged strong logic)
     # =====================================================
 
-    def _extract_amount(self, structure: ReceiptStructure):
-        candidates = []
+    def _extract_amount(self, structure: ReceiptStructure, tokens: Dict[int, List[ReceiptToken]]):
+        # Best (score, (line index, token index), value); the first of
+        # equal scores wins, as the stable sort over all candidates used to pick
+        best = None
 
+        # Line indexes; tags are read straight from the structure
         search_lines = (
-            structure.total_lines
-            if structure.total_lines
-            else structure.body_lines[-8:]
+            structure.indexes_in(TOTAL_SECTION)
+            or structure.indexes_in(BODY_SECTION)[-8:]
         )
 
-        for line in search_lines:
-            text = line.normalized.lower()
-            numbers = re.findall(r"[0-9]+(?:\.[0-9]{1,2})?", text)
+        # Lines by score, best first (in line order among equals); a number
+        # scores its line's score, +10 with a decimal part
+        scored = sorted(
+            ((self._amount_line_score(structure, index), index) for index in search_lines),
+            key=lambda pair: -pair[0],
+        )
 
-            for num in numbers:
-                try:
-                    value = float(num)
-                except:
+        for line_score, index in scored:
+            if best is not None:
+                ceiling = line_score + 10
+                if ceiling < best[0]:
+                    break
+                # Could only tie, and would come after the best one
+                if ceiling == best[0] and index > best[1][0]:
                     continue
 
-                if value <= 0:
+            position = 0
+            for num in self._line_tokens(structure, index, tokens):
+                if num.kind != AMOUNT:
                     continue
+                position += 1
 
-                score = 0
+                value = num.value
 
-                if "grand total" in text:
-                    score += 100
-                elif "amount payable" in text:
-                    score += 90
-                elif "net total" in text:
-                    score += 80
-                elif "total" in text:
-                    score += 50
+                if value <= 0:
+                    continue
 
-                if "." in num:
-                    score += 10
+                score = line_score
 
-                if line.index > len(structure.all_lines) * 0.6:
+                if num.decimal:
                     score += 10
 
-                candidates.append((score, value))
+                order = (index, position)
+                if best is None or score > best[0] or (score == best[0] and order < best[1]):
+                    best = (score, order, value)
 
-        if not candidates:
+        if best is None:
             return None
 
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        best_score, best_value = candidates[0]
+        best_score, _, best_value = best
 
         if best_score < 20:
             return None
 
         return round(best_value, 2)
 
+    def _amount_line_score(self, structure: ReceiptStructure, index: int) -> int:
+        line_tags = structure.tags[index]
+
+        # Same for every number on the line
+        line_score = 0
+
+        if GRAND_TOTAL in line_tags:
+            line_score += 100
+        elif AMOUNT_PAYABLE in line_tags:
+            line_score += 90
+        elif NET_TOTAL in line_tags:
+            line_score += 80
+        elif TOTAL_WORD in line_tags:
+            line_score += 50
+
+        if index > len(structure) * 0.6:
+            line_score += 10
+
+        return line_score
+
+    # =====================================================
+    # DATE
+    # =====================================================
+
+    def _extract_date(self, structure: ReceiptStructure, tokens: Dict[int, List[ReceiptToken]]) -> Optional[str]:
+        # First date on the receipt, ISO formatted
+        for index in range(len(structure)):
+            for token in self._line_tokens(structure, index, tokens):
+                if token.kind == DATE:
+                    return token.value
+        return None
+
     # =====================================================
     # MERCHANT — PRODUCTION GRADE SCORING
     # =====================================================
@@ -114,20 +147,22 @@ class FieldClassifier:
         text = re.sub(r"\s+", " ", text).strip()
         return text
 
-    def _is_address_like(self, text: str) -> bool:
-        lower = text.lower()
-        return any(k in lower for k in ADDRESS_KEYWORDS)
+    def _is_address_like(self, line: ReceiptLine) -> bool:
+        return ADDRESS in line.tags
 
-    def _is_meta_line(self, text: str) -> bool:
-        lower = text.lower()
-        return any(k in lower for k in META_KEYWORDS)
+    def _is_meta_line(self, line: ReceiptLine) -> bool:
+        return META in line.tags
 
-    def _extract_merchant(self, structure: ReceiptStructure):
+    def _extract_merchant(self, structure: ReceiptStructure, tokens: Dict[int, List[ReceiptToken]]):
 
-        lines = structure.header_lines or structure.all_lines[:6]
+        lines = structure.header_lines or [structure.line(i) for i in range(min(6, len(structure)))]
         candidates = []
 
         for idx, line in enumerate(lines[:6]):
+            # Only lines the lexer sees as merchant candidates (letters, no date)
+            if not any(t.kind == HEADER for t in self._line_tokens(structure, line.index, tokens)):
+                continue
+
             raw = line.normalized.strip()
 
             if len(raw) < 3:
@@ -152,11 +187,11 @@ class FieldClassifier:
                 score += 15
 
             # Penalize address lines
-            if self._is_address_like(normalized):
+            if self._is_address_like(line):
                 score -= 40
 
             # Penalize metadata lines
-            if self._is_meta_line(normalized):
+            if self._is_meta_line(line):
                 score -= 50
 
             # Prefer medium-length names
@@ -184,10 +219,4 @@ class FieldClassifier:
         if not merchant:
             return None
 
-        lower = merchant.lower()
-
-        for keyword, category in CATEGORY_RULES.items():
-            if keyword in lower:
-                return category
-
-        return None
\ No newline at end of file
+        return category_for(receipt_keywords.tags(merchant.lower()))
\ No newline at end of file
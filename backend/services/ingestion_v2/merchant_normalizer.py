@@ -1,5 +1,19 @@
+import math
 import re
+from array import array
+from collections import Counter
 from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+_NO_IDS = array("I")
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Character trigrams of text, padded so short keys and word edges count."""
+    if not text:
+        return set()
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
 
 
 class MerchantNormalizer:
@@ -31,25 +45,172 @@ class MerchantNormalizer:
         ]
         return max(scores)
 
-    def canonicalize(self, merchant: str | None, known_merchants: list[str]) -> str | None:
+    def forms(self, text: str) -> Tuple[str, str, str]:
+        """The three forms best_similarity compares."""
+        return text, self.remove_vowels(text), self.collapse_repeated_chars(text)
+
+    def similarity_bound(self, a_counts: List[Counter], b: str) -> float:
+        """
+        Upper bound of best_similarity(a, b), a_counts being the character
+        counts of forms(a): per form, ratio() can't exceed the share of
+        characters the two have in common (SequenceMatcher.quick_ratio).
+        """
+        bound = 0.0
+        for counts, form in zip(a_counts, self.forms(b)):
+            length = sum(counts.values()) + len(form)
+            if not length:
+                return 1.0
+            common = sum((counts & Counter(form)).values())
+            bound = max(bound, 2.0 * common / length)
+        return bound
+
+    def match(
+        self,
+        merchant: str | None,
+        known_merchants: Union[List[str], "MerchantIndex"],
+        strict: bool = False,
+    ) -> str | None:
+        """
+        The known merchant most similar to merchant when at least
+        SIMILARITY_THRESHOLD similar (earliest known one on ties), else None.
+
+        known_merchants: a list (every name is scored) or a MerchantIndex
+        (only its short candidate list is).
+
+        strict: the names as written must be SIMILARITY_THRESHOLD similar
+        too, not just some form of them. Without vowels, different short
+        names can read the same ("BATA" / "BETA" -> "BT").
+        """
         if not merchant:
             return None
 
         merchant_norm = self.normalize_basic(merchant)
 
+        if isinstance(known_merchants, MerchantIndex):
+            candidates: Iterable[Tuple[str, str]] = known_merchants.candidates(merchant_norm)
+        else:
+            candidates = ((known, self.normalize_basic(known)) for known in known_merchants)
+
+        # Only names whose similarity_bound reaches the threshold get the
+        # full best_similarity, most promising first
+        merchant_counts = [Counter(form) for form in self.forms(merchant_norm)]
+        bounded = []
+        for position, (known, known_norm) in enumerate(candidates):
+            bound = self.similarity_bound(merchant_counts, known_norm)
+            if bound >= self.SIMILARITY_THRESHOLD:
+                bounded.append((bound, position, known, known_norm))
+
+        bounded.sort(key=lambda c: (-c[0], c[1]))
+
         best_match = None
         best_score = 0.0
+        best_position = -1
 
-        for known in known_merchants:
-            known_norm = self.normalize_basic(known)
+        for bound, position, known, known_norm in bounded:
+            if bound < best_score:
+                break
 
             score = self.best_similarity(merchant_norm, known_norm)
 
-            if score > best_score:
+            if strict and self.similarity(merchant_norm, known_norm) < self.SIMILARITY_THRESHOLD:
+                continue
+
+            if score > best_score or (score == best_score and position < best_position):
                 best_score = score
                 best_match = known
+                best_position = position
 
         if best_score >= self.SIMILARITY_THRESHOLD:
             return best_match
 
-        return merchant_norm.title()
\ No newline at end of file
+        return None
+
+    def canonicalize(self, merchant: str | None, known_merchants: Union[List[str], "MerchantIndex"]) -> str | None:
+        if not merchant:
+            return None
+
+        best_match = self.match(merchant, known_merchants)
+        if best_match is not None:
+            return best_match
+
+        return self.normalize_basic(merchant).title()
+
+
+class MerchantIndex:
+    """
+    Known merchant names, indexed for MerchantNormalizer.match.
+
+    Every normalize_basic key is indexed by its character trigrams, once
+    per form best_similarity compares (as is, vowels removed, repeated
+    characters collapsed). A lookup only reads the posting lists of the
+    query's rarest trigrams: a name sharing at least MIN_SHARED of the
+    query's trigrams in some form is always in one of them. The names
+    with the most shared trigrams, at most CANDIDATES, are then scored
+    with best_similarity. Lookup cost follows how common the query's
+    trigrams are, not how many merchants are known.
+
+    add() is incremental; lookups may run in other threads while one
+    add() at a time does.
+    """
+
+    MIN_SHARED = 0.5
+    CANDIDATES = 32
+
+    def __init__(self, names: Iterable[str] = (), normalizer: Optional[MerchantNormalizer] = None):
+        self.normalizer = normalizer or MerchantNormalizer()
+
+        self._names: List[str] = []
+        self._keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # One gram -> merchant ids map per form
+        self._postings: Tuple[Dict[str, array], ...] = ({}, {}, {})
+
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name: str) -> bool:
+        return self.normalizer.normalize_basic(name) in self._ids
+
+    def add(self, name: str) -> None:
+        """Index name; names whose key is already known are skipped (the first one stays)."""
+        key = self.normalizer.normalize_basic(name)
+        if not key or key in self._ids:
+            return
+
+        # Name and key first, postings next: a concurrent lookup never
+        # finds an id it cannot resolve
+        merchant_id = len(self._names)
+        self._names.append(name)
+        self._keys.append(key)
+
+        for form, postings in zip(self.normalizer.forms(key), self._postings):
+            for gram in _trigrams(form):
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("I")
+                ids.append(merchant_id)
+
+        self._ids[key] = merchant_id
+
+    def candidates(self, key: str) -> List[Tuple[str, str]]:
+        """(name, key) of the known merchants most likely to match key, in insertion order."""
+        counts: Counter = Counter()
+
+        for form, postings in zip(self.normalizer.forms(key), self._postings):
+            grams = _trigrams(form)
+            if not grams:
+                continue
+
+            lists = sorted((postings.get(gram, _NO_IDS) for gram in grams), key=len)
+
+            # Sharing min_shared of len(lists) grams means sharing one of
+            # the len(lists) - min_shared + 1 rarest
+            min_shared = max(1, math.ceil(len(lists) * self.MIN_SHARED))
+            for ids in lists[:len(lists) - min_shared + 1]:
+                counts.update(ids)
+
+        best = sorted(merchant_id for merchant_id, _ in counts.most_common(self.CANDIDATES))
+        return [(self._names[merchant_id], self._keys[merchant_id]) for merchant_id in best]
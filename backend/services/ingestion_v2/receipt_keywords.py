@@ -0,0 +1,188 @@
+# services/ingestion_v2/receipt_keywords.py
+
+import re
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+# Keyword classes a receipt line can carry (ReceiptLine.tags)
+TOTAL = "total"
+FOOTER = "footer"
+ADDRESS = "address"
+META = "meta"
+
+# Amount ladder in FieldClassifier, strongest first
+GRAND_TOTAL = "grand_total"
+AMOUNT_PAYABLE = "amount_payable"
+NET_TOTAL = "net_total"
+TOTAL_WORD = "total_word"
+
+CATEGORY_PREFIX = "category:"
+
+_NO_TAGS: FrozenSet[str] = frozenset()
+
+
+TOTAL_KEYWORDS = (
+    "total",
+    "grand total",
+    "net amount",
+    "amount payable",
+    "balance",
+    "sale",
+)
+
+FOOTER_KEYWORDS = (
+    "thank",
+    "visit again",
+    "gst",
+    "tax invoice",
+    "invoice no",
+    "receipt no",
+)
+
+ADDRESS_KEYWORDS = [
+    "road", "street", "sector", "complex", "cross",
+    "near", "district", "state", "floor", "village",
+    "plot", "lane", "building"
+]
+
+META_KEYWORDS = [
+    "gst", "gstin", "invoice", "bill", "date",
+    "time", "mobile", "phone", "tel",
+    "order", "transaction", "receipt no"
+]
+
+CATEGORY_RULES = {
+    "coffee": "Food",
+    "pizzeria": "Food",
+    "restaurant": "Food",
+    "dine": "Food",
+    "cafe": "Food",
+    "petrol": "Transport",
+    "fuel": "Transport",
+    "hp service": "Transport",
+    "uber": "Transport",
+    "ola": "Transport",
+    "medical": "Health",
+    "pharmacy": "Health",
+    "mart": "Groceries",
+    "supermarket": "Groceries",
+}
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Regex for a set of literal keywords shaped as a prefix trie, e.g.
+    gst(?:in)?|t(?:otal|el). The engine follows one branch per character
+    instead of trying every keyword, and the greedy optional suffixes
+    make it match the longest keyword starting at a position.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    All keyword classes of a text in one scan.
+
+    Every keyword of every class is compiled into one regex: the literal
+    keywords as a prefix trie (longest keyword at a position wins), which
+    also credits every literal keyword inside the match ("total" in
+    "grand total", "invoice" in "invoice no"). The scan resumes one
+    character after each match start, so overlapping keywords are all
+    found. The result is exactly the set of classes with a keyword that
+    is a substring of the text, as any(k in text for k in keywords) per
+    class.
+
+    Multi-word keywords of the loose classes also match words separated
+    by any run of characters other than letters and ".&-", the way
+    FieldClassifier used to see a line after normalizing it (so
+    "receipt#no" is still a meta line). They are tried before the
+    literals and must not be the start of a longer literal keyword.
+    """
+
+    def __init__(self, classes: Dict[str, Iterable[str]], loose: Iterable[str] = ()):
+        loose = set(loose)
+        literal_classes: Dict[str, Set[str]] = {}
+        loose_classes: Dict[str, Set[str]] = {}
+
+        for name, keywords in classes.items():
+            for keyword in keywords:
+                literal_classes.setdefault(keyword, set()).add(name)
+                if name in loose and " " in keyword:
+                    loose_classes.setdefault(keyword, set()).add(name)
+
+        self._literal_classes = {k: frozenset(v) for k, v in literal_classes.items()}
+        self._loose_classes = {
+            f"loose{i}": frozenset(names) for i, names in enumerate(loose_classes.values())
+        }
+
+        loose_patterns = [
+            f"(?P<loose{i}>" + "[^a-z.&\\-]+".join(re.escape(w) for w in keyword.split(" ")) + ")"
+            for i, keyword in enumerate(loose_classes)
+        ]
+        self._pattern = re.compile("|".join(loose_patterns + [_trie_pattern(literal_classes)]))
+        self._cache: Dict[str, FrozenSet[str]] = {}
+
+    def _classes(self, matched: str) -> FrozenSet[str]:
+        classes = self._cache.get(matched)
+        if classes is None:
+            classes = frozenset().union(*(
+                names for keyword, names in self._literal_classes.items() if keyword in matched
+            ))
+            # Loose matches vary ("receipt # no"); keep the cache bounded
+            if len(self._cache) < 4096:
+                self._cache[matched] = classes
+        return classes
+
+    def tags(self, text: str) -> FrozenSet[str]:
+        """Classes matched in text (already lowercased)."""
+        search = self._pattern.search
+        match = search(text)
+        if match is None:
+            return _NO_TAGS
+
+        tags: Set[str] = set()
+        while match is not None:
+            tags |= self._classes(match.group())
+            if match.lastgroup is not None:
+                tags |= self._loose_classes[match.lastgroup]
+            match = search(text, match.start() + 1)
+
+        return frozenset(tags)
+
+
+# Built once at import; shared by ReceiptStructureBuilder, FieldClassifier and ocr_regions
+receipt_keywords = KeywordMatcher({
+    TOTAL: TOTAL_KEYWORDS,
+    FOOTER: FOOTER_KEYWORDS,
+    ADDRESS: ADDRESS_KEYWORDS,
+    META: META_KEYWORDS,
+    GRAND_TOTAL: ("grand total",),
+    AMOUNT_PAYABLE: ("amount payable",),
+    NET_TOTAL: ("net total",),
+    TOTAL_WORD: ("total",),
+    **{CATEGORY_PREFIX + keyword: (keyword,) for keyword in CATEGORY_RULES},
+}, loose=(ADDRESS, META))
+
+
+def category_for(tags: FrozenSet[str]) -> Optional[str]:
+    """Category of the first CATEGORY_RULES keyword present in tags."""
+    for keyword, category in CATEGORY_RULES.items():
+        if CATEGORY_PREFIX + keyword in tags:
+            return category
+    return None
@@ -0,0 +1,241 @@
+# services/ingestion_v2/receipt_lexer.py
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+# Token kinds
+AMOUNT = "amount"
+DATE = "date"
+HINT = "hint"
+HEADER = "header"
+
+
+@dataclass
+class ReceiptToken:
+    kind: str
+    text: str
+    start: int
+    end: int
+    line: int  # index of the line in the lexed text (blank lines count)
+    # AMOUNT: float, DATE: ISO date string, HINT: keyword, HEADER: rank among the non-blank lines
+    value: Union[float, str, int, None] = None
+    # AMOUNT only
+    currency: bool = False  # right after a currency symbol (₹, Rs, INR, $, €, £)
+    decimal: bool = False  # written with a decimal part ("260.50", "2000,00")
+    hint: Optional[str] = None  # last HINT keyword before it on its line
+
+
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+HINT_KEYWORDS = (
+    r"grand\s*total",
+    r"amount\s*payable",
+    r"net\s*amount",
+    r"net\s*total",
+    r"sub\s*total",
+    r"total",
+    r"amount",
+    r"balance",
+    r"sale",
+)
+
+# Every branch starts with a digit, a letter or a currency sign, so the
+# regex engine can skip other characters quickly; the digit branches
+# check the character before the number after their first digit.
+_TOKEN_SOURCE = (
+    r"\d(?<![\w.,]\d)(?:"
+    r"(?P<ymd>\d{3}-\d{1,2}-\d{1,2}\b)"
+    r"|(?P<dmy>\d?(?P<sep>[-/.])\d{1,2}(?P=sep)\d{4}\b)"
+    r"|(?P<dmy_short>\d?(?P<sep_short>[-/])\d{1,2}(?P=sep_short)\d{2}\b)"
+    r"|(?P<dmony>\d?[-\s]?(?P<month>" + "|".join(MONTHS) + r")[a-z]*\.?[-\s,]*(?P<year>\d{4}|\d{2})\b)"
+    r"|(?P<time>\d?:\d{2}(?::\d{2})?\b)"
+    r"|(?P<amount>[\d,]*(?:\.\d{1,2})?\b))"
+    r"|(?P<hint>" + "|".join(HINT_KEYWORDS) + r")"
+    r"|(?:r(?<!\wr)s\.?|i(?<!\wi)nr|[₹$€£])\s*(?P<currency_amount>\d[\d,]*(?:\.\d{1,2})?\b)"
+)
+
+
+class ReceiptLexer:
+    """
+    Typed tokens of a receipt text in one left-to-right scan, shared by
+    OCRParser and IngestionEngineV2:
+
+    - DATE: dates in the usual receipt formats (2026-02-15, 15/02/2026,
+      15-02-26, 15.02.2026, 15 Feb 2026) as ISO strings; day first,
+      month first when that is the only valid reading
+    - HINT: amount hint keywords ("total", "grand total", "balance", ...)
+    - AMOUNT: numbers, with the currency / hint context they appear in
+    - HEADER: one per top line that could name the merchant
+
+    Dates and times are matched before numbers, so their digits never
+    come out as amounts.
+    """
+
+    # The scan runs on a lowercased copy; texts whose length changes when
+    # lowercased (rare non-ASCII) use the case-insensitive pattern instead
+    TOKEN_PATTERN = re.compile(_TOKEN_SOURCE)
+    TOKEN_PATTERN_IGNORECASE = re.compile(_TOKEN_SOURCE, re.IGNORECASE)
+
+    COMMA_DECIMAL_PATTERN = re.compile(r",[0-9]{2}$")
+
+    MONTH_NUMBERS = {name: number for number, name in enumerate(MONTHS, 1)}
+
+    # Top non-blank lines looked at for HEADER tokens
+    HEADER_LINES = 10
+    HEADER_MIN_LETTERS = 3
+
+    DATE_CACHE_SIZE = 4096
+
+    def __init__(self):
+        self._date_cache: Dict[str, Optional[str]] = {}
+
+    def tokenize(self, text: str) -> List[ReceiptToken]:
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self.TOKEN_PATTERN.finditer(lowered)
+        else:
+            matches = self.TOKEN_PATTERN_IGNORECASE.finditer(text)
+
+        tokens: List[ReceiptToken] = []
+        date_lines: Set[int] = set()
+
+        line = 0
+        line_checked = 0
+        hint: Optional[str] = None
+        count = text.count
+
+        for m in matches:
+            start = m.start()
+            if count("\n", line_checked, start):
+                line += count("\n", line_checked, start)
+                hint = None
+            line_checked = start
+
+            kind = m.lastgroup
+
+            if kind == "amount":
+                end = m.end()
+                raw = text[start:end]
+                if "," in raw:
+                    value, decimal = self._number(raw)
+                    if value is None:
+                        continue
+                else:
+                    value, decimal = float(raw), "." in raw
+                tokens.append(ReceiptToken(AMOUNT, raw, start, end, line, value, False, decimal, hint))
+
+            elif kind == "currency_amount":
+                start, end = m.span(kind)
+                raw = text[start:end]
+                value, decimal = self._number(raw)
+                if value is None:
+                    continue
+                tokens.append(ReceiptToken(AMOUNT, raw, start, end, line, value, True, decimal, hint))
+
+            elif kind == "hint":
+                hint = " ".join(m.group().lower().split())
+                tokens.append(ReceiptToken(HINT, text[start:m.end()], start, m.end(), line, hint))
+
+            elif kind != "time":
+                iso = self._date(m)
+                if iso is not None:
+                    date_lines.add(line)
+                    tokens.append(ReceiptToken(DATE, text[start:m.end()], start, m.end(), line, iso))
+
+        headers = self._headers(text, date_lines)
+        if headers:
+            tokens = sorted(tokens + headers, key=lambda t: t.start)
+
+        return tokens
+
+    def _number(self, raw: str) -> Tuple[Optional[float], bool]:
+        """(value, has a decimal part) of a number token; comma decimals ("2000,00") included."""
+        cleaned = raw
+        if "," in cleaned:
+            if "." not in cleaned and self.COMMA_DECIMAL_PATTERN.search(cleaned):
+                cleaned = cleaned.replace(",", ".")
+            cleaned = cleaned.replace(",", "")
+
+        try:
+            return float(cleaned), "." in cleaned
+        except ValueError:
+            # "1,2,00" read as a comma decimal
+            return None, False
+
+    def _date(self, m: re.Match) -> Optional[str]:
+        """ISO date of a date match; None for impossible dates (31/02/2026)."""
+        text = m.group().lower()
+        if text in self._date_cache:
+            return self._date_cache[text]
+
+        kind = m.lastgroup
+        readings: List[Tuple[int, int, int]] = []
+
+        if kind == "ymd":
+            year, month, day = (int(part) for part in text.split("-"))
+            readings.append((year, month, day))
+
+        elif kind == "dmony":
+            month_name = m.group("month").lower()
+            year_text = m.group("year")
+            day = int(text[:2] if text[1].isdigit() else text[:1])
+            readings.append((self._full_year(year_text), self.MONTH_NUMBERS[month_name], day))
+
+        else:
+            sep = m.group("sep") or m.group("sep_short")
+            first, second, year_text = text.split(sep)
+            year = self._full_year(year_text)
+            readings.append((year, int(second), int(first)))
+            readings.append((year, int(first), int(second)))
+
+        iso = None
+        for year, month, day in readings:
+            try:
+                iso = date(year, month, day).isoformat()
+                break
+            except ValueError:
+                continue
+
+        if len(self._date_cache) < self.DATE_CACHE_SIZE:
+            self._date_cache[text] = iso
+        return iso
+
+    def _full_year(self, year_text: str) -> int:
+        year = int(year_text)
+        if len(year_text) == 2:
+            # strptime's %y pivot
+            year += 1900 if year >= 69 else 2000
+        return year
+
+    def _headers(self, text: str, date_lines: Set[int]) -> List[ReceiptToken]:
+        """HEADER tokens: top non-blank lines with some letters and no date."""
+        headers: List[ReceiptToken] = []
+        rank = 0
+        line = 0
+        start = 0
+
+        while rank < self.HEADER_LINES and start <= len(text):
+            end = text.find("\n", start)
+            if end == -1:
+                end = len(text)
+
+            stripped = text[start:end].strip()
+            if stripped:
+                if (
+                    line not in date_lines
+                    and sum(map(str.isalpha, stripped)) >= self.HEADER_MIN_LETTERS
+                ):
+                    offset = text.index(stripped, start)
+                    headers.append(ReceiptToken(HEADER, stripped, offset, offset + len(stripped), line, rank))
+                rank += 1
+
+            line += 1
+            start = end + 1
+
+        return headers
+
+
+# Built once at import; shared by FieldClassifier and OCRParser
+receipt_lexer = ReceiptLexer()
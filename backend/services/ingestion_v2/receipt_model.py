@@ -1,25 +1,106 @@
 # services/ingestion_v2/receipt_model.py
 
-from dataclasses import dataclass, field
-from typing import List, Optional
+from array import array
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional
+
+# Section codes (ReceiptStructure.sections)
+HEADER_SECTION = 0
+BODY_SECTION = 1
+TOTAL_SECTION = 2
+FOOTER_SECTION = 3
+
+
+class ReceiptStructure:
+    """
+    Lines of a receipt, stored compactly for long multi-page statements.
+
+    - text: the normalized lines (stripped, whitespace runs collapsed,
+      blank lines dropped) joined by "\\n", in one string
+    - source: the text the lines were read from; raw lines slice it
+    - per line, in arrays: start / end offsets in text and in source
+      (raw lines are stripped when read), and the section code
+    - tags: keyword classes of each line (receipt_keywords)
+
+    ReceiptLine objects are views made on demand; header_lines,
+    body_lines, total_lines and footer_lines build fresh lists of them.
+    """
+
+    __slots__ = ("text", "source", "starts", "ends", "raw_starts", "raw_ends", "sections", "tags")
+
+    def __init__(self, text: str = "", source: str = ""):
+        self.text = text
+        self.source = source
+        self.starts = array("I")
+        self.ends = array("I")
+        self.raw_starts = array("I")
+        self.raw_ends = array("I")
+        self.sections = array("B")
+        self.tags: List[FrozenSet[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line(self, index: int) -> "ReceiptLine":
+        return ReceiptLine(self, index)
+
+    def indexes_in(self, section: int) -> List[int]:
+        return [i for i, code in enumerate(self.sections) if code == section]
+
+    def lines_in(self, section: int) -> List["ReceiptLine"]:
+        return [ReceiptLine(self, i) for i in self.indexes_in(section)]
+
+    @property
+    def all_lines(self) -> List["ReceiptLine"]:
+        return [ReceiptLine(self, i) for i in range(len(self.starts))]
+
+    @property
+    def header_lines(self) -> List["ReceiptLine"]:
+        return self.lines_in(HEADER_SECTION)
+
+    @property
+    def body_lines(self) -> List["ReceiptLine"]:
+        return self.lines_in(BODY_SECTION)
+
+    @property
+    def total_lines(self) -> List["ReceiptLine"]:
+        return self.lines_in(TOTAL_SECTION)
+
+    @property
+    def footer_lines(self) -> List["ReceiptLine"]:
+        return self.lines_in(FOOTER_SECTION)
 
 
-@dataclass
 class ReceiptLine:
-    index: int
-    raw: str
-    normalized: str
+    """One line of a ReceiptStructure; its text is sliced out when read."""
 
+    __slots__ = ("structure", "index")
 
-@dataclass
-class ReceiptStructure:
-    all_lines: List[ReceiptLine] = field(default_factory=list)
-    header_lines: List[ReceiptLine] = field(default_factory=list)
-    body_lines: List[ReceiptLine] = field(default_factory=list)
-    total_lines: List[ReceiptLine] = field(default_factory=list)
-    footer_lines: List[ReceiptLine] = field(default_factory=list)
+    def __init__(self, structure: ReceiptStructure, index: int):
+        self.structure = structure
+        self.index = index
+
+    @property
+    def raw(self) -> str:
+        s = self.structure
+        return s.source[s.raw_starts[self.index]:s.raw_ends[self.index]].strip()
+
+    @property
+    def normalized(self) -> str:
+        s = self.structure
+        return s.text[s.starts[self.index]:s.ends[self.index]]
+
+    @property
+    def tags(self) -> FrozenSet[str]:
+        return self.structure.tags[self.index]
+
+    @property
+    def section(self) -> int:
+        return self.structure.sections[self.index]
+
+    def __repr__(self) -> str:
+        return f"ReceiptLine(index={self.index}, normalized={self.normalized!r})"
 
-    
 
 @dataclass
 class ExtractedFields:
@@ -27,4 +108,11 @@ class ExtractedFields:
     transaction_date: Optional[str] = None
     merchant_name: Optional[str] = None
     category_name: Optional[str] = None
-    confidence: float = 0.0
\ No newline at end of file
+    confidence: float = 0.0
+
+
+@dataclass
+class BatchResult:
+    """One text of IngestionEngineV2.process_many: its fields, or why it failed."""
+    fields: Optional[ExtractedFields] = None
+    error: Optional[str] = None
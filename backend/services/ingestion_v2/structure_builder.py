@@ -1,8 +1,14 @@
 # services/ingestion_v2/structure_builder.py
 
-import re
-from typing import List
-from .receipt_model import ReceiptLine, ReceiptStructure
+from typing import Dict, FrozenSet, Iterable, Iterator, Tuple
+from .receipt_keywords import TOTAL, FOOTER, TOTAL_KEYWORDS, FOOTER_KEYWORDS, receipt_keywords
+from .receipt_model import (
+    HEADER_SECTION,
+    BODY_SECTION,
+    TOTAL_SECTION,
+    FOOTER_SECTION,
+    ReceiptStructure,
+)
 
 
 class ReceiptStructureBuilder:
@@ -14,78 +20,100 @@ class ReceiptStructureBuilder:
     - footer
     """
 
-    TOTAL_KEYWORDS = (
-        "total",
-        "grand total",
-        "net amount",
-        "amount payable",
-        "balance",
-        "sale",
-    )
-
-    FOOTER_KEYWORDS = (
-        "thank",
-        "visit again",
-        "gst",
-        "tax invoice",
-        "invoice no",
-        "receipt no",
-    )
+    TOTAL_KEYWORDS = TOTAL_KEYWORDS
+
+    FOOTER_KEYWORDS = FOOTER_KEYWORDS
 
     def build(self, raw_text: str) -> ReceiptStructure:
-        lines = self._prepare_lines(raw_text)
+        return self.build_pages((raw_text,))
+
+    def build_pages(self, pages: Iterable[str]) -> ReceiptStructure:
+        """
+        One structure over the pages of a document, top to bottom.
 
-        structure = ReceiptStructure(
-            all_lines=lines
-        )
+        pages may be a generator (e.g. PDF pages as they are read): each
+        page is pulled, scanned and appended before the next one.
+        """
+        structure = ReceiptStructure()
+
+        # Lines with the same keyword classes share one tags set
+        interned: Dict[FrozenSet[str], FrozenSet[str]] = {}
 
         total_zone_started = False
 
-        for line in lines:
-            lower = line.normalized.lower()
+        for line, start, end, raw_start, raw_end in self._scan(pages, structure):
+            tags = receipt_keywords.tags(line.lower())
+            tags = interned.setdefault(tags, tags)
 
             # Detect total section
-            if any(k in lower for k in self.TOTAL_KEYWORDS):
+            if TOTAL in tags:
                 total_zone_started = True
-                structure.total_lines.append(line)
-                continue
+                section = TOTAL_SECTION
 
             # Detect footer
-            if total_zone_started and any(k in lower for k in self.FOOTER_KEYWORDS):
-                structure.footer_lines.append(line)
-                continue
-
-            # Header detection: until first numeric-heavy line
-            if not total_zone_started:
-                digit_ratio = sum(c.isdigit() for c in line.normalized) / max(1, len(line.normalized))
-
-                if digit_ratio < 0.3:
-                    structure.header_lines.append(line)
-                    continue
+            elif total_zone_started and FOOTER in tags:
+                section = FOOTER_SECTION
 
             # After total zone but not footer → still total region
-            if total_zone_started:
-                structure.total_lines.append(line)
-                continue
+            elif total_zone_started:
+                section = TOTAL_SECTION
+
+            # Header detection: lines that are not numeric-heavy
+            elif sum(map(str.isdigit, line)) / max(1, len(line)) < 0.3:
+                section = HEADER_SECTION
 
             # Everything else → body
-            structure.body_lines.append(line)
+            else:
+                section = BODY_SECTION
+
+            structure.starts.append(start)
+            structure.ends.append(end)
+            structure.raw_starts.append(raw_start)
+            structure.raw_ends.append(raw_end)
+            structure.sections.append(section)
+            structure.tags.append(tags)
 
         return structure
 
-    def _prepare_lines(self, raw_text: str) -> List[ReceiptLine]:
-        cleaned = raw_text.replace("\r\n", "\n").replace("\r", "\n")
-        split_lines = [ln.strip() for ln in cleaned.split("\n") if ln.strip()]
-
-        prepared = []
-        for idx, ln in enumerate(split_lines):
-            normalized = re.sub(r"\s+", " ", ln)
-            prepared.append(
-                ReceiptLine(
-                    index=idx,
-                    raw=ln,
-                    normalized=normalized,
-                )
-            )
-
-        return prepared
\ No newline at end of file
+    def _scan(self, pages: Iterable[str], structure: ReceiptStructure) -> Iterator[Tuple[str, int, int, int, int]]:
+        """
+        Yields (normalized line, start, end, raw start, raw end) for every
+        non-blank line, offsets into the final structure.text / source
+        (the raw span is the unstripped line). Sets those two once the
+        pages are exhausted, so every page's text and source are kept
+        until then: the structure's line buffer is the whole document.
+        """
+        text_chunks = []
+        source_chunks = []
+        text_offset = 0
+        source_offset = 0
+
+        for page in pages:
+            source = page.replace("\r\n", "\n").replace("\r", "\n")
+            page_lines = []
+
+            for raw in source.split("\n"):
+                # Stripped, whitespace runs collapsed
+                line = " ".join(raw.split())
+
+                if line:
+                    page_lines.append(line)
+                    yield (
+                        line,
+                        text_offset,
+                        text_offset + len(line),
+                        source_offset,
+                        source_offset + len(raw),
+                    )
+                    text_offset += len(line) + 1
+
+                source_offset += len(raw) + 1
+
+            if page_lines:
+                text_chunks.append("\n".join(page_lines))
+
+            source_chunks.append(source)
+
+        # A single page is kept as is (join returns it)
+        structure.text = "\n".join(text_chunks)
+        structure.source = "\n".join(source_chunks)
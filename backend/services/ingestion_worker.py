@@ -0,0 +1,72 @@
+"""
+Ingestion job worker.
+
+Run from the backend directory, as many processes as needed:
+
+    python -m services.ingestion_worker
+"""
+import logging
+import signal
+import time
+
+from config import INGESTION_WORKER_POLL_SECONDS, MERCHANT_FUZZY_MATCH
+from database import SessionLocal
+from services.ingestion_jobs import claim_next_job, run_job
+from services.ingestion_service import known_merchants
+
+logger = logging.getLogger("expense-tracker.ingestion_worker")
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+    logger.info("ingestion_worker.stopping signal=%s", signum)
+
+
+def run_once() -> bool:
+    """
+    Claim and process a single job. Returns False when the queue was empty.
+    """
+    db = SessionLocal()
+    try:
+        job = claim_next_job(db)
+        if not job:
+            return False
+
+        run_job(db, job)
+        return True
+    finally:
+        db.close()
+
+
+def main() -> None:
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    logger.info("ingestion_worker.start poll=%ss", INGESTION_WORKER_POLL_SECONDS)
+
+    if MERCHANT_FUZZY_MATCH:
+        known_merchants.start(SessionLocal)
+
+    while not _stopping:
+        try:
+            worked = run_once()
+        except Exception:
+            # DB unavailable etc. — keep the worker alive and back off
+            logger.exception("ingestion_worker.loop_failure")
+            worked = False
+
+        if not worked:
+            time.sleep(INGESTION_WORKER_POLL_SECONDS)
+
+    logger.info("ingestion_worker.stop")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    )
+    main()
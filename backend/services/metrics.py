@@ -0,0 +1,56 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Sequence
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_histograms: Dict[str, Dict[str, Any]] = {}
+
+# Upper bounds (inclusive); one more bucket catches everything above
+LATENCY_MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+MEMORY_KB_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def increment(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def get_counter(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot() -> Dict[str, float]:
+    with _lock:
+        return dict(_counters)
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = LATENCY_MS_BUCKETS) -> None:
+    """Add a sample to a fixed-bucket histogram (buckets are set by the first sample)."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = {"buckets": tuple(buckets), "counts": [0] * (len(buckets) + 1), "count": 0, "sum": 0.0}
+            _histograms[name] = histogram
+
+        histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+        histogram["count"] += 1
+        histogram["sum"] += value
+
+
+def histograms() -> Dict[str, Dict[str, Any]]:
+    """{name: {"buckets": {"<=le": count, ..., "+Inf": count}, "count", "sum"}}, counts not cumulative."""
+    with _lock:
+        return {
+            name: {
+                "buckets": {
+                    **{f"<={le:g}": count for le, count in zip(h["buckets"], h["counts"])},
+                    "+Inf": h["counts"][-1],
+                },
+                "count": h["count"],
+                "sum": round(h["sum"], 2),
+            }
+            for name, h in _histograms.items()
+        }
@@ -0,0 +1,183 @@
+import os
+import re
+import shlex
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from config import OCR_BACKEND, OCR_LANG
+
+
+def parse_tesseract_config(config: str) -> Tuple[Optional[int], Optional[int], Dict[str, str]]:
+    """
+    Split a pytesseract style config ("--oem 3 --psm 6 -c key=value")
+    into (oem, psm, variables).
+    """
+    oem = psm = None
+    variables: Dict[str, str] = {}
+
+    tokens = shlex.split(config or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "--oem" and i + 1 < len(tokens):
+            oem = int(tokens[i + 1])
+            i += 2
+        elif token == "--psm" and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 2
+        elif token == "-c" and i + 1 < len(tokens):
+            key, _, value = tokens[i + 1].partition("=")
+            variables[key] = value
+            i += 2
+        else:
+            i += 1
+
+    return oem, psm, variables
+
+
+class OCRBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def image_to_string(self, image: np.ndarray, config: str) -> str:
+        """Recognize text in a grayscale / binary image."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def osd_rotation(self, image: np.ndarray) -> int:
+        """Clockwise rotation (0/90/180/270) that makes the page upright."""
+        raise NotImplementedError()
+
+    def image_to_string_batch(self, images: List[np.ndarray], config: str) -> List[str]:
+        """One text per image, in order. Backends override when they can do it in one call."""
+        return [self.image_to_string(image, config) for image in images]
+
+
+class PytesseractBackend(OCRBackend):
+    """
+    Spawns a tesseract process per call; every call reloads traineddata.
+    """
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        self.lang = lang
+
+    def image_to_string(self, image: np.ndarray, config: str) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def osd_rotation(self, image: np.ndarray) -> int:
+        osd = pytesseract.image_to_osd(image)
+        return int(re.search(r"Rotate: (\d+)", osd).group(1))
+
+    def image_to_string_batch(self, images: List[np.ndarray], config: str) -> List[str]:
+        """
+        A single tesseract run over an image list file: the process start and
+        traineddata load are paid once per batch. Pages come back separated
+        by form feeds.
+        """
+        if len(images) < 2:
+            return [self.image_to_string(image, config) for image in images]
+
+        with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp_dir:
+            paths = []
+            for i, image in enumerate(images):
+                path = os.path.join(tmp_dir, f"{i:04d}.png")
+                cv2.imwrite(path, image)
+                paths.append(path)
+
+            list_path = os.path.join(tmp_dir, "images.txt")
+            with open(list_path, "w") as f:
+                f.write("\n".join(paths) + "\n")
+
+            text = pytesseract.image_to_string(list_path, lang=self.lang, config=config)
+
+        pages = text.split("\f")
+        if len(pages) < len(images):
+            # Unexpected page split; don't risk handing a receipt someone else's text
+            return [self.image_to_string(image, config) for image in images]
+
+        return pages[:len(images)]
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    In-process libtesseract via tesserocr. The API handles (and the loaded
+    traineddata) stay warm for the life of the OCR worker process.
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self._apis: Dict[int, "tesserocr.PyTessBaseAPI"] = {}
+        self._osd_api = None
+
+    def _api(self, oem: Optional[int]):
+        oem = self._tesserocr.OEM.DEFAULT if oem is None else oem
+        api = self._apis.get(oem)
+        if api is None:
+            api = self._tesserocr.PyTessBaseAPI(lang=self.lang, oem=oem)
+            self._apis[oem] = api
+        return api
+
+    def image_to_string(self, image: np.ndarray, config: str) -> str:
+        oem, psm, variables = parse_tesseract_config(config)
+        api = self._api(oem)
+
+        api.SetPageSegMode(self._tesserocr.PSM.SINGLE_BLOCK if psm is None else psm)
+        for key, value in variables.items():
+            api.SetVariable(key, value)
+
+        try:
+            api.SetImage(Image.fromarray(image))
+            return api.GetUTF8Text()
+        finally:
+            # Variables persist on the handle; reset so the next call starts clean
+            for key in variables:
+                api.SetVariable(key, "")
+            api.Clear()
+
+    def osd_rotation(self, image: np.ndarray) -> int:
+        if self._osd_api is None:
+            self._osd_api = self._tesserocr.PyTessBaseAPI(
+                lang="osd",
+                psm=self._tesserocr.PSM.OSD_ONLY,
+            )
+
+        try:
+            self._osd_api.SetImage(Image.fromarray(image))
+            result = self._osd_api.DetectOrientationScript() or {}
+        finally:
+            self._osd_api.Clear()
+
+        # Same convention as tesseract's "Rotate:" line
+        return (360 - int(result.get("orient_deg", 0))) % 360
+
+
+BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+_backend: Optional[OCRBackend] = None
+
+
+def get_backend() -> OCRBackend:
+    """
+    The configured backend, created once per process (OCR_BACKEND).
+    """
+    global _backend
+    if _backend is None:
+        backend_cls = BACKENDS.get(OCR_BACKEND)
+        if backend_cls is None:
+            raise ValueError(f"Unknown OCR_BACKEND: {OCR_BACKEND}")
+        _backend = backend_cls()
+    return _backend
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import OCR_BATCH_WINDOW_MS, OCR_BATCH_MAX_SIZE
+from services import metrics
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.ocr_executor import OCRExecutor, ocr_executor
+from services.ocr_pipeline import extract_text, extract_text_batch
+
+logger = logging.getLogger("expense-tracker.ocr_batcher")
+
+
+class OCRBatcher:
+    """
+    Groups receipt images that arrive close together into a single OCR
+    pool task (one engine invocation per cascade stage).
+
+    The first image of a batch opens a window of window_ms; the batch is
+    sent when the window closes or max_size images are waiting, whichever
+    comes first. Each caller awaits only its own result.
+    """
+
+    def __init__(
+        self,
+        executor: OCRExecutor,
+        window_ms: int = OCR_BATCH_WINDOW_MS,
+        max_size: int = OCR_BATCH_MAX_SIZE,
+    ):
+        self.executor = executor
+        self.window_seconds = max(0, window_ms) / 1000
+        self.max_size = max(1, max_size)
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 1
+
+    async def submit(self, image_path: str) -> Tuple[str, ExtractedFields, Dict[str, Any]]:
+        """
+        Same contract as extract_text run through the OCR executor. Only the
+        path crosses the process boundary; workers map the file themselves.
+        """
+        if not self.enabled:
+            return await self.executor.run(extract_text, image_path)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((image_path, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        metrics.increment("ocr_batch.batches")
+        metrics.increment("ocr_batch.items", len(batch))
+        logger.debug("ocr_batcher.flush size=%s", len(batch))
+
+        try:
+            results = await self.executor.run(extract_text_batch, [item for item, _ in batch])
+        except Exception as e:
+            # Pool level failure (503 / 504 / crash) applies to the whole batch
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # Caller went away (client disconnect)
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+ocr_batcher = OCRBatcher(ocr_executor)
@@ -0,0 +1,163 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from config import OCR_CONFIG_VERSION, OCR_CACHE_MAX_BYTES, OCR_CACHE_PERSISTENT
+from database import SessionLocal
+from models.ocr_cache_orm import OCRCacheEntry
+from services import metrics
+from services.ingestion_v2.receipt_model import ExtractedFields
+
+logger = logging.getLogger("expense-tracker.ocr_cache")
+
+# raw_text, fields, metadata of the OCR run that produced them
+CachedResult = Tuple[str, ExtractedFields, Dict[str, Any]]
+
+
+def content_key(sha256_hex: str) -> str:
+    """
+    Cache key for an upload: OCR config version + SHA-256 of the raw bytes
+    (hashed while the upload streams to disk, see save_upload_stream).
+    """
+    return f"{OCR_CONFIG_VERSION}:{sha256_hex}"
+
+
+def _entry_size(raw_text: str, fields: ExtractedFields, metadata: Dict[str, Any]) -> int:
+    return len(raw_text.encode("utf-8")) + len(repr(fields)) + len(repr(metadata))
+
+
+class OCRCache:
+    """
+    Two-level cache of OCR output (raw_text + V2 fields + the run's
+    metadata: extraction path, OCR pass, text scope, ...) keyed by upload
+    content.
+
+    L1: in-process LRU bounded by max_bytes.
+    L2: optional ocr_cache table, shared by every API worker.
+    """
+
+    def __init__(self, max_bytes: int = OCR_CACHE_MAX_BYTES, persistent: bool = OCR_CACHE_PERSISTENT):
+        self.max_bytes = max_bytes
+        self.persistent = persistent
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, ExtractedFields, Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+
+    # ---------------------------
+    # L1
+    # ---------------------------
+    def _l1_get(self, key: str) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            raw_text, fields, metadata, _ = entry
+            return raw_text, replace(fields), dict(metadata)
+
+    def _l1_put(self, key: str, raw_text: str, fields: ExtractedFields, metadata: Dict[str, Any]) -> None:
+        size = _entry_size(raw_text, fields, metadata)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._bytes -= previous[3]
+
+            self._entries[key] = (raw_text, fields, metadata, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                metrics.increment("ocr_cache.evictions")
+
+    # ---------------------------
+    # L2
+    # ---------------------------
+    def _l2_get(self, key: str) -> Optional[CachedResult]:
+        db = SessionLocal()
+        try:
+            row = db.query(OCRCacheEntry).filter(OCRCacheEntry.cache_key == key).first()
+            if not row:
+                return None
+            return row.raw_text, ExtractedFields(**(row.fields or {})), row.ocr_metadata or {}
+        finally:
+            db.close()
+
+    def _l2_put(self, key: str, raw_text: str, fields: ExtractedFields, metadata: Dict[str, Any]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(
+                insert(OCRCacheEntry)
+                .values(cache_key=key, raw_text=raw_text, fields=asdict(fields), ocr_metadata=metadata)
+                .on_conflict_do_nothing(index_elements=["cache_key"])
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    # ---------------------------
+    # Public API (blocking: call from a threadpool)
+    # ---------------------------
+    def get(self, key: str) -> Optional[CachedResult]:
+        hit = self._l1_get(key)
+        if hit:
+            metrics.increment("ocr_cache.hits")
+            return hit
+
+        if self.persistent:
+            try:
+                hit = self._l2_get(key)
+            except Exception:
+                logger.exception("ocr_cache.l2_get_failure")
+                hit = None
+
+            if hit:
+                metrics.increment("ocr_cache.hits")
+                metrics.increment("ocr_cache.persistent_hits")
+                self._l1_put(key, *hit)
+                return hit
+
+        metrics.increment("ocr_cache.misses")
+        return None
+
+    def put(
+        self,
+        key: str,
+        raw_text: str,
+        fields: ExtractedFields,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        metadata = dict(metadata or {})
+        self._l1_put(key, raw_text, fields, metadata)
+
+        if self.persistent:
+            try:
+                self._l2_put(key, raw_text, fields, metadata)
+            except Exception:
+                logger.exception("ocr_cache.l2_put_failure")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = len(self._entries), self._bytes
+
+        return {
+            "hits": metrics.get_counter("ocr_cache.hits"),
+            "misses": metrics.get_counter("ocr_cache.misses"),
+            "persistent_hits": metrics.get_counter("ocr_cache.persistent_hits"),
+            "evictions": metrics.get_counter("ocr_cache.evictions"),
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "persistent": self.persistent,
+        }
+
+
+ocr_cache = OCRCache()
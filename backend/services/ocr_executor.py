@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from config import (
+    OCR_WORKERS,
+    OCR_QUEUE_SIZE,
+    OCR_JOB_TIMEOUT_SECONDS,
+    OCR_THREADS_PER_WORKER,
+)
+
+logger = logging.getLogger("expense-tracker.ocr_executor")
+
+
+def _init_worker(threads: int) -> None:
+    """
+    Runs once in every OCR worker process.
+
+    Tesseract (OpenMP) and OpenCV default to one thread per core; with a
+    pool already sized to the cores that oversubscribes the CPU, so each
+    worker is pinned to a small thread budget instead.
+    """
+    os.environ["OMP_THREAD_LIMIT"] = str(threads)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+    import cv2
+    cv2.setNumThreads(threads)
+
+    # Load the OCR engine now (warm backends keep traineddata resident)
+    from services.ocr_backends import get_backend
+    get_backend()
+
+
+class OCRExecutor:
+    """
+    Bounded process pool for CPU heavy OCR work.
+
+    - max_workers processes run jobs concurrently
+    - up to queue_size further jobs may wait; beyond that submissions get 503
+    - every job is awaited with a timeout (504 on expiry)
+
+    A job holds its slot until its worker is done with it: a timed out
+    job that already started keeps running (a pool worker can't be
+    interrupted), so it still counts against the bound until it ends.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = OCR_WORKERS,
+        queue_size: int = OCR_QUEUE_SIZE,
+        timeout_seconds: float = OCR_JOB_TIMEOUT_SECONDS,
+        threads_per_worker: int = OCR_THREADS_PER_WORKER,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout_seconds = timeout_seconds
+        self.threads_per_worker = max(1, threads_per_worker)
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        # Slots are released from pool callbacks, off the event loop
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+
+        # spawn: never fork the API process with its threads and DB connections
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+
+        # Pre-spawn workers so the first receipts don't pay interpreter start-up
+        for _ in range(self.max_workers):
+            self._pool.submit(os.getpid)
+
+        logger.info(
+            "ocr_executor.start workers=%s queue_size=%s timeout=%ss",
+            self.max_workers,
+            self.queue_size,
+            self.timeout_seconds,
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        logger.info("ocr_executor.shutdown")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) in a worker process and await its result.
+
+        fn must be a module level function (picklable).
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.queue_size:
+                logger.warning("ocr_executor.queue_full in_flight=%s", self._in_flight)
+                raise HTTPException(status_code=503, detail="OCR queue is full, retry later")
+            self._in_flight += 1
+
+        try:
+            future = self._submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        # The slot is freed when the job itself ends, not when we stop waiting
+        future.add_done_callback(self._release)
+
+        try:
+            # shield: a timeout must not cancel the (running) pool future
+            # through the asyncio wrapper; it is cancelled below if still queued
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout_seconds)
+
+        except asyncio.TimeoutError:
+            # A job still pending in the pool is dropped (and its slot
+            # freed); once handed to a worker it can't be taken back and
+            # keeps its slot until it ends
+            future.cancel()
+            logger.warning(
+                "ocr_executor.timeout fn=%s still_running=%s",
+                getattr(fn, "__name__", fn),
+                not future.done(),
+            )
+            raise HTTPException(status_code=504, detail="OCR timed out")
+
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in native code) → rebuild the pool
+            logger.exception("ocr_executor.broken_pool")
+            self.shutdown()
+            raise HTTPException(status_code=500, detail="OCR worker crashed")
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        self.start()
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died while nobody awaited it (e.g. a job that had
+            # already timed out) → rebuild the pool and try once more
+            logger.warning("ocr_executor.broken_pool_on_submit; restarting")
+            self.shutdown()
+            self.start()
+
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            logger.exception("ocr_executor.broken_pool")
+            self.shutdown()
+            raise HTTPException(status_code=500, detail="OCR worker crashed")
+
+    def _release(self, future: Optional[Future] = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+
+ocr_executor = OCRExecutor()
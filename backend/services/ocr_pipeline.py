@@ -0,0 +1,374 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from config import (
+    DUPLICATE_DETECTION,
+    OCR_FAST_PASS_HEIGHT,
+    OCR_REGION_PASS,
+    QUALITY_GATE,
+    OCR_TARGET_HEIGHT,
+    OCR_THRESHOLD_BLOCK_SIZE,
+    OCR_THRESHOLD_C,
+    OCR_MORPH_KERNEL,
+)
+from services.ingestion_service import AUTO_CREATE_THRESHOLD
+from services.ingestion_v2.engine import ingestion_engine
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.ocr_backends import get_backend
+from services.ocr_regions import read_regions
+from services.ocr_utils import load_grayscale
+from services.orientation import orient
+from services.quality_gate import LowQualityImageError, inspect_image
+from services.receipt_dedupe import dhash
+from services.stage_timer import StageTimer
+
+logger = logging.getLogger("expense-tracker.ocr_pipeline")
+
+# OCR config tuned for receipts
+TESSERACT_CONFIG = r'--oem 3 --psm 6'
+
+
+@dataclass(frozen=True)
+class PreprocessParams:
+    """Binarization settings (defaults from config; variants in the OCR benchmark)."""
+    target_height: int = OCR_TARGET_HEIGHT
+    block_size: int = OCR_THRESHOLD_BLOCK_SIZE
+    threshold_c: int = OCR_THRESHOLD_C
+    morph_kernel: int = OCR_MORPH_KERNEL
+
+
+DEFAULT_PREPROCESS = PreprocessParams()
+
+# Resize to stable DPI equivalent (~300 DPI height baseline)
+TARGET_HEIGHT = DEFAULT_PREPROCESS.target_height
+
+
+def preprocess(
+    gray: np.ndarray,
+    target_height: Optional[int] = None,
+    timer: Optional[StageTimer] = None,
+    params: PreprocessParams = DEFAULT_PREPROCESS,
+) -> np.ndarray:
+    timer = timer or StageTimer(trace_memory=False)
+    target_height = target_height or params.target_height
+
+    with timer.stage("resize"):
+        scale = target_height / gray.shape[0]
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+    # Threshold window tracks resolution (block_size px at params.target_height), must be odd
+    block_size = max(3, int(params.block_size * target_height / params.target_height) | 1)
+
+    # Adaptive threshold (critical for receipts)
+    with timer.stage("threshold"):
+        thresh = cv2.adaptiveThreshold(
+            gray,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            block_size,
+            params.threshold_c
+        )
+
+    if params.morph_kernel <= 0:
+        return thresh
+
+    # Light morphological close to join broken characters
+    with timer.stage("morphology"):
+        kernel = np.ones((params.morph_kernel, params.morph_kernel), np.uint8)
+        return cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+
+
+def _cpu_seconds() -> float:
+    # pytesseract runs tesseract as a child process, so count children too
+    # (process_time for our own share: os.times ticks are 10ms coarse)
+    t = os.times()
+    return time.process_time() + t.children_user + t.children_system
+
+
+def check_quality(gray: np.ndarray) -> Dict[str, Any]:
+    """
+    Quality gate before any orientation / OCR work. Returns the scores;
+    raises LowQualityImageError when the image is not worth OCR'ing.
+    """
+    if not QUALITY_GATE:
+        return {}
+
+    started = time.perf_counter()
+    report = inspect_image(gray)
+    report.inspect_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    if not report.passed:
+        raise LowQualityImageError(report.reason, report.to_dict())
+    return {"quality": report.to_dict()}
+
+
+def _clean_lines(text: str) -> str:
+    return "\n".join([ln.strip() for ln in text.splitlines() if ln.strip()])
+
+
+def recognize(
+    gray: np.ndarray,
+    target_height: Optional[int] = None,
+    timer: Optional[StageTimer] = None,
+    params: PreprocessParams = DEFAULT_PREPROCESS,
+) -> str:
+    """
+    Preprocess at target_height and run tesseract. gray must be upright.
+    """
+    timer = timer or StageTimer(trace_memory=False)
+    return _read_page(preprocess(gray, target_height, timer, params), timer)
+
+
+def _read_page(processed: np.ndarray, timer: StageTimer) -> str:
+    with timer.stage("tesseract"):
+        raw_text = get_backend().image_to_string(processed, TESSERACT_CONFIG)
+
+    raw_text = _clean_lines(raw_text)
+
+    # Receipt text is user data: debug only, never on in production
+    logger.debug("ocr_pipeline.recognized size=%s text=%r", processed.shape, raw_text)
+
+    return raw_text
+
+
+def ocr_image(gray: np.ndarray, exif_orientation: int = 0) -> Tuple[str, Dict[str, Any]]:
+    """
+    Orient → full resolution OCR for one grayscale image / page.
+
+    Returns the text plus info about the run (orientation path taken,
+    per-stage timings).
+    """
+    with StageTimer(cpu_clock=_cpu_seconds) as timer:
+        with timer.stage("osd"):
+            gray, info = orient(gray, exif_orientation)
+        raw_text = recognize(gray, timer=timer)
+
+    info["stages"] = timer.to_dict()
+    return raw_text, info
+
+
+def _receipt_hash(gray: np.ndarray, timer: StageTimer) -> Optional[int]:
+    """
+    dHash for services.receipt_dedupe, from the decoded page (EXIF upright,
+    before OSD). Returned in info["phash"]; None when detection is off.
+    """
+    if not DUPLICATE_DETECTION:
+        return None
+    with timer.stage("phash"):
+        return dhash(gray)
+
+
+def extract_text(
+    source: Union[bytes, str, Path],
+    params: PreprocessParams = DEFAULT_PREPROCESS,
+) -> Tuple[str, ExtractedFields, Dict[str, Any]]:
+    """
+    Receipt image OCR with a resolution cascade:
+
+    1. decode → quality gate → receipt hash (info["phash"]) → orient
+    2. fast pass at OCR_FAST_PASS_HEIGHT; if IngestionEngineV2 is already
+       confident enough to auto-create the expense, stop here
+    3. otherwise escalate to params.target_height: region-targeted OCR of the
+       header / totals bands (services.ocr_regions), or the whole page
+       when zoning does not apply
+
+    Returns (raw_text, engine fields, info); info["stages"] has wall /
+    CPU time (and, sampled, peak memory) per stage. Raises
+    LowQualityImageError for unreadable images. CPU bound; runs inside an
+    OCR executor worker process, never on the API event loop. PDFs go
+    through services.pdf_ocr instead.
+    """
+    with StageTimer(cpu_clock=_cpu_seconds) as timer:
+        raw_text, fields, info = _extract_text(source, timer, params)
+
+    info["stages"] = timer.to_dict()
+    return raw_text, fields, info
+
+
+def _extract_text(
+    source: Union[bytes, str, Path],
+    timer: StageTimer,
+    params: PreprocessParams,
+) -> Tuple[str, ExtractedFields, Dict[str, Any]]:
+    target_height = params.target_height
+
+    with timer.stage("decode"):
+        gray, exif_orientation = load_grayscale(source, target_height)
+    with timer.stage("quality"):
+        quality = check_quality(gray)
+    phash = _receipt_hash(gray, timer)
+
+    cpu_started = _cpu_seconds()
+    with timer.stage("osd"):
+        gray, info = orient(gray, exif_orientation)
+    info.update(quality, phash=phash)
+
+    fast_ms = 0.0
+
+    if 0 < OCR_FAST_PASS_HEIGHT < target_height:
+        started = time.perf_counter()
+        raw_text = recognize(gray, OCR_FAST_PASS_HEIGHT, timer, params)
+        with timer.stage("engine"):
+            fields = ingestion_engine.process(raw_text)
+        fast_ms = (time.perf_counter() - started) * 1000
+
+        if fields.confidence >= AUTO_CREATE_THRESHOLD:
+            # Pixel count drives tesseract cost, so scale the fast pass to estimate the full one
+            estimated_full_ms = fast_ms * (target_height / OCR_FAST_PASS_HEIGHT) ** 2
+            info.update({
+                "ocr_pass": "fast",
+                "ocr_ms": round(fast_ms, 1),
+                "ocr_cpu_ms": round((_cpu_seconds() - cpu_started) * 1000, 1),
+                "time_saved_ms": round(estimated_full_ms - fast_ms, 1),
+            })
+            return raw_text, fields, info
+
+    started = time.perf_counter()
+    ocr_pass = "full"
+
+    # One full resolution binarization serves the region pass and, when the
+    # page is too short to zone, the whole page fallback
+    processed = preprocess(gray, target_height, timer, params)
+
+    regions = None
+    if OCR_REGION_PASS:
+        regions = read_regions(processed, ingestion_engine, TESSERACT_CONFIG, timer)
+    if regions:
+        raw_text, _, fields, region_info = regions
+        info.update(region_info)
+        ocr_pass = "regions"
+    else:
+        raw_text = _read_page(processed, timer)
+        with timer.stage("engine"):
+            fields = ingestion_engine.process(raw_text)
+
+    full_ms = (time.perf_counter() - started) * 1000
+
+    info.update({
+        "ocr_pass": ocr_pass,
+        "ocr_ms": round(fast_ms + full_ms, 1),
+        "ocr_cpu_ms": round((_cpu_seconds() - cpu_started) * 1000, 1),
+        # Escalation cost: the wasted fast pass
+        "time_saved_ms": round(-fast_ms, 1),
+    })
+    return raw_text, fields, info
+
+
+def extract_text_batch(
+    items: List[Union[bytes, str, Path]],
+) -> List[Union[Tuple[str, ExtractedFields, Dict[str, Any]], Exception]]:
+    """
+    extract_text for a micro-batch (services.ocr_batcher), one backend
+    invocation per cascade stage instead of one per receipt:
+
+    1. decode → quality gate → receipt hash → orient every image (a bad or
+       unreadable image only fails its own slot)
+    2. fast pass of all images in one call; confident receipts stop here
+    3. the rest escalate together to a full page pass at TARGET_HEIGHT
+
+    Region OCR is per image by nature, so batched receipts skip it.
+    Returns one (raw_text, fields, info) or Exception per item, in order.
+    """
+    with StageTimer(cpu_clock=_cpu_seconds) as batch_timer:
+        return _extract_text_batch(items, batch_timer.trace_memory)
+
+
+def _add_share(timers: Dict[int, StageTimer], indices: List[int], name: str, wall_ms: float, cpu_ms: float) -> None:
+    # One backend call served every receipt in indices; split its cost evenly
+    for i in indices:
+        timers[i].add(name, wall_ms / len(indices), cpu_ms / len(indices))
+
+
+def _extract_text_batch(
+    items: List[Union[bytes, str, Path]],
+    trace_memory: bool,
+) -> List[Union[Tuple[str, ExtractedFields, Dict[str, Any]], Exception]]:
+    results: List[Any] = [None] * len(items)
+    pages: Dict[int, Tuple[np.ndarray, Dict[str, Any]]] = {}
+    timers = {
+        i: StageTimer(trace_memory=trace_memory, cpu_clock=_cpu_seconds)
+        for i in range(len(items))
+    }
+
+    for i, source in enumerate(items):
+        timer = timers[i]
+        try:
+            with timer.stage("decode"):
+                gray, exif_orientation = load_grayscale(source, TARGET_HEIGHT)
+            with timer.stage("quality"):
+                quality = check_quality(gray)
+            phash = _receipt_hash(gray, timer)
+            with timer.stage("osd"):
+                gray, info = orient(gray, exif_orientation)
+            info.update(quality, phash=phash)
+            pages[i] = (gray, info)
+        except Exception as e:
+            results[i] = e
+
+    cpu_started = _cpu_seconds()
+
+    backend = get_backend()
+    pending = sorted(pages)
+    fast_ms = 0.0
+
+    if pending and 0 < OCR_FAST_PASS_HEIGHT < TARGET_HEIGHT:
+        started = time.perf_counter()
+        processed = [preprocess(pages[i][0], OCR_FAST_PASS_HEIGHT, timers[i]) for i in pending]
+
+        call_started, call_cpu_started = time.perf_counter(), _cpu_seconds()
+        texts = backend.image_to_string_batch(processed, TESSERACT_CONFIG)
+        _add_share(timers, pending, "tesseract", (time.perf_counter() - call_started) * 1000,
+                   (_cpu_seconds() - call_cpu_started) * 1000)
+
+        # Per receipt share of the batch call
+        fast_ms = (time.perf_counter() - started) * 1000 / len(pending)
+        estimated_full_ms = fast_ms * (TARGET_HEIGHT / OCR_FAST_PASS_HEIGHT) ** 2
+
+        escalate = []
+        for i, text in zip(pending, texts):
+            raw_text = _clean_lines(text)
+            with timers[i].stage("engine"):
+                fields = ingestion_engine.process(raw_text)
+            if fields.confidence >= AUTO_CREATE_THRESHOLD:
+                info = dict(pages[i][1], ocr_pass="fast", ocr_ms=round(fast_ms, 1),
+                            time_saved_ms=round(estimated_full_ms - fast_ms, 1))
+                results[i] = (raw_text, fields, info)
+            else:
+                escalate.append(i)
+        pending = escalate
+
+    if pending:
+        started = time.perf_counter()
+        processed = [preprocess(pages[i][0], timer=timers[i]) for i in pending]
+
+        call_started, call_cpu_started = time.perf_counter(), _cpu_seconds()
+        texts = backend.image_to_string_batch(processed, TESSERACT_CONFIG)
+        _add_share(timers, pending, "tesseract", (time.perf_counter() - call_started) * 1000,
+                   (_cpu_seconds() - call_cpu_started) * 1000)
+
+        full_ms = (time.perf_counter() - started) * 1000 / len(pending)
+
+        for i, text in zip(pending, texts):
+            raw_text = _clean_lines(text)
+            with timers[i].stage("engine"):
+                fields = ingestion_engine.process(raw_text)
+            info = dict(pages[i][1], ocr_pass="full", ocr_ms=round(fast_ms + full_ms, 1),
+                        time_saved_ms=round(-fast_ms, 1))
+            results[i] = (raw_text, fields, info)
+
+    if pages:
+        # CPU of the shared backend calls, split evenly
+        cpu_ms = round((_cpu_seconds() - cpu_started) * 1000 / len(pages), 1)
+        for i in pages:
+            results[i][2]["ocr_cpu_ms"] = cpu_ms
+            results[i][2]["stages"] = timers[i].to_dict()
+
+    return results
@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.ingestion_v2.engine import IngestionEngineV2
+from services.ingestion_v2.receipt_keywords import TOTAL, FOOTER
+from services.ingestion_v2.receipt_model import (
+    HEADER_SECTION,
+    BODY_SECTION,
+    TOTAL_SECTION,
+    FOOTER_SECTION,
+    ExtractedFields,
+    ReceiptStructure,
+)
+from services.ingestion_v2.structure_builder import ReceiptStructureBuilder
+from services.ocr_backends import get_backend
+from services.stage_timer import StageTimer
+
+# FieldClassifier reads merchant from the first 6 header lines and the
+# amount from the total lines, which sit in the last few bands
+HEADER_BANDS = 6
+TOTALS_BANDS = 8
+
+# Rows count as ink when this share of the width is dark
+ROW_INK_RATIO = 0.002
+MIN_BAND_HEIGHT = 8
+BAND_PADDING = 6
+
+
+def segment_line_bands(binary: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Split a binarized page (text black on white) into horizontal text
+    line bands using the row ink profile. Returns [(top, bottom), ...].
+    """
+    ink_rows = (binary < 128).sum(axis=1)
+    has_ink = ink_rows > max(2, binary.shape[1] * ROW_INK_RATIO)
+
+    bands = []
+    start = None
+    for y, inked in enumerate(has_ink):
+        if inked and start is None:
+            start = y
+        elif not inked and start is not None:
+            if y - start >= MIN_BAND_HEIGHT:
+                bands.append((start, y))
+            start = None
+
+    if start is not None and len(has_ink) - start >= MIN_BAND_HEIGHT:
+        bands.append((start, len(has_ink)))
+
+    return bands
+
+
+def _ocr_bands(binary: np.ndarray, bands: List[Tuple[int, int]], config: str) -> List[str]:
+    if not bands:
+        return []
+
+    top = max(0, bands[0][0] - BAND_PADDING)
+    bottom = min(binary.shape[0], bands[-1][1] + BAND_PADDING)
+
+    text = get_backend().image_to_string(binary[top:bottom], config)
+    return [ln.strip() for ln in text.splitlines() if ln.strip()]
+
+
+def _build_structure(header: List[str], middle: List[str], totals: List[str]) -> ReceiptStructure:
+    """
+    Sections come from where the text was read, then the usual
+    ReceiptStructureBuilder keyword rules split body / totals / footer.
+    """
+    # The bands' lines are stripped and non-blank: line i of the
+    # structure is line i of header + middle + totals
+    structure = ReceiptStructureBuilder().build("\n".join(header + middle + totals))
+    sections = structure.sections
+
+    for index in range(len(header)):
+        line = structure.line(index).normalized
+        digit_ratio = sum(map(str.isdigit, line)) / max(1, len(line))
+        sections[index] = HEADER_SECTION if digit_ratio < 0.3 else BODY_SECTION
+
+    total_zone_started = False
+    for index in range(len(header), len(structure)):
+        tags = structure.tags[index]
+        if TOTAL in tags:
+            total_zone_started = True
+            sections[index] = TOTAL_SECTION
+        elif total_zone_started and FOOTER in tags:
+            sections[index] = FOOTER_SECTION
+        elif total_zone_started:
+            sections[index] = TOTAL_SECTION
+        else:
+            sections[index] = BODY_SECTION
+
+    return structure
+
+
+def read_regions(
+    binary: np.ndarray,
+    engine: IngestionEngineV2,
+    config: str,
+    timer: Optional[StageTimer] = None,
+) -> Optional[Tuple[str, ReceiptStructure, ExtractedFields, Dict[str, Any]]]:
+    """
+    Region-targeted OCR of a preprocessed page.
+
+    Reads the header bands (merchant) and the bottom bands (amount, footer)
+    first; the item lines in the middle are only OCR'd when merchant or
+    amount is still missing.
+
+    raw_text is only the regions that were read, in page order, so
+    info["text_scope"] is "regions"; the fields returned are the ones to
+    keep, not a re-parse of that text. Returns None when the page has too
+    few bands for zoning to pay off; the caller then OCRs the whole page.
+    """
+    timer = timer or StageTimer(trace_memory=False)
+
+    bands = segment_line_bands(binary)
+    if len(bands) <= HEADER_BANDS + TOTALS_BANDS:
+        return None
+
+    header_bands = bands[:HEADER_BANDS]
+    middle_bands = bands[HEADER_BANDS:-TOTALS_BANDS]
+    totals_bands = bands[-TOTALS_BANDS:]
+
+    with timer.stage("tesseract"):
+        header = _ocr_bands(binary, header_bands, config)
+        totals = _ocr_bands(binary, totals_bands, config)
+
+    middle: List[str] = []
+    regions = ["header", "totals"]
+
+    with timer.stage("engine"):
+        structure = _build_structure(header, middle, totals)
+        fields = engine.process_structure(structure)
+
+    if fields.amount is None or fields.merchant_name is None:
+        with timer.stage("tesseract"):
+            middle = _ocr_bands(binary, middle_bands, config)
+        regions.append("middle")
+
+        with timer.stage("engine"):
+            structure = _build_structure(header, middle, totals)
+            fields = engine.process_structure(structure)
+
+    raw_text = "\n".join(header + middle + totals)
+
+    info = {
+        "text_scope": "regions",
+        "regions": regions,
+        "bands": len(bands),
+    }
+    return raw_text, structure, fields, info
@@ -1,55 +1,130 @@
-import uuid
+import hashlib
+import mmap
+import os
+import tempfile
 from pathlib import Path
-from typing import Tuple
+from typing import BinaryIO, Optional, Tuple, Union
 
 from fastapi import UploadFile, HTTPException
 
-from PIL import Image
+from PIL import Image, ImageOps
 import io
-import cv2
 import numpy as np
 
+from services import metrics
+from services.storage import StorageBackend, receipt_key, receipt_storage
 
-def save_upload_file(upload_file: UploadFile, dest_dir: Path, max_size_bytes: int = 5 * 1024 * 1024) -> Tuple[Path, bytes]:
-    data = upload_file.file.read()
 
-    if not data:
-        raise HTTPException(status_code=400, detail="Empty file")
+# EXIF orientations that swap width and height (90° / 270° variants)
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
 
-    if len(data) > max_size_bytes:
-        raise HTTPException(status_code=400, detail="File too large")
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+
+# Per upload memory is one chunk, whatever the file size
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Stored extension by sniffed Pillow format
+_IMAGE_EXTENSIONS = {
+    "JPEG": ".jpg",
+    "MPO": ".jpg",
+    "PNG": ".png",
+    "WEBP": ".webp",
+    "TIFF": ".tif",
+    "BMP": ".bmp",
+    "GIF": ".gif",
+}
+
+
+class ImageDecodeError(ValueError):
+    """Upload looked like an image but could not be decoded."""
+
+
+def save_upload_file(
+    upload_file: UploadFile,
+    storage: StorageBackend = receipt_storage,
+    max_size_bytes: int = MAX_UPLOAD_BYTES,
+) -> Tuple[str, str]:
+    return save_upload_stream(upload_file.file, upload_file.content_type or "", storage, max_size_bytes)
+
+
+def _sniff_ext(path: Path) -> Optional[str]:
+    """
+    Extension for what the file actually is, from its header; None when it
+    is neither a supported image nor a PDF. Header sniff only; the single
+    full decode in load_grayscale is what validates the pixel data.
+    """
+    with open(path, "rb") as f:
+        # Readers accept the PDF header anywhere in the first 1 KB
+        if b"%PDF-" in f.read(1024):
+            return ".pdf"
 
-    # Try to detect if it's an image
-    is_image = False
     try:
-        Image.open(io.BytesIO(data)).verify()
-        is_image = True
+        with Image.open(path) as probe:
+            if probe.format is None:
+                return None
+            return _IMAGE_EXTENSIONS.get(probe.format, f".{probe.format.lower()}")
     except Exception:
-        is_image = False
+        return None
+
+
+def save_upload_stream(
+    stream: BinaryIO,
+    content_type: str,
+    storage: StorageBackend = receipt_storage,
+    max_size_bytes: int = MAX_UPLOAD_BYTES,
+) -> Tuple[str, str]:
+    """
+    Store one receipt file (upload body or batch/zip entry) without ever
+    holding it in memory: chunks go straight to a staging file, the size
+    limit is enforced as they arrive and the SHA-256 is computed on the way
+    through. The file is then stored under its content-addressed key, so
+    identical uploads are kept once.
+
+    Returns (storage key, sha256 hex digest).
+    """
+    storage.staging_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_name = tempfile.mkstemp(dir=storage.staging_dir, prefix="upload_", suffix=".part")
+    tmp_path = Path(tmp_name)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
 
-    content_type = upload_file.content_type or ""
+                size += len(chunk)
+                if size > max_size_bytes:
+                    raise HTTPException(status_code=400, detail="File too large")
 
-    if not is_image and content_type != "application/pdf":
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type: {content_type}"
-        )
+                digest.update(chunk)
+                out.write(chunk)
 
-    dest_dir.mkdir(parents=True, exist_ok=True)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
 
-    # Decide extension
-    if is_image:
-        ext = ".jpg"
-    else:
-        ext = ".pdf"
+        ext = _sniff_ext(tmp_path)
+        if ext is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {content_type}"
+            )
 
-    filename = f"{uuid.uuid4().hex}{ext}"
-    dest_path = dest_dir / filename
+        sha256_hex = digest.hexdigest()
+        key = receipt_key(sha256_hex, ext)
 
-    with open(dest_path, "wb") as f:
-        f.write(data)
+        if not storage.put_file(tmp_path, key):
+            metrics.increment("storage.dedup_hits")
 
-    return dest_path, data
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return key, sha256_hex
 
 
 def _ext_for_content_type(content_type: str) -> str:
@@ -62,5 +137,56 @@ def _ext_for_content_type(content_type: str) -> str:
     return ""
 
 
-def image_from_bytes(data: bytes):
-    return Image.open(io.BytesIO(data)).convert("RGB")
\ No newline at end of file
+def load_grayscale(source: Union[bytes, str, Path], target_height: int = 2000) -> Tuple[np.ndarray, int]:
+    """
+    Decode an image exactly once, straight to an upright grayscale ndarray.
+
+    - JPEGs far larger than target_height are decoded at reduced
+      resolution by libjpeg (draft mode, 1/2 .. 1/8 scale), directly into
+      luma, instead of full-size RGB followed by resize + cvtColor.
+    - EXIF orientation is applied as part of the decode.
+
+    Returns (gray, exif_orientation); exif_orientation is 0 when the
+    image carries no orientation tag.
+    Raises ImageDecodeError when the data is not a decodable image.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _decode_grayscale(io.BytesIO(source), target_height)
+
+    # Files are memory-mapped: the decoder reads pages straight from the
+    # page cache instead of a private bytes copy of the whole file
+    try:
+        with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _decode_grayscale(mapped, target_height)
+    except ImageDecodeError:
+        raise
+    except (OSError, ValueError) as exc:
+        raise ImageDecodeError(f"Could not decode image: {exc}") from exc
+
+
+def _decode_grayscale(fp, target_height: int) -> Tuple[np.ndarray, int]:
+    try:
+        img = Image.open(fp)
+        orientation = img.getexif().get(0x0112, 0)
+
+        if img.format == "JPEG":
+            width, height = img.size
+            upright_height = width if orientation in _TRANSPOSED_ORIENTATIONS else height
+
+            size = img.size
+            if upright_height >= 2 * target_height:
+                scale = target_height / upright_height
+                size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+            # draft() never goes below the requested size
+            img.draft("L", size)
+
+        ImageOps.exif_transpose(img, in_place=True)
+
+        if img.mode != "L":
+            img = img.convert("L")
+
+        return np.asarray(img), orientation
+
+    except Exception as exc:
+        raise ImageDecodeError(f"Could not decode image: {exc}") from exc
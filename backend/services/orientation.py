@@ -0,0 +1,98 @@
+from typing import Any, Dict, Tuple
+
+import cv2
+import numpy as np
+
+from config import ORIENTATION_MIN_MARGIN
+from services.ocr_backends import get_backend
+
+ROTATIONS = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+# Long side of the copy the projection heuristic looks at
+PROFILE_MAX_SIDE = 800
+
+# Landscape pages need a clearer margin: receipts are almost always portrait
+LANDSCAPE_ASPECT = 1.2
+LANDSCAPE_MARGIN_FACTOR = 1.5
+
+
+def profile_margin(gray: np.ndarray) -> float:
+    """
+    Projection-profile orientation score on a downscaled, binarized copy.
+
+    Upright text lines leave fully empty rows between them while ink
+    covers nearly every column, so (share of empty rows − share of empty
+    columns) is clearly positive for 0°/180° and negative for 90°/270°.
+    Near zero means "can't tell" (photos of non-text, heavy noise, ...).
+    """
+    h, w = gray.shape[:2]
+    scale = PROFILE_MAX_SIDE / max(h, w)
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    ink = cv2.adaptiveThreshold(
+        gray, 1, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15
+    )
+
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 50:
+        return 0.0
+
+    ink = ink[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+    rows = ink.sum(axis=1)
+    cols = ink.sum(axis=0)
+
+    empty_rows = float((rows <= 0.02 * rows.max()).mean())
+    empty_cols = float((cols <= 0.02 * cols.max()).mean())
+
+    return empty_rows - empty_cols
+
+
+def osd_rotation(gray: np.ndarray) -> int:
+    """
+    Rotation reported by Tesseract OSD (a full extra recognition run). 0 on failure.
+    """
+    try:
+        return get_backend().osd_rotation(gray)
+    except Exception:
+        return 0
+
+
+def orient(
+    gray: np.ndarray,
+    exif_orientation: int = 0,
+    min_margin: float = ORIENTATION_MIN_MARGIN,
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Bring a page upright as cheaply as possible.
+
+    1. EXIF orientation tag present → already applied during decode.
+    2. Projection-profile heuristic says upright with enough margin → done.
+       (It cannot tell 0° from 180°; upside-down photos without EXIF are
+       rare enough to accept that.)
+    3. Otherwise (sideways or ambiguous) → tesseract OSD.
+
+    Returns the upright image and {"orientation": <path>, "rotation": deg}.
+    """
+    if exif_orientation:
+        return gray, {"orientation": "exif", "rotation": 0}
+
+    h, w = gray.shape[:2]
+    required = min_margin
+    if w > h * LANDSCAPE_ASPECT:
+        required *= LANDSCAPE_MARGIN_FACTOR
+
+    margin = profile_margin(gray)
+    if margin >= required:
+        return gray, {"orientation": "heuristic", "rotation": 0, "margin": round(margin, 3)}
+
+    rotation = osd_rotation(gray)
+    if rotation in ROTATIONS:
+        gray = cv2.rotate(gray, ROTATIONS[rotation])
+
+    return gray, {"orientation": "osd", "rotation": rotation, "margin": round(margin, 3)}
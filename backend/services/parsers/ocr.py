@@ -1,8 +1,11 @@
 import re
 import difflib
+from bisect import bisect_right
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
-from datetime import datetime, date
+from datetime import date
+
+from services.ingestion_v2.receipt_lexer import AMOUNT, DATE, HEADER, HINT, ReceiptToken, receipt_lexer
 
 from .base import ParserBase
 
@@ -18,6 +21,22 @@ class AmountCandidate:
     near_hint: bool
 
 
+@dataclass
+class ParsedDocument:
+    """
+    One OCR text, normalized and lexed once for every extractor
+    (built by OCRParser.build_document).
+    """
+    text: str  # _normalize(raw_text) with _normalize_ocr_errors applied
+    lower: str
+    lines: List[str]  # non-blank lines of text
+    line_spans: List[Tuple[int, int]]  # (start, end) of every line of text, blank ones included
+    tokens: List[ReceiptToken]  # receipt_lexer output, in text order
+    dates: List[str]  # ISO dates of the DATE tokens
+    hint_positions: List[int]  # starts of the HINT tokens (sorted)
+    headers: Dict[int, ReceiptToken]  # HEADER tokens by rank among the non-blank lines
+
+
 class OCRParser(ParserBase):
     """
     Production-ready OCR parser (pure parsing, no DB access).
@@ -46,32 +65,10 @@ class OCRParser(ParserBase):
         "rent": "Housing",
     }
 
-    AMOUNT_HINT_KEYWORDS: Tuple[str, ...] = (
-        "total",
-        "grand total",
-        "amount",
-        "net amount",
-        "balance",
-        "subtotal",
-    )
-
-    # Patterns to capture numeric tokens (group 1 contains numeric part)
-    AMOUNT_PATTERNS: Tuple[re.Pattern, ...] = (
-        # Currency symbol followed by number
-        re.compile(r"(?:₹|Rs\.?|INR|\$|€|£)\s*([0-9]{1,3}(?:[,\d]*)(?:\.\d{1,2})?)", re.IGNORECASE),
-        # Hint keyword followed by number
-        re.compile(
-            r"(?:total|amount|grand total|net amount|balance|subtotal)[:\s]*([0-9]+(?:[,\d]*)(?:\.\d{1,2})?)",
-            re.IGNORECASE,
-        ),
-        # Plain numeric token
-        re.compile(r"\b([0-9]+(?:[,\d]*)(?:\.\d{1,2})?)\b"),
-    )
-
-    DATE_PATTERNS: Tuple[re.Pattern, ...] = (
-        re.compile(r"\b(\d{4}-\d{2}-\d{2})\b"),  # YYYY-MM-DD
-        re.compile(r"\b(\d{2}-\d{2}-\d{4})\b"),  # DD-MM-YYYY
-        re.compile(r"\b(\d{2}/\d{2}/\d{4})\b"),  # DD/MM/YYYY
+    # Header lines the merchant fallback skips
+    MERCHANT_SKIP_PATTERN: re.Pattern = re.compile(
+        r"\b(invoice|invoice no|inv no|bill no|gst|gstin|tax|tax id|receipt no|order no|ord no)\b",
+        re.IGNORECASE,
     )
 
     MIN_REASONABLE_AMOUNT: float = 1.0
@@ -99,97 +96,65 @@ class OCRParser(ParserBase):
     def _lower(self, text: str) -> str:
         return text.lower() if text else ""
 
-    # ---------------------------
-    # Date extraction helpers
-    # ---------------------------
-    def _find_date_spans(self, text: str) -> List[Tuple[int, int]]:
-        spans: List[Tuple[int, int]] = []
-        for rx in self.DATE_PATTERNS:
-            for m in rx.finditer(text):
-                spans.append((m.start(1), m.end(1)))
-        return spans
-
-    def _overlaps_date(self, start: int, end: int, date_spans: List[Tuple[int, int]]) -> bool:
-        for ds, de in date_spans:
-            if not (end <= ds or start >= de):
-                return True
-        return False
+    def build_document(self, raw_text: Optional[str]) -> ParsedDocument:
+        """
+        Normalize raw_text once (OCR error fixes included) and lex it with
+        the shared receipt lexer: amounts, dates, hints and header lines.
+        """
+        text = self._normalize_ocr_errors(self._normalize(raw_text))
+
+        line_spans: List[Tuple[int, int]] = []
+        start = 0
+        if text:
+            for line in text.split("\n"):
+                line_spans.append((start, start + len(line)))
+                start += len(line) + 1
+
+        tokens = receipt_lexer.tokenize(text)
+
+        return ParsedDocument(
+            text=text,
+            lower=self._lower(text),
+            lines=[ln for ln in text.splitlines() if ln.strip()],
+            line_spans=line_spans,
+            tokens=tokens,
+            dates=[t.value for t in tokens if t.kind == DATE],
+            hint_positions=[t.start for t in tokens if t.kind == HINT],
+            headers={t.value: t for t in tokens if t.kind == HEADER},
+        )
 
     # ---------------------------
     # Amount extraction (new subsystem)
     # ---------------------------
-    def _extract_amount_candidates(self, text: str) -> List[AmountCandidate]:
+    def _extract_amount_candidates(self, doc: ParsedDocument) -> List[AmountCandidate]:
         """
-        Extract numeric token candidates from text with metadata for scoring.
+        Extract numeric token candidates from the document with metadata for scoring.
         """
         candidates: List[AmountCandidate] = []
         try:
-            text_lower = self._lower(text)
-
-            # find hint keyword positions
-            hint_positions: List[int] = []
-            for kw in self.AMOUNT_HINT_KEYWORDS:
-                for m in re.finditer(re.escape(kw), text_lower):
-                    hint_positions.append(m.start())
-
-            # date spans to avoid overlapping tokens
-            date_spans = self._find_date_spans(text)
-
-            for pattern in self.AMOUNT_PATTERNS:
-                for m in pattern.finditer(text):
-                    raw = m.group(1)
-                    if not raw:
-                        continue
-                    start = m.start(1)
-                    end = m.end(1)
-                    raw_token = raw.strip()
-
-                    # prepare numeric cleaned string
-                    cleaned = raw_token.strip()
-
-                    # Handle comma as decimal separator (e.g., 2000,00 → 2000.00)
-                    if "," in cleaned and "." not in cleaned:
-                        if re.search(r",[0-9]{2}$", cleaned):
-                            cleaned = cleaned.replace(",", ".")
-                        else:
-                            cleaned = cleaned.replace(",", "")
-
-                    # Remove remaining thousands separators
-                    cleaned = cleaned.replace(",", "")
-
-                    # Remove currency symbols or stray chars at start
-                    cleaned = re.sub(r"^[^\d\-\.]+", "", cleaned)
-
-                    try:
-                        value = float(cleaned)
-                    except Exception:
-                        continue
-
-                    contains_decimal = "." in cleaned
-                    digit_length = len(re.sub(r"[^\d]", "", cleaned))
-
-                    # near_hint: within NEAR_HINT_WINDOW characters after a hint keyword
-                    near = False
-                    for hp in hint_positions:
-                        if 0 <= (start - hp) <= self.NEAR_HINT_WINDOW:
-                            near = True
-                            break
-
-                    # ignore tokens overlapping dates immediately
-                    if self._overlaps_date(start, end, date_spans):
-                        continue
-
-                    candidates.append(
-                        AmountCandidate(
-                            value=value,
-                            start=start,
-                            end=end,
-                            raw_token=raw_token,
-                            contains_decimal=contains_decimal,
-                            digit_length=digit_length,
-                            near_hint=near,
-                        )
+            hint_positions = doc.hint_positions
+
+            # Dates are separate tokens, so no amount overlaps one
+            for token in doc.tokens:
+                if token.kind != AMOUNT:
+                    continue
+
+                # near_hint: within NEAR_HINT_WINDOW characters after a hint keyword
+                # (the last hint at or before the token is the closest one)
+                closest = bisect_right(hint_positions, token.start) - 1
+                near = closest >= 0 and token.start - hint_positions[closest] <= self.NEAR_HINT_WINDOW
+
+                candidates.append(
+                    AmountCandidate(
+                        value=token.value,
+                        start=token.start,
+                        end=token.end,
+                        raw_token=token.text,
+                        contains_decimal=token.decimal,
+                        digit_length=sum(c.isdigit() for c in token.text),
+                        near_hint=near,
                     )
+                )
         except Exception:
             # safe failure: return what we have (possibly empty)
             return candidates
@@ -213,16 +178,18 @@ class OCRParser(ParserBase):
         except Exception:
             return False
 
-    def _prefer_amount(self, text: str, candidates: List[AmountCandidate]) -> Optional[float]:
+    def _prefer_amount(self, doc: ParsedDocument, candidates: List[AmountCandidate]) -> Optional[float]:
         try:
-            if not text:
+            if not doc.text:
                 return None
 
-            lines = text.splitlines()
-            if not lines:
-                return None
+            total_lines = len(doc.line_spans)
 
-            total_lines = len(lines)
+            # Amount tokens grouped by line
+            line_amounts: Dict[int, List[ReceiptToken]] = {}
+            for token in doc.tokens:
+                if token.kind == AMOUNT:
+                    line_amounts.setdefault(token.line, []).append(token)
 
             # Keywords
             strong_total_keywords = ["grand total", "net amount", "amount payable"]
@@ -231,28 +198,9 @@ class OCRParser(ParserBase):
 
             line_scores = []
 
-            for idx, line in enumerate(lines):
-                line_lower = line.lower().strip()
-
-                if not line_lower:
-                    continue
-
-                # Extract numeric values from this specific line only
-                numbers = re.findall(r"[0-9]+(?:[,\d]*)(?:\.\d{1,2})?", line_lower)
-                if not numbers:
-                    continue
-
-                # Convert numbers safely
-                numeric_values = []
-                for n in numbers:
-                    cleaned = n.replace(",", "")
-                    try:
-                        numeric_values.append(float(cleaned))
-                    except:
-                        continue
-
-                if not numeric_values:
-                    continue
+            for idx, amounts in line_amounts.items():
+                start, end = doc.line_spans[idx]
+                line_lower = doc.lower[start:end].strip()
 
                 # Base score
                 score = 0
@@ -277,7 +225,7 @@ class OCRParser(ParserBase):
                     score -= 5
 
                 # Choose the largest number in that line
-                max_value = max(numeric_values)
+                max_value = max(t.value for t in amounts)
 
                 line_scores.append((score, max_value))
 
@@ -300,22 +248,13 @@ class OCRParser(ParserBase):
     # ---------------------------
     # Date extraction
     # ---------------------------
-    def _extract_date(self, raw_text: Optional[str]) -> Tuple[Optional[date], bool]:
+    def _extract_date(self, doc: ParsedDocument) -> Tuple[Optional[date], bool]:
         """
         Return (date_or_None, detected_flag)
         """
         try:
-            text = self._normalize(raw_text)
-            for rx in self.DATE_PATTERNS:
-                m = rx.search(text)
-                if not m:
-                    continue
-                s = m.group(1)
-                for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"):
-                    try:
-                        return datetime.strptime(s, fmt).date(), True
-                    except Exception:
-                        continue
+            if doc.dates:
+                return date.fromisoformat(doc.dates[0]), True
             return None, False
         except Exception:
             return None, False
@@ -323,12 +262,10 @@ class OCRParser(ParserBase):
     # ---------------------------
     # Merchant detection
     # ---------------------------
-    def _detect_merchant(self, raw_text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    def _detect_merchant(self, doc: ParsedDocument) -> Tuple[Optional[str], Optional[str]]:
         try:
-            text = self._normalize(raw_text)
-            text = self._normalize_ocr_errors(text)
-            text_lower = self._lower(text)
-            lines = [ln for ln in text.splitlines() if ln.strip()]
+            text_lower = doc.lower
+            lines = doc.lines
 
             # Direct substring match
             for key in self.MERCHANT_CATEGORY_MAP.keys():
@@ -364,31 +301,24 @@ class OCRParser(ParserBase):
                 if (
                     len(combined) < 60
                     and uppercase_ratio > 0.4
-                    and not any(rx.search(combined) for rx in self.DATE_PATTERNS)
+                    # both are header candidates (letters, no date)
+                    and 0 in doc.headers
+                    and 1 in doc.headers
                 ):
                     return combined.lower(), combined
 
             # ✅ Fallback heuristic (NOW CORRECTLY PLACED)
-            fallback_keywords_rx = re.compile(
-                r"\b(invoice|invoice no|inv no|bill no|gst|gstin|tax|tax id|receipt no|order no|ord no)\b",
-                re.IGNORECASE,
-            )
-
-            for ln in lines[:6]:
-                ln_str = ln.strip()
-                if not ln_str:
+            # Header candidates among the top lines: some letters, no date
+            for rank in range(6):
+                header = doc.headers.get(rank)
+                if header is None:
                     continue
+                ln_str = header.text
                 if len(ln_str) > 60:
                     continue
-                if len(re.findall(r"[A-Za-z]", ln_str)) < 3:
-                    continue
-
-                # Skip date-like lines
-                if any(rx.search(ln_str) for rx in self.DATE_PATTERNS):
-                    continue
 
                 # Skip invoice/gst lines
-                if fallback_keywords_rx.search(ln_str):
+                if self.MERCHANT_SKIP_PATTERN.search(ln_str):
                     continue
 
                 # Skip mostly numeric lines
@@ -421,15 +351,14 @@ class OCRParser(ParserBase):
     # ---------------------------
     # Category inference
     # ---------------------------
-    def _infer_category(self, raw_text: Optional[str], merchant_key: Optional[str]) -> Optional[str]:
+    def _infer_category(self, doc: ParsedDocument, merchant_key: Optional[str]) -> Optional[str]:
         try:
             if merchant_key:
                 mapped = self.MERCHANT_CATEGORY_MAP.get(merchant_key)
                 if mapped:
                     return mapped
-            text_lower = self._lower(self._normalize(raw_text))
             for kw, cat in self.KEYWORD_CATEGORY_MAP.items():
-                if kw in text_lower:
+                if kw in doc.lower:
                     return cat
             return None
         except Exception:
@@ -462,25 +391,25 @@ class OCRParser(ParserBase):
         Parse raw_text into structured fields. Safe: catches exceptions and returns fallback.
         """
         try:
-            text = raw_text or ""
-            normalized_text = self._normalize(text)
+            # Normalized and indexed once; every extractor reads from it
+            doc = self.build_document(raw_text)
 
             # Extract amount candidates and select best
-            candidates = self._extract_amount_candidates(normalized_text)
+            candidates = self._extract_amount_candidates(doc)
             amount = None
             if candidates:
-                amount = self._prefer_amount(normalized_text, candidates)
+                amount = self._prefer_amount(doc, candidates)
 
             # Extract date (with detection flag)
-            tx_date, date_detected = self._extract_date(normalized_text)
+            tx_date, date_detected = self._extract_date(doc)
             if tx_date is None:
                 tx_date = date.today()
 
             # Merchant detection
-            merchant_key, merchant_display = self._detect_merchant(text)
+            merchant_key, merchant_display = self._detect_merchant(doc)
 
             # Category inference
-            category_name = self._infer_category(text, merchant_key)
+            category_name = self._infer_category(doc, merchant_key)
 
             # Confidence calculation
             amount_found = amount is not None
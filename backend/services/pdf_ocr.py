@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+from starlette.concurrency import run_in_threadpool
+
+from config import OCR_PDF_MAX_PAGES, OCR_PDF_DPI, OCR_PDF_TEXT_LAYER_MIN_CHARS
+from services import metrics
+from services.ocr_executor import OCRExecutor
+from services.ocr_pipeline import ocr_image
+from services.ocr_utils import load_grayscale
+from services.stage_timer import export_stages
+
+logger = logging.getLogger("expense-tracker.pdf_ocr")
+
+
+# ----------------------------------------
+# Worker side (runs in the OCR process pool)
+# ----------------------------------------
+def ocr_pdf_page(pdf_path: str, page_number: int, dpi: int) -> Tuple[int, str, Dict[str, Any]]:
+    """
+    Rasterize a single page into a temp directory and OCR it.
+
+    Only one page bitmap is alive per worker, so memory stays flat no
+    matter how many pages the document has.
+    """
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="pdf_page_") as tmp_dir:
+        paths = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            first_page=page_number,
+            last_page=page_number,
+            output_folder=tmp_dir,
+            fmt="png",
+            grayscale=True,
+            paths_only=True,
+        )
+        if not paths:
+            raise Exception(f"PDF page {page_number} could not be rasterized")
+
+        rasterized = time.perf_counter()
+
+        gray, _ = load_grayscale(paths[0])
+        text, info = ocr_image(gray)
+
+    finished = time.perf_counter()
+
+    timings = {
+        "page": page_number,
+        "rasterize_ms": round((rasterized - started) * 1000, 1),
+        "ocr_ms": round((finished - rasterized) * 1000, 1),
+        "orientation": info["orientation"],
+        "stages": info["stages"],
+    }
+    return page_number, text, timings
+
+
+# ----------------------------------------
+# API side
+# ----------------------------------------
+def count_pdf_pages(pdf_path: str) -> int:
+    info = pdfinfo_from_path(pdf_path)
+    return int(info.get("Pages", 0))
+
+
+def extract_text_layer(pdf_path: str, max_pages: int = OCR_PDF_MAX_PAGES) -> str:
+    """
+    Read the embedded text of a digital PDF with poppler's pdftotext
+    (same poppler install pdf2image already needs). -layout keeps a
+    label and its amount on one line, as on the printed receipt.
+
+    Returns "" when the tool is missing or the PDF has no text layer.
+    """
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-layout", "-q", "-l", str(max_pages), pdf_path, "-"],
+            capture_output=True,
+            timeout=30,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        logger.warning("pdf_ocr.text_layer_unavailable path=%s", pdf_path, exc_info=True)
+        return ""
+
+    text = result.stdout.decode("utf-8", errors="replace")
+
+    return "\n".join(
+        [ln.strip() for ln in text.replace("\f", "\n").splitlines() if ln.strip()]
+    )
+
+
+def has_text_layer(text: str, min_chars: int = OCR_PDF_TEXT_LAYER_MIN_CHARS) -> bool:
+    return sum(c.isalnum() for c in text) >= min_chars
+
+
+async def extract_pdf_text(
+    executor: OCRExecutor,
+    pdf_path: str,
+    max_pages: int = OCR_PDF_MAX_PAGES,
+    dpi: int = OCR_PDF_DPI,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Text for a PDF upload plus metadata for the ingestion log.
+
+    Digitally generated PDFs use their embedded text layer directly.
+    Scanned PDFs fall back to OCR of every page (up to max_pages) in
+    parallel across the OCR pool; pages are collected as they finish and
+    joined back in page order, so ReceiptStructureBuilder sees the
+    document top to bottom.
+    """
+    page_count = await run_in_threadpool(count_pdf_pages, pdf_path)
+    if page_count < 1:
+        raise Exception("No pages found in PDF")
+
+    pages_to_process = min(page_count, max_pages)
+
+    text_layer = await run_in_threadpool(extract_text_layer, pdf_path, max_pages)
+    if has_text_layer(text_layer):
+        return text_layer, {
+            "extraction_path": "text_layer",
+            "pdf_page_count": page_count,
+            "pdf_pages_processed": pages_to_process,
+        }
+
+    # One document never holds more pool slots than there are workers
+    slots = asyncio.Semaphore(executor.max_workers)
+
+    async def run_page(page_number: int):
+        async with slots:
+            return await executor.run(ocr_pdf_page, pdf_path, page_number, dpi)
+
+    tasks = [
+        asyncio.ensure_future(run_page(n))
+        for n in range(1, pages_to_process + 1)
+    ]
+
+    texts: Dict[int, str] = {}
+    timings: List[Dict[str, Any]] = []
+
+    try:
+        for finished in asyncio.as_completed(tasks):
+            page_number, text, page_timings = await finished
+            texts[page_number] = text
+            timings.append(page_timings)
+            metrics.increment(f"orientation.{page_timings['orientation']}")
+            export_stages(page_timings["stages"])
+            logger.debug("pdf_ocr.page_done page=%s ms=%s", page_number, page_timings["ocr_ms"])
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    raw_text = "\n".join(
+        texts[n] for n in range(1, pages_to_process + 1) if texts[n]
+    )
+
+    metadata = {
+        "extraction_path": "ocr",
+        "pdf_page_count": page_count,
+        "pdf_pages_processed": pages_to_process,
+        "pdf_dpi": dpi,
+        "pdf_page_timings": sorted(timings, key=lambda t: t["page"]),
+    }
+
+    if page_count > pages_to_process:
+        logger.info("pdf_ocr.truncated pages=%s cap=%s", page_count, max_pages)
+
+    return raw_text, metadata
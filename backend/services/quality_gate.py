@@ -0,0 +1,114 @@
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from config import (
+    QUALITY_MIN_SHARPNESS,
+    QUALITY_MIN_CONTRAST,
+    QUALITY_MIN_TEXT_DENSITY,
+    QUALITY_MAX_TEXT_DENSITY,
+)
+
+# Scores are taken on a copy this tall; a few ms whatever the upload size
+INSPECT_HEIGHT = 512
+
+# Weight of the newest sample in the OCR CPU time estimate
+OCR_CPU_EWMA_ALPHA = 0.1
+
+
+class LowQualityImageError(ValueError):
+    """Image failed the quality gate; OCR was skipped."""
+
+    def __init__(self, reason: str, scores: Dict[str, Any]):
+        super().__init__(reason, scores)
+        self.reason = reason
+        self.scores = scores
+
+    def __str__(self) -> str:
+        return self.reason
+
+
+@dataclass
+class QualityReport:
+    sharpness: float
+    contrast: float
+    text_density: float
+    inspect_ms: float = 0.0
+    reason: Optional[str] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.reason is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def inspect_image(gray: np.ndarray) -> QualityReport:
+    """
+    Cheap readability scores for a grayscale page:
+
+    - sharpness: variance of the Laplacian divided by the pixel variance,
+      so a dim but sharp photo is not mistaken for a blurry one
+    - contrast: RMS contrast (std of the pixel values)
+    - text_density: share of Canny edge pixels; ~0 for blank or flat
+      images, very high for noise / busy photos that are not receipts
+    """
+    height, width = gray.shape[:2]
+    if height > INSPECT_HEIGHT:
+        small = cv2.resize(
+            gray,
+            (max(1, int(width * INSPECT_HEIGHT / height)), INSPECT_HEIGHT),
+            interpolation=cv2.INTER_AREA,
+        )
+    else:
+        small = gray
+
+    variance = float(small.var())
+    laplacian_var = float(cv2.Laplacian(small, cv2.CV_64F).var())
+
+    report = QualityReport(
+        sharpness=round(laplacian_var / variance, 3) if variance > 0 else 0.0,
+        contrast=round(variance ** 0.5, 2),
+        text_density=round(float((cv2.Canny(small, 50, 150) > 0).mean()), 4),
+    )
+
+    if report.contrast < QUALITY_MIN_CONTRAST:
+        report.reason = "Image too dark or washed out"
+    elif report.text_density < QUALITY_MIN_TEXT_DENSITY:
+        report.reason = "No text found in image"
+    elif report.text_density > QUALITY_MAX_TEXT_DENSITY:
+        report.reason = "Image does not look like a receipt"
+    elif report.sharpness < QUALITY_MIN_SHARPNESS:
+        report.reason = "Image too blurry"
+
+    return report
+
+
+class OCRCostEstimate:
+    """
+    EWMA of the CPU time a full OCR run costs, kept in the API process so
+    rejected images can be credited with the CPU they did not use.
+    """
+
+    def __init__(self, alpha: float = OCR_CPU_EWMA_ALPHA):
+        self.alpha = alpha
+        self._cpu_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, cpu_ms: float) -> None:
+        with self._lock:
+            if self._cpu_ms is None:
+                self._cpu_ms = cpu_ms
+            else:
+                self._cpu_ms += self.alpha * (cpu_ms - self._cpu_ms)
+
+    @property
+    def cpu_ms(self) -> Optional[float]:
+        return self._cpu_ms
+
+
+ocr_cost_estimate = OCRCostEstimate()
@@ -0,0 +1,309 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import DUPLICATE_DETECTION, PHASH_MAX_DISTANCE, DUPLICATE_INDEX_MAX_USERS
+from models.ingestion_log_orm import IngestionLog
+
+logger = logging.getLogger("expense-tracker.receipt_dedupe")
+
+# An earlier upload only counts as the original while it is (or may become) a real expense
+ORIGINAL_STATUSES = ("pending", "parsed", "needs_review")
+
+_HASH_SIZE = 8
+_SIGN_BIT = 1 << 63
+
+# Pages are shrunk to this longest side before hashing: the paper crop is
+# cheap there, and the 9x8 thumbnail looks the same
+_HASH_INPUT_SIDE = 512
+
+# file_path as stored by /ingest/ocr and /ingest/ocr/batch
+_file_path = IngestionLog.raw_payload["metadata"]["file_path"].astext
+
+
+# ----------------------------------------
+# Hashing
+# ----------------------------------------
+def _crop_to_paper(gray: np.ndarray) -> np.ndarray:
+    """
+    Bounding box of the bright (paper) region, so two photos of one receipt
+    framed differently on the table hash alike.
+    """
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(mask)
+    if len(ys) == 0:
+        return gray
+
+    cropped = gray[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+    return cropped if min(cropped.shape) >= _HASH_SIZE + 1 else gray
+
+
+def dhash(gray: np.ndarray) -> int:
+    """
+    64-bit difference hash of the receipt: paper crop → 9x8 thumbnail, one
+    bit per horizontally adjacent pixel pair (left brighter than right).
+    Robust to framing, scale, compression and exposure changes.
+
+    Takes the upright grayscale page the OCR worker decoded
+    (ocr_utils.load_grayscale), so hashing costs no decode of its own.
+    """
+    scale = _HASH_INPUT_SIDE / max(gray.shape)
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    small = cv2.resize(
+        _crop_to_paper(gray),
+        (_HASH_SIZE + 1, _HASH_SIZE),
+        interpolation=cv2.INTER_AREA,
+    )
+    bits = (small[:, :-1] > small[:, 1:]).flatten()
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_signed(value: int) -> int:
+    """Unsigned 64-bit hash → value for a Postgres BIGINT column."""
+    return value - (1 << 64) if value & _SIGN_BIT else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & ((1 << 64) - 1)
+
+
+# ----------------------------------------
+# Hamming distance index
+# ----------------------------------------
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes. A radius-r query only visits
+    children whose edge distance lies in [d - r, d + r], instead of
+    comparing against every stored hash.
+    """
+
+    def __init__(self):
+        # node: (hash, [ids], {distance: child node})
+        self._root: Optional[Tuple[int, List[int], Dict[int, tuple]]] = None
+        self.size = 0
+
+    def add(self, value: int, item_id: int) -> None:
+        self.size += 1
+
+        if self._root is None:
+            self._root = (value, [item_id], {})
+            return
+
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item_id], {})
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """[(distance, id)] of every stored hash within radius, nearest first."""
+        if self._root is None:
+            return []
+
+        found = []
+        stack = [self._root]
+        while stack:
+            node_value, ids, children = stack.pop()
+            distance = hamming(value, node_value)
+
+            if distance <= radius:
+                found.extend((distance, item_id) for item_id in ids)
+
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+
+        return sorted(found)
+
+
+class _UserHashes:
+    """One user's tree plus how far the log table has been read for it."""
+
+    def __init__(self):
+        self.tree = BKTree()
+        # Every log up to here is in the tree or will never get a hash
+        self.settled_id = 0
+        # Ids above settled_id already in the tree
+        self.indexed: Set[int] = set()
+
+
+class DuplicateIndex:
+    """
+    Per-user BK-trees of receipt hashes, kept in the API process.
+
+    Hashes do not reach the table in id order: batch logs are created
+    first and get their hash when their OCR finishes, and concurrent
+    uploads commit in any order. So each lookup re-reads the user's logs
+    above a settled id, the highest id below which no log can still gain
+    a hash: every lower log is older than SETTLE_SECONDS (its transaction
+    is over) and hashed, finished, or pending for longer than
+    PENDING_SECONDS. Least recently used users are dropped past max_users
+    and rebuilt from the table on their next upload.
+
+    The lock only guards the trees; queries run outside it.
+    """
+
+    SETTLE_SECONDS = 60
+    PENDING_SECONDS = 3600
+
+    def __init__(self, max_distance: int = PHASH_MAX_DISTANCE, max_users: int = DUPLICATE_INDEX_MAX_USERS):
+        self.max_distance = max_distance
+        self.max_users = max_users
+
+        self._users: "OrderedDict[int, _UserHashes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _settled(self, phash: Optional[int], status: str, created_at: Optional[datetime], now: datetime) -> bool:
+        if created_at is None:
+            return True
+        if created_at > now - timedelta(seconds=self.SETTLE_SECONDS):
+            return False
+        if phash is not None or status != "pending":
+            return True
+        return created_at < now - timedelta(seconds=self.PENDING_SECONDS)
+
+    def _apply(self, hashes: _UserHashes, rows: List[tuple], now: datetime) -> None:
+        settling = True
+        for log_id, phash, status, duplicate_of_id, created_at in rows:
+            if log_id <= hashes.settled_id:
+                continue
+
+            # Duplicates never serve as the original
+            if phash is not None and duplicate_of_id is None and log_id not in hashes.indexed:
+                hashes.tree.add(to_unsigned(phash), log_id)
+                hashes.indexed.add(log_id)
+
+            settling = settling and self._settled(phash, status, created_at, now)
+            if settling:
+                hashes.settled_id = log_id
+
+        hashes.indexed = {log_id for log_id in hashes.indexed if log_id > hashes.settled_id}
+
+    def find_original(self, db: Session, user_id: int, phash: int) -> Optional[IngestionLog]:
+        """
+        Closest live IngestionLog of this user (earliest on ties) whose
+        receipt hash is within max_distance of phash, or None.
+        """
+        with self._lock:
+            hashes = self._users.pop(user_id, None) or _UserHashes()
+            self._users[user_id] = hashes
+            settled_id = hashes.settled_id
+
+        now = datetime.utcnow()
+        rows = (
+            db.query(
+                IngestionLog.id,
+                IngestionLog.phash,
+                IngestionLog.status,
+                IngestionLog.duplicate_of_id,
+                IngestionLog.created_at,
+            )
+            .filter(IngestionLog.user_id == user_id, IngestionLog.id > settled_id)
+            .order_by(IngestionLog.id)
+            .all()
+        )
+
+        with self._lock:
+            self._apply(hashes, rows, now)
+            candidates = hashes.tree.search(phash, self.max_distance)
+
+            # Evicted meanwhile: still complete, so keep it
+            self._users.pop(user_id, None)
+            self._users[user_id] = hashes
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+        if not candidates:
+            return None
+
+        # The tree can hold ids of logs that were rolled back or have since
+        # failed / been rejected; the table has the final say
+        ids = [log_id for _, log_id in candidates]
+        logs = {
+            log.id: log
+            for log in db.query(IngestionLog).filter(
+                IngestionLog.id.in_(ids),
+                IngestionLog.user_id == user_id,
+                IngestionLog.status.in_(ORIGINAL_STATUSES),
+            )
+        }
+
+        for _, log_id in candidates:
+            if log_id in logs:
+                return logs[log_id]
+        return None
+
+
+duplicate_index = DuplicateIndex()
+
+
+def stored_phash(db: Session, key: str) -> Optional[int]:
+    """
+    Hash recorded for an earlier upload of the same file. Keys are content
+    addressed, so this stands in for hashing on OCR cache hits.
+    """
+    phash = (
+        db.query(IngestionLog.phash)
+        .filter(_file_path == key, IngestionLog.phash.isnot(None))
+        .limit(1)
+        .scalar()
+    )
+    return None if phash is None else to_unsigned(phash)
+
+
+def check_duplicate(
+    db: Session,
+    user_id: int,
+    phash: Optional[int],
+    key: Optional[str] = None,
+) -> Tuple[Optional[int], Optional[IngestionLog]]:
+    """
+    Look for an earlier photo of the same receipt.
+
+    phash: the hash the OCR worker returned (metadata["phash"]); when
+    missing (OCR cache hit) the one stored for the same file key is used.
+
+    Returns (phash to store on the new log, as signed BIGINT; original log
+    or None). Never fails the upload: errors just skip detection.
+    """
+    if not DUPLICATE_DETECTION:
+        return None, None
+
+    try:
+        # Savepoint: a failed lookup must not abort the caller's transaction
+        with db.begin_nested():
+            if phash is None and key is not None:
+                phash = stored_phash(db, key)
+            if phash is None:
+                return None, None
+            original = duplicate_index.find_original(db, user_id, phash)
+    except Exception:
+        logger.exception("receipt_dedupe.lookup_failure user_id=%s", user_id)
+        if phash is None:
+            return None, None
+        original = None
+
+    return to_signed(phash), original
@@ -0,0 +1,96 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from services import metrics
+from services.ingestion_v2.engine import ingestion_engine
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.ocr_batcher import ocr_batcher
+from services.ocr_cache import ocr_cache, content_key
+from services.ocr_executor import ocr_executor
+from services.pdf_ocr import extract_pdf_text
+from services.quality_gate import LowQualityImageError, ocr_cost_estimate
+from services.stage_timer import export_stages
+
+logger = logging.getLogger("expense-tracker.receipt_ocr")
+
+
+def _record_rejection(error: LowQualityImageError, user_id: Optional[int]) -> None:
+    metrics.increment("quality_gate.rejected")
+
+    # Credit the OCR run that did not happen, net of the gate's own cost
+    estimate = ocr_cost_estimate.cpu_ms
+    if estimate is not None:
+        saved_ms = max(0.0, estimate - error.scores.get("inspect_ms", 0.0))
+        metrics.increment("quality_gate.cpu_seconds_saved", round(saved_ms / 1000, 3))
+
+    logger.info(
+        "receipt_ocr.quality_rejected reason=%s scores=%s user_id=%s",
+        error.reason,
+        error.scores,
+        user_id,
+    )
+
+
+async def ocr_receipt(
+    dest_path: Path,
+    sha256_hex: str,
+    user_id: Optional[int] = None,
+) -> Tuple[str, ExtractedFields, Dict[str, Any]]:
+    """
+    Text + engine fields for one stored receipt file, shared by the
+    single and batch upload endpoints.
+
+    Cache lookup first; on a miss PDFs go through services.pdf_ocr and
+    images through the (micro-batched) OCR pool. Returns
+    (raw_text, fields, metadata) where metadata is merged into the
+    ingestion log; a hit returns the metadata of the run it cached, with
+    ocr_cache="hit". Raises ImageDecodeError for undecodable images and
+    LowQualityImageError for images rejected by the quality gate.
+    """
+    # Retried uploads / re-scans of the same file skip OCR entirely
+    cache_key = content_key(sha256_hex)
+    cached = await run_in_threadpool(ocr_cache.get, cache_key)
+
+    if cached:
+        raw_text, fields, cached_metadata = cached
+        return raw_text, fields, {**cached_metadata, "ocr_cache": "hit"}
+
+    ocr_metadata: Dict[str, Any] = {}
+
+    # OCR runs in the OCR process pool so the API worker keeps serving requests
+    if dest_path.suffix == ".pdf":
+        raw_text, ocr_metadata = await extract_pdf_text(ocr_executor, str(dest_path.resolve()))
+        fields = None
+    else:
+        try:
+            raw_text, fields, ocr_info = await ocr_batcher.submit(str(dest_path.resolve()))
+        except LowQualityImageError as e:
+            _record_rejection(e, user_id)
+            raise
+
+        if "ocr_cpu_ms" in ocr_info:
+            ocr_cost_estimate.observe(ocr_info["ocr_cpu_ms"])
+        export_stages(ocr_info.get("stages", {}))
+        metrics.increment(f"orientation.{ocr_info['orientation']}")
+        metrics.increment(f"ocr_pass.{ocr_info['ocr_pass']}")
+        metrics.increment("ocr_pass.time_saved_ms", ocr_info["time_saved_ms"])
+        logger.info(
+            "receipt_ocr.ocr_pass pass=%s ocr_ms=%s time_saved_ms=%s user_id=%s",
+            ocr_info["ocr_pass"],
+            ocr_info["ocr_ms"],
+            ocr_info["time_saved_ms"],
+            user_id,
+        )
+        ocr_metadata = {"extraction_path": "ocr", **ocr_info}
+
+    if fields is None:
+        fields = await run_in_threadpool(ingestion_engine.process, raw_text)
+    # Timings belong to this request; the rest describes the text and is
+    # logged for hits too
+    cached_metadata = {k: v for k, v in ocr_metadata.items() if k != "stages"}
+    await run_in_threadpool(ocr_cache.put, cache_key, raw_text, fields, cached_metadata)
+
+    return raw_text, fields, {"ocr_cache": "miss", **ocr_metadata}
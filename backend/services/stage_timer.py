@@ -0,0 +1,96 @@
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config import STAGE_MEMORY_SAMPLE_RATE
+from services import metrics
+
+
+class StageTimer:
+    """
+    Wall time, CPU time and peak Python heap growth per pipeline stage.
+
+    Stages run more than once (fast + full OCR pass) accumulate. Memory is
+    measured with tracemalloc, which slows allocation-heavy code down, so
+    only a STAGE_MEMORY_SAMPLE_RATE share of timers trace it. tracemalloc
+    sees numpy / OpenCV buffers but not memory held inside the OCR engine.
+
+    cpu_clock defaults to the calling thread's CPU time; the OCR workers
+    pass a clock that also counts the tesseract child processes.
+    """
+
+    def __init__(
+        self,
+        trace_memory: Optional[bool] = None,
+        cpu_clock: Callable[[], float] = time.thread_time,
+    ):
+        if trace_memory is None:
+            trace_memory = random.random() < STAGE_MEMORY_SAMPLE_RATE
+
+        self.trace_memory = trace_memory
+        self.cpu_clock = cpu_clock
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._owns_tracing = False
+
+    def __enter__(self) -> "StageTimer":
+        # A timer nested in a traced one (batch → item) reuses its tracing
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base_memory = tracemalloc.get_traced_memory()[0]
+
+        wall_started = time.perf_counter()
+        cpu_started = self.cpu_clock()
+        try:
+            yield
+        finally:
+            peak_kb = None
+            if tracing:
+                peak_kb = (tracemalloc.get_traced_memory()[1] - base_memory) / 1024
+
+            self.add(
+                name,
+                (time.perf_counter() - wall_started) * 1000,
+                (self.cpu_clock() - cpu_started) * 1000,
+                peak_kb,
+            )
+
+    def run(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """fn(*args, **kwargs) as one stage; handy through run_in_threadpool."""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def add(self, name: str, wall_ms: float, cpu_ms: float, peak_kb: Optional[float] = None) -> None:
+        """Record a measurement taken elsewhere (e.g. a share of a batched call)."""
+        entry = self.stages.setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0, "calls": 0})
+        entry["wall_ms"] = round(entry["wall_ms"] + wall_ms, 2)
+        entry["cpu_ms"] = round(entry["cpu_ms"] + cpu_ms, 2)
+        entry["calls"] += 1
+        if peak_kb is not None:
+            entry["peak_kb"] = round(max(entry.get("peak_kb", 0.0), peak_kb), 1)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(entry) for name, entry in self.stages.items()}
+
+
+def export_stages(stages: Dict[str, Dict[str, Any]]) -> None:
+    """Feed a run's stage timings into the /metrics histograms."""
+    for name, entry in stages.items():
+        metrics.observe(f"ocr_stage.{name}.wall_ms", entry["wall_ms"])
+        metrics.observe(f"ocr_stage.{name}.cpu_ms", entry["cpu_ms"])
+        if "peak_kb" in entry:
+            metrics.observe(f"ocr_stage.{name}.peak_kb", entry["peak_kb"], metrics.MEMORY_KB_BUCKETS)
@@ -0,0 +1,251 @@
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from config import (
+    STORAGE_BACKEND,
+    UPLOADS_DIR,
+    S3_BUCKET,
+    S3_PREFIX,
+    S3_ENDPOINT_URL,
+    S3_CACHE_DIR,
+)
+
+logger = logging.getLogger("expense-tracker.storage")
+
+
+def receipt_key(sha256_hex: str, ext: str) -> str:
+    """
+    Content-addressed key with a two-level fan-out, e.g.
+    receipts/3f/a1/3fa1…e9.jpg. Same bytes → same key → stored once.
+    """
+    return f"receipts/{sha256_hex[:2]}/{sha256_hex[2:4]}/{sha256_hex}{ext}"
+
+
+def thumbnail_key(key: str) -> str:
+    """WebP derivative of a stored receipt (also works for legacy flat keys)."""
+    stem = Path(key).stem
+    return f"thumbnails/{stem[:2]}/{stem[2:4]}/{stem}.webp"
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: float
+
+
+class StorageBackend(ABC):
+    """
+    Where receipt files and their derivatives live. Keys are relative,
+    "/" separated paths ("receipts/ab/cd/<sha>.jpg").
+    """
+
+    # Uploads are streamed here first; put_file then moves them into place
+    staging_dir: Path
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def put_file(self, src: Path, key: str) -> bool:
+        """
+        Move a local file into storage under key. src is consumed either
+        way. Returns False when key already existed (nothing written).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def local_path(self, key: str) -> Path:
+        """A local filesystem path with the object's bytes (for OCR / decoding)."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[StoredObject]:
+        """
+        Objects under prefix in key order. recursive=False lists only the
+        objects directly under prefix, not those in deeper "directories".
+        """
+        raise NotImplementedError()
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: Path = Path(UPLOADS_DIR)):
+        self.root = Path(root)
+        # Same filesystem as the final location, so put_file is a rename
+        self.staging_dir = self.root / ".staging"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def put_file(self, src: Path, key: str) -> bool:
+        dest = self._path(key)
+        if dest.exists():
+            src.unlink(missing_ok=True)
+            # Counts as a fresh upload for the upload GC's grace period
+            os.utime(dest)
+            return False
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(src, dest)
+        return True
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def local_path(self, key: str) -> Path:
+        return self._path(key)
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def iter_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[StoredObject]:
+        base = self._path(prefix)
+        if not base.exists():
+            return
+
+        for dirpath, dirnames, filenames in os.walk(base):
+            # Deterministic order lets callers checkpoint by key
+            if recursive:
+                dirnames.sort()
+            else:
+                dirnames.clear()
+            for name in sorted(filenames):
+                path = Path(dirpath) / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                yield StoredObject(
+                    key=path.relative_to(self.root).as_posix(),
+                    size=stat.st_size,
+                    modified=stat.st_mtime,
+                )
+
+
+class S3Storage(StorageBackend):
+    """
+    S3 / S3-compatible object store (MinIO, moto server, ...) via boto3.
+
+    OCR workers need files on disk, so objects are also kept in a local
+    read-through cache (cache_dir): fresh uploads land there directly and
+    other keys are downloaded on first use.
+    """
+
+    def __init__(
+        self,
+        bucket: str = S3_BUCKET,
+        prefix: str = S3_PREFIX,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        cache_dir: Path = Path(S3_CACHE_DIR),
+    ):
+        import boto3
+        from botocore.exceptions import ClientError
+
+        self._client_error = ClientError
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.cache_dir = Path(cache_dir)
+        self.staging_dir = self.cache_dir / ".staging"
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, src: Path, key: str) -> bool:
+        stored = not self.exists(key)
+        if stored:
+            self.client.upload_file(str(src), self.bucket, self._object_key(key))
+        else:
+            # Server-side self copy bumps LastModified, so the upload GC
+            # treats it as a fresh upload
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=self._object_key(key),
+                CopySource={"Bucket": self.bucket, "Key": self._object_key(key)},
+                MetadataDirective="REPLACE",
+            )
+
+        cached = self._cache_path(key)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(src, cached)
+        return stored
+
+    def open(self, key: str) -> BinaryIO:
+        cached = self._cache_path(key)
+        if cached.exists():
+            return open(cached, "rb")
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+
+    def local_path(self, key: str) -> Path:
+        cached = self._cache_path(key)
+        if not cached.exists():
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=cached.parent, suffix=".part")
+            os.close(fd)
+            try:
+                self.client.download_file(self.bucket, self._object_key(key), tmp_name)
+                os.replace(tmp_name, cached)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        return cached
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        self._cache_path(key).unlink(missing_ok=True)
+
+    def iter_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        strip = len(self.prefix) + 1 if self.prefix else 0
+
+        kwargs = {"Bucket": self.bucket, "Prefix": self._object_key(prefix)}
+        if not recursive:
+            kwargs["Delimiter"] = "/"
+
+        for page in paginator.paginate(**kwargs):
+            for obj in page.get("Contents", []):
+                yield StoredObject(
+                    key=obj["Key"][strip:],
+                    size=obj["Size"],
+                    modified=obj["LastModified"].timestamp(),
+                )
+
+
+def get_storage() -> StorageBackend:
+    if STORAGE_BACKEND == "local":
+        return LocalStorage()
+    if STORAGE_BACKEND == "s3":
+        return S3Storage()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+receipt_storage = get_storage()
@@ -0,0 +1,59 @@
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from PIL import Image, ImageOps
+
+from config import THUMBNAIL_MAX_SIZE, THUMBNAIL_QUALITY
+from services import metrics
+from services.storage import StorageBackend, receipt_storage, thumbnail_key
+
+logger = logging.getLogger("expense-tracker.thumbnails")
+
+
+def create_thumbnail(key: str, storage: StorageBackend = receipt_storage) -> Optional[str]:
+    """
+    Write the WebP preview of a stored receipt image; returns its key.
+
+    Runs after the upload response (background task), never on the OCR
+    path. Idempotent: identical uploads share one thumbnail. PDFs and
+    undecodable files get none.
+    """
+    if Path(key).suffix == ".pdf":
+        return None
+
+    thumb_key = thumbnail_key(key)
+    if storage.exists(thumb_key):
+        return thumb_key
+
+    storage.staging_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=storage.staging_dir, suffix=".webp")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+
+    try:
+        with Image.open(storage.local_path(key)) as img:
+            if img.format == "JPEG":
+                img.draft("RGB", (THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            img.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+            img.save(tmp_path, "WEBP", quality=THUMBNAIL_QUALITY, method=4)
+
+        storage.put_file(tmp_path, thumb_key)
+        metrics.increment("thumbnails.created")
+        return thumb_key
+
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        logger.warning("thumbnails.failure key=%s", key, exc_info=True)
+        return None
+
+
+def create_thumbnails(keys: Iterable[str]) -> None:
+    for key in keys:
+        create_thumbnail(key)
@@ -0,0 +1,351 @@
+"""
+Upload garbage collector.
+
+Run from the backend directory, e.g. nightly from cron:
+
+    python -m services.upload_gc [--dry-run] [--mode delete|archive] [--max-shards N]
+
+Receipt storage is walked one shard (receipts/ab/, then legacy flat
+receipts/<uuid>.jpg files, then thumbnails/ab/) at a time, in key order,
+UPLOAD_GC_BATCH_SIZE files per ingestion_log lookup, so memory stays
+bounded whatever the number of files. Progress is checkpointed after
+every batch; an interrupted or --max-shards limited run resumes where it
+stopped.
+
+Retention:
+- files no ingestion log refers to: removed after UPLOAD_GC_GRACE_HOURS
+- receipts whose logs are all failed / rejected / duplicate, or whose
+  expense was deleted: removed UPLOAD_GC_RETENTION_DAYS after the newest log
+- thumbnails whose receipt is gone, and stale staging files: removed
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from config import (
+    UPLOAD_GC_MODE,
+    UPLOAD_GC_GRACE_HOURS,
+    UPLOAD_GC_RETENTION_DAYS,
+    UPLOAD_GC_BATCH_SIZE,
+    UPLOAD_GC_CHECKPOINT_FILE,
+)
+from database import SessionLocal
+from models.ingestion_log_orm import IngestionLog
+from services.storage import StorageBackend, StoredObject, receipt_storage
+
+logger = logging.getLogger("expense-tracker.upload_gc")
+
+ARCHIVE_PREFIX = "archive/"
+LEGACY_SHARD = "receipts/"
+
+_HEX = "0123456789abcdef"
+RECEIPT_SHARDS = [f"receipts/{a}{b}/" for a in _HEX for b in _HEX]
+THUMBNAIL_SHARDS = [f"thumbnails/{a}{b}/" for a in _HEX for b in _HEX]
+
+# Receipt shards first so thumbnails of receipts removed in this run are
+# picked up by the thumbnail pass of the same run
+SHARDS = RECEIPT_SHARDS + [LEGACY_SHARD] + THUMBNAIL_SHARDS
+
+# file_path as stored by /ingest/ocr and /ingest/ocr/batch
+_file_path = IngestionLog.raw_payload["metadata"]["file_path"].astext
+
+# A log still needs its receipt while it awaits a decision or backs an expense
+_is_live = or_(
+    IngestionLog.status.in_(("pending", "needs_review")),
+    and_(IngestionLog.status == "parsed", IngestionLog.expense_id.isnot(None)),
+)
+
+
+@dataclass
+class GCStats:
+    scanned: int = 0
+    scanned_bytes: int = 0
+    removed: int = 0
+    reclaimed_bytes: int = 0
+    thumbnails_removed: int = 0
+    staging_removed: int = 0
+    errors: int = 0
+
+    def add(self, other: "GCStats") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+# ----------------------------------------
+# Checkpoint
+# ----------------------------------------
+def load_checkpoint(path: Path) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning("upload_gc.bad_checkpoint path=%s; starting over", path)
+        return None
+
+
+def save_checkpoint(path: Path, shard: str, after: Optional[str], stats: GCStats) -> None:
+    # Write + rename so a crash never leaves a half written checkpoint
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"shard": shard, "after": after, "stats": asdict(stats)}, f)
+    os.replace(tmp, path)
+
+
+# ----------------------------------------
+# Retention
+# ----------------------------------------
+def file_references(db: Session, keys: List[str]) -> Dict[str, Tuple[bool, datetime]]:
+    """
+    {key: (referenced by a live log, newest referencing log's created_at)}
+    for the keys any ingestion log points at. Served by the
+    ix_ingestion_log_file_path expression index.
+    """
+    rows = (
+        db.query(_file_path, func.bool_or(_is_live), func.max(IngestionLog.created_at))
+        .filter(_file_path.in_(keys))
+        .group_by(_file_path)
+        .all()
+    )
+    return {key: (bool(live), newest) for key, live, newest in rows}
+
+
+def is_expired(
+    obj: StoredObject,
+    reference: Optional[Tuple[bool, datetime]],
+    now: float,
+    grace_hours: float = UPLOAD_GC_GRACE_HOURS,
+    retention_days: float = UPLOAD_GC_RETENTION_DAYS,
+) -> bool:
+    # Also protects content-addressed files re-uploaded a moment ago:
+    # put_file refreshes their modification time
+    if obj.modified > now - grace_hours * 3600:
+        return False
+
+    if reference is None:
+        return True
+
+    live, newest = reference
+    if live:
+        return False
+    return newest is None or newest < datetime.utcnow() - timedelta(days=retention_days)
+
+
+# ----------------------------------------
+# Collector
+# ----------------------------------------
+def _chunks(objects: Iterator[StoredObject], size: int) -> Iterator[List[StoredObject]]:
+    chunk: List[StoredObject] = []
+    for obj in objects:
+        chunk.append(obj)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class UploadGC:
+    def __init__(
+        self,
+        storage: StorageBackend = receipt_storage,
+        mode: str = UPLOAD_GC_MODE,
+        dry_run: bool = False,
+        batch_size: int = UPLOAD_GC_BATCH_SIZE,
+        checkpoint_path: Path = Path(UPLOAD_GC_CHECKPOINT_FILE),
+    ):
+        if mode not in ("delete", "archive"):
+            raise ValueError(f"Unknown UPLOAD_GC_MODE: {mode}")
+
+        self.storage = storage
+        self.mode = mode
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.checkpoint_path = Path(checkpoint_path)
+
+    def _remove(self, key: str) -> None:
+        if self.dry_run:
+            return
+
+        if self.mode == "archive" and key.startswith("receipts/"):
+            self.storage.staging_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.storage.staging_dir, prefix="archive_", suffix=".part")
+            os.close(fd)
+            try:
+                shutil.copyfile(self.storage.local_path(key), tmp_name)
+                self.storage.put_file(Path(tmp_name), ARCHIVE_PREFIX + key)
+            finally:
+                Path(tmp_name).unlink(missing_ok=True)
+
+        self.storage.delete(key)
+
+    def _iter_shard(self, shard: str, after: Optional[str]) -> Iterator[StoredObject]:
+        objects = self.storage.iter_objects(shard, recursive=shard != LEGACY_SHARD)
+        for obj in objects:
+            if after is not None and obj.key <= after:
+                continue
+            yield obj
+
+    def _receipt_chunk(self, db: Session, chunk: List[StoredObject], now: float, stats: GCStats) -> None:
+        references = file_references(db, [obj.key for obj in chunk])
+        # Read-only lookups; do not hold a snapshot open between batches
+        db.rollback()
+
+        for obj in chunk:
+            if not is_expired(obj, references.get(obj.key), now):
+                continue
+            try:
+                self._remove(obj.key)
+            except Exception:
+                stats.errors += 1
+                logger.exception("upload_gc.remove_failure key=%s", obj.key)
+                continue
+            stats.removed += 1
+            stats.reclaimed_bytes += obj.size
+
+    def _receipt_stems(self, thumbnail_shard: str) -> Set[str]:
+        shard = "receipts/" + thumbnail_shard[len("thumbnails/"):]
+        return {Path(obj.key).stem for obj in self.storage.iter_objects(shard)}
+
+    def _thumbnail_chunk(self, chunk: List[StoredObject], stems: Set[str], now: float, stats: GCStats) -> None:
+        for obj in chunk:
+            if obj.modified > now - UPLOAD_GC_GRACE_HOURS * 3600:
+                continue
+
+            stem = Path(obj.key).stem
+            if len(stem) == 64:
+                orphaned = stem not in stems
+            else:
+                # Thumbnail of a legacy flat receipts/<uuid>.jpg upload
+                orphaned = not self.storage.exists(f"receipts/{stem}.jpg")
+
+            if not orphaned:
+                continue
+            try:
+                if not self.dry_run:
+                    self.storage.delete(obj.key)
+            except Exception:
+                stats.errors += 1
+                logger.exception("upload_gc.remove_failure key=%s", obj.key)
+                continue
+            stats.thumbnails_removed += 1
+            stats.reclaimed_bytes += obj.size
+
+    def _sweep_staging(self, now: float, stats: GCStats) -> None:
+        """Parts left behind by uploads interrupted mid-stream."""
+        staging = self.storage.staging_dir
+        if not staging.exists():
+            return
+
+        for path in staging.iterdir():
+            try:
+                stat = path.stat()
+                if not path.is_file() or stat.st_mtime > now - UPLOAD_GC_GRACE_HOURS * 3600:
+                    continue
+                if not self.dry_run:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+            stats.staging_removed += 1
+            stats.reclaimed_bytes += stat.st_size
+
+    def run(self, max_shards: Optional[int] = None) -> Tuple[GCStats, bool]:
+        """
+        Collect up to max_shards shards (all when None), resuming from the
+        checkpoint. Returns (stats of the whole pass so far, finished).
+        """
+        now = time.time()
+        stats = GCStats()
+        start, after = 0, None
+
+        checkpoint = None if self.dry_run else load_checkpoint(self.checkpoint_path)
+        if checkpoint is not None and checkpoint.get("shard") in SHARDS:
+            start = SHARDS.index(checkpoint["shard"])
+            after = checkpoint.get("after")
+            stats = GCStats(**checkpoint.get("stats", {}))
+            logger.info("upload_gc.resume shard=%s after=%s", checkpoint["shard"], after)
+
+        end = len(SHARDS) if max_shards is None else min(len(SHARDS), start + max_shards)
+
+        db = SessionLocal()
+        try:
+            for shard in SHARDS[start:end]:
+                shard_stats = GCStats()
+                is_thumbnails = shard.startswith("thumbnails/")
+                stems = self._receipt_stems(shard) if is_thumbnails else set()
+
+                for chunk in _chunks(self._iter_shard(shard, after), self.batch_size):
+                    shard_stats.scanned += len(chunk)
+                    shard_stats.scanned_bytes += sum(obj.size for obj in chunk)
+
+                    if is_thumbnails:
+                        self._thumbnail_chunk(chunk, stems, now, shard_stats)
+                    else:
+                        self._receipt_chunk(db, chunk, now, shard_stats)
+
+                    if not self.dry_run:
+                        progress = GCStats(**asdict(stats))
+                        progress.add(shard_stats)
+                        save_checkpoint(self.checkpoint_path, shard, chunk[-1].key, progress)
+
+                stats.add(shard_stats)
+                after = None
+                logger.info(
+                    "upload_gc.shard_done shard=%s scanned=%s removed=%s reclaimed_bytes=%s",
+                    shard, shard_stats.scanned, shard_stats.removed + shard_stats.thumbnails_removed,
+                    shard_stats.reclaimed_bytes,
+                )
+
+        finally:
+            db.close()
+
+        finished = end == len(SHARDS)
+        if finished:
+            self._sweep_staging(now, stats)
+            if not self.dry_run:
+                self.checkpoint_path.unlink(missing_ok=True)
+        elif not self.dry_run:
+            save_checkpoint(self.checkpoint_path, SHARDS[end], None, stats)
+
+        return stats, finished
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remove unreferenced and expired receipt uploads.")
+    parser.add_argument("--dry-run", action="store_true", help="report only, remove nothing")
+    parser.add_argument("--mode", choices=("delete", "archive"), default=UPLOAD_GC_MODE)
+    parser.add_argument("--max-shards", type=int, default=None, help="stop after N shards (resumed next run)")
+    args = parser.parse_args()
+
+    collector = UploadGC(mode=args.mode, dry_run=args.dry_run)
+    started = time.monotonic()
+    stats, finished = collector.run(max_shards=args.max_shards)
+
+    logger.info(
+        "upload_gc.%s mode=%s dry_run=%s scanned=%s scanned_bytes=%s removed=%s "
+        "thumbnails_removed=%s staging_removed=%s reclaimed_bytes=%s errors=%s seconds=%.1f",
+        "done" if finished else "paused",
+        args.mode, args.dry_run, stats.scanned, stats.scanned_bytes, stats.removed,
+        stats.thumbnails_removed, stats.staging_removed, stats.reclaimed_bytes, stats.errors,
+        time.monotonic() - started,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    )
+    main()
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import pytest
+from models.ingestion_job_orm import IngestionJob
+from models.ingestion_log_orm import IngestionLog
+from models.user_orm import User
+from services import ingestion_jobs
+from services.ingestion_jobs import _backoff_seconds, claim_next_job, enqueue_ingestion, run_job
+from services.ingestion_v2.receipt_model import ExtractedFields
+
+
+def make_user(db):
+    user = User(email="jobs@example.com")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+def failing_ingestion(db, user, log):
+    raise RuntimeError("engine exploded")
+
+
+def test_worker_keeps_the_fields_computed_at_ocr_time(db):
+    user = make_user(db)
+
+    # Region OCR read only part of the page; its fields are what counts
+    fields = ExtractedFields(amount=105.0, transaction_date="2026-02-12", merchant_name="Fresh Mart",
+                             category_name="Groceries", confidence=0.5)
+    log = enqueue_ingestion(db, user, "ocr", raw_text="Grand Total Rs 999.00", metadata={"text_scope": "regions"},
+                            fields=fields)
+
+    job = claim_next_job(db)
+    run_job(db, job)
+
+    db.refresh(log)
+    assert db.query(IngestionJob).one().status == "done"
+    assert log.status == "needs_review"
+    assert (log.parsed_amount, log.parsed_merchant, log.parsed_category) == (105.0, "Fresh Mart", "Groceries")
+    assert log.raw_payload["fields"]["amount"] == 105.0
+
+
+def test_worker_parses_raw_text_without_fields(db):
+    user = make_user(db)
+    log = enqueue_ingestion(db, user, "ocr", raw_text="MILK 30.00\nGrand Total Rs 105.00")
+
+    run_job(db, claim_next_job(db))
+
+    db.refresh(log)
+    assert log.raw_payload["fields"] is None
+    assert (log.status, log.parsed_amount) == ("needs_review", 105.0)
+
+
+# SQLite ignores FOR UPDATE SKIP LOCKED; these cover the claim / retry
+# state machine around it
+
+
+def test_claim_takes_each_runnable_job_once(db):
+    user = make_user(db)
+    first = enqueue_ingestion(db, user, "sms", raw_text="a")
+    enqueue_ingestion(db, user, "sms", raw_text="b")
+    later = enqueue_ingestion(db, user, "sms", raw_text="c")
+    db.query(IngestionJob).filter(IngestionJob.ingestion_log_id == later.id).update(
+        {"run_after": datetime.utcnow() + timedelta(minutes=5)}
+    )
+    db.commit()
+
+    job = claim_next_job(db)
+    assert (job.ingestion_log_id, job.status, job.attempts) == (first.id, "running", 1)
+    assert job.locked_at is not None
+
+    second = claim_next_job(db)
+    assert second.id != job.id
+
+    # The third waits for its run_after; running jobs are not claimed again
+    assert claim_next_job(db) is None
+
+
+def test_jobs_of_a_crashed_worker_are_claimed_again_after_the_lease(db):
+    user = make_user(db)
+    enqueue_ingestion(db, user, "sms", raw_text="a")
+    job = claim_next_job(db)
+
+    assert claim_next_job(db) is None
+
+    job.locked_at = datetime.utcnow() - timedelta(seconds=ingestion_jobs.INGESTION_JOB_LEASE_SECONDS + 1)
+    db.commit()
+
+    reclaimed = claim_next_job(db)
+    assert (reclaimed.id, reclaimed.attempts) == (job.id, 2)
+
+
+def test_failures_retry_with_backoff_then_dead_letter(db, monkeypatch):
+    monkeypatch.setattr(ingestion_jobs, "run_ingestion", failing_ingestion)
+    user = make_user(db)
+    log = enqueue_ingestion(db, user, "sms", raw_text="a")
+    job_id = db.query(IngestionJob).one().id
+
+    job = claim_next_job(db)
+    before = datetime.utcnow()
+    run_job(db, job)
+
+    job = db.get(IngestionJob, job_id)
+    assert (job.status, job.attempts, job.last_error) == ("queued", 1, "engine exploded")
+    assert job.run_after >= before + timedelta(seconds=_backoff_seconds(1))
+    assert claim_next_job(db) is None
+
+    for attempt in range(2, job.max_attempts + 1):
+        job.run_after = datetime.utcnow()
+        db.commit()
+        run_job(db, claim_next_job(db))
+        job = db.get(IngestionJob, job_id)
+        assert job.attempts == attempt
+
+    db.refresh(log)
+    assert job.status == "dead"
+    assert (log.status, log.error_message) == ("failed", "engine exploded")
+    assert claim_next_job(db) is None
+
+
+def test_a_job_whose_log_is_already_handled_is_just_closed(db, monkeypatch):
+    monkeypatch.setattr(ingestion_jobs, "run_ingestion", failing_ingestion)
+    user = make_user(db)
+    log = enqueue_ingestion(db, user, "sms", raw_text="a")
+    log.status = "needs_review"
+    db.commit()
+
+    run_job(db, claim_next_job(db))
+
+    assert db.query(IngestionJob).one().status == "done"
+
+
+def test_a_job_without_its_log_is_dead_lettered(db):
+    user = make_user(db)
+    enqueue_ingestion(db, user, "sms", raw_text="a")
+    db.query(IngestionLog).delete()
+    db.commit()
+
+    run_job(db, claim_next_job(db))
+
+    job = db.query(IngestionJob).one()
+    assert (job.status, job.last_error) == ("dead", "Ingestion log not found")
+
+
+def test_backoff_doubles_up_to_the_cap():
+    assert _backoff_seconds(1) == ingestion_jobs.INGESTION_JOB_BACKOFF_SECONDS
+    assert _backoff_seconds(2) == 2 * ingestion_jobs.INGESTION_JOB_BACKOFF_SECONDS
+    assert _backoff_seconds(50) == ingestion_jobs.INGESTION_JOB_BACKOFF_MAX_SECONDS
@@ -0,0 +1,166 @@
+import random
+import string
+
+import pytest
+from models.merchant_orm import Merchant
+from services import ingestion_service
+from services.ingestion_service import KnownMerchants, _resolve_or_create_merchant
+from services.ingestion_v2.merchant_normalizer import MerchantIndex, MerchantNormalizer
+
+KNOWN = ["Swiggy", "Big Bazaar", "STARBUCKS", "Pizza Hut", "BATA", "More", "Tata Cliq", "Uber"]
+
+# Different merchants whose names only read the same without vowels
+NEAR_MISSES = [("BETA", "BATA"), ("MARE", "More"), ("Ubar", "Uber")]
+
+
+@pytest.fixture
+def normalizer():
+    return MerchantNormalizer()
+
+
+def add_merchants(db, names, first_id=None):
+    for i, name in enumerate(names):
+        merchant_id = None if first_id is None else first_id + i
+        db.add(Merchant(id=merchant_id, name=name, normalized_key=ingestion_service._normalize_merchant_key(name)))
+    db.commit()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SWIGY", "Swiggy"),
+    ("big bazar", "Big Bazaar"),
+    ("STARBUKS", "STARBUCKS"),
+    ("Pizza Hutt", "Pizza Hut"),
+    ("Amazon", None),
+    ("", None),
+])
+def test_index_matches_like_the_list(normalizer, query, expected):
+    index = MerchantIndex(KNOWN, normalizer)
+
+    assert normalizer.match(query, KNOWN) == expected
+    assert normalizer.match(query, index) == expected
+
+
+@pytest.mark.parametrize("query, known", NEAR_MISSES)
+def test_strict_keeps_near_miss_names_apart(normalizer, query, known):
+    index = MerchantIndex(KNOWN, normalizer)
+
+    # best_similarity alone scores them 1.0 on the vowel-stripped form
+    assert normalizer.match(query, index) == known
+    assert normalizer.match(query, index, strict=True) is None
+    assert normalizer.match(query, KNOWN, strict=True) is None
+
+
+def test_canonicalize_falls_back_to_the_title_cased_name(normalizer):
+    index = MerchantIndex(KNOWN, normalizer)
+
+    assert normalizer.canonicalize("swigy!", index) == "Swiggy"
+    assert normalizer.canonicalize("fresh mart 24", index) == "Fresh Mart"
+    assert normalizer.canonicalize(None, index) is None
+
+
+def test_index_is_incremental_and_keeps_the_first_name_per_key(normalizer):
+    index = MerchantIndex(normalizer=normalizer)
+    assert normalizer.match("SWIGY", index) is None
+
+    index.add("Swiggy")
+    index.add("SWIGGY")
+    index.add("")
+
+    assert len(index) == 1
+    assert "swiggy" in index
+    assert normalizer.match("SWIGY", index) == "Swiggy"
+
+
+def test_index_finds_what_the_list_finds(normalizer):
+    rng = random.Random(5)
+    known = ["".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(5, 12))) for _ in range(500)]
+    index = MerchantIndex(known, normalizer)
+
+    for name in rng.sample(known, 100):
+        i = rng.randrange(len(name))
+        typo = name[:i] + name[i + 1:]
+
+        expected = normalizer.match(typo, known)
+        assert expected is not None
+        assert normalizer.match(typo, index) == expected
+
+
+def test_known_merchants_finds_nothing_until_built(session_factory):
+    db = session_factory()
+    add_merchants(db, ["Swiggy"])
+
+    merchants = KnownMerchants()
+    assert merchants.find(db, "SWIGY") is None
+
+    merchants.start(session_factory)
+    merchants._thread.join(timeout=10)
+
+    assert merchants.ready
+    assert merchants.find(db, "SWIGY").name == "Swiggy"
+
+
+def test_known_merchants_picks_up_new_rows_and_never_merges_near_misses(session_factory):
+    db = session_factory()
+    add_merchants(db, ["BATA"])
+
+    merchants = KnownMerchants()
+    merchants.start(session_factory)
+    merchants._thread.join(timeout=10)
+
+    assert merchants.find(db, "BETA") is None
+
+    add_merchants(db, ["Big Bazaar"])
+    assert merchants.find(db, "BIG BAZAR").name == "Big Bazaar"
+
+
+def test_known_merchants_indexes_merchants_committed_out_of_id_order(session_factory):
+    db = session_factory()
+    add_merchants(db, ["Big Bazaar"], first_id=500)
+
+    merchants = KnownMerchants()
+    merchants.start(session_factory)
+    merchants._thread.join(timeout=10)
+    assert merchants.find(db, "SWIGY") is None
+
+    # Another worker's insert took a lower id but committed later
+    add_merchants(db, ["Swiggy"], first_id=450)
+    assert merchants.find(db, "SWIGY").name == "Swiggy"
+
+    # Beyond the window: a long settled id range is not read again
+    add_merchants(db, ["Pizza Hut"], first_id=500 + KnownMerchants.REREAD_IDS + 1)
+    add_merchants(db, ["Starbucks"], first_id=100)
+    assert merchants.find(db, "Pizza Hutt").name == "Pizza Hut"
+    assert merchants.find(db, "STARBUKS") is None
+
+
+def test_known_merchants_ignores_rolled_back_merchants(session_factory):
+    merchants = KnownMerchants()
+    merchants.start(session_factory)
+    merchants._thread.join(timeout=10)
+
+    db = session_factory()
+    add_merchants(db, ["Swiggy"])
+    assert merchants.find(db, "SWIGY") is not None
+
+    db.query(Merchant).delete()
+    db.commit()
+    assert merchants.find(db, "SWIGY") is None
+
+
+def test_resolve_merges_only_when_opted_in(session_factory, monkeypatch):
+    db = session_factory()
+    add_merchants(db, ["Swiggy", "BATA"])
+
+    merchants = KnownMerchants()
+    merchants.start(session_factory)
+    merchants._thread.join(timeout=10)
+    monkeypatch.setattr(ingestion_service, "known_merchants", merchants)
+
+    # Off by default: a new spelling is a new merchant
+    assert ingestion_service.MERCHANT_FUZZY_MATCH is False
+    assert _resolve_or_create_merchant(db, "SWIGY") == "SWIGY"
+
+    monkeypatch.setattr(ingestion_service, "MERCHANT_FUZZY_MATCH", True)
+    assert _resolve_or_create_merchant(db, "Swiggyy") == "Swiggy"
+    assert _resolve_or_create_merchant(db, "BETA") == "BETA"
+    assert {name for (name,) in db.query(Merchant.name)} == {"Swiggy", "BATA", "SWIGY", "BETA"}
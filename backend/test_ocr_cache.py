@@ -0,0 +1,75 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from services import receipt_ocr
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.ocr_cache import OCRCache
+
+FIELDS = ExtractedFields(amount=105.0, merchant_name="Fresh Mart", confidence=0.9)
+
+OCR_INFO = {
+    "orientation": "heuristic",
+    "rotation": 0,
+    "ocr_pass": "regions",
+    "text_scope": "regions",
+    "regions": ["header", "totals"],
+    "ocr_ms": 420.0,
+    "time_saved_ms": 0.0,
+    "phash": 12345,
+    "stages": {"tesseract": {"wall_ms": 400.0, "cpu_ms": 390.0}},
+}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = OCRCache(max_bytes=10_000, persistent=False)
+    monkeypatch.setattr(receipt_ocr, "ocr_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def ocr_runs(monkeypatch):
+    runs = []
+
+    async def submit(path):
+        runs.append(path)
+        return "FRESH MART\nGrand Total 105.00", FIELDS, dict(OCR_INFO)
+
+    monkeypatch.setattr(receipt_ocr.ocr_batcher, "submit", submit)
+    return runs
+
+
+def test_a_hit_keeps_the_metadata_of_the_run_it_cached(cache, ocr_runs):
+    miss = asyncio.run(receipt_ocr.ocr_receipt(Path("receipt.jpg"), "ab" * 32))
+    hit = asyncio.run(receipt_ocr.ocr_receipt(Path("receipt.jpg"), "ab" * 32))
+
+    assert len(ocr_runs) == 1
+    assert hit[:2] == miss[:2]
+
+    _, _, miss_metadata = miss
+    _, _, hit_metadata = hit
+    assert miss_metadata["ocr_cache"] == "miss"
+    assert hit_metadata["ocr_cache"] == "hit"
+    assert hit_metadata["extraction_path"] == "ocr"
+    # Everything but this request's own timings
+    assert hit_metadata == {k: v for k, v in miss_metadata.items() if k != "stages"} | {"ocr_cache": "hit"}
+
+
+def test_hits_are_copies(cache):
+    cache.put("k", "text", FIELDS, {"ocr_pass": "full"})
+
+    _, fields, metadata = cache.get("k")
+    fields.amount = 1.0
+    metadata["phash"] = 1
+
+    assert cache.get("k") == ("text", FIELDS, {"ocr_pass": "full"})
+
+
+def test_metadata_counts_towards_the_size_bound(cache):
+    cache.put("small", "text", FIELDS)
+    cache.put("large", "text", FIELDS, {"regions": ["header"] * 2000})
+
+    assert cache.get("small") == ("text", FIELDS, {})
+    # Over max_bytes on its own: not cached
+    assert cache.get("large") is None
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from services.ocr_executor import OCRExecutor
+
+
+def sleep_then_die(seconds):
+    time.sleep(seconds)
+    os._exit(1)
+
+
+def wait_until(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def executor():
+    executor = OCRExecutor(max_workers=1, queue_size=1, timeout_seconds=60, threads_per_worker=1)
+    # Wait for the worker to come up so the timings below are about the jobs
+    asyncio.run(executor.run(os.getpid))
+    executor.timeout_seconds = 0.5
+    yield executor
+    executor.shutdown()
+
+
+def test_runs_jobs_in_a_worker_process(executor):
+    assert asyncio.run(executor.run(os.getpid)) != os.getpid()
+    assert executor.in_flight == 0
+
+
+def test_timed_out_job_keeps_its_slot_until_it_ends(executor):
+    async def scenario():
+        with pytest.raises(HTTPException) as timeout:
+            await executor.run(time.sleep, 3)
+        assert timeout.value.status_code == 504
+
+        # The sleep still occupies the only worker: one job may queue...
+        assert executor.in_flight == 1
+        queued = asyncio.ensure_future(executor.run(os.getpid))
+        await asyncio.sleep(0)
+        assert executor.in_flight == 2
+
+        # ...and the bound (1 worker + 1 queued) holds
+        with pytest.raises(HTTPException) as full:
+            await executor.run(os.getpid)
+        assert full.value.status_code == 503
+
+        # The queued job times out too; the pool already handed it to the
+        # busy worker, so it stays counted and the bound still holds
+        with pytest.raises(HTTPException):
+            await queued
+        assert executor.in_flight == 2
+        with pytest.raises(HTTPException) as still_full:
+            await executor.run(os.getpid)
+        assert still_full.value.status_code == 503
+
+    asyncio.run(scenario())
+
+    # Slots are released as the jobs themselves end
+    wait_until(lambda: executor.in_flight == 0)
+    assert asyncio.run(executor.run(os.getpid))
+
+
+def test_pool_recovers_when_a_timed_out_job_kills_its_worker(executor):
+    with pytest.raises(HTTPException) as timeout:
+        asyncio.run(executor.run(sleep_then_die, 1))
+    assert timeout.value.status_code == 504
+
+    # Nobody awaits the job any more when its worker dies; the pool breaks
+    wait_until(lambda: executor.in_flight == 0)
+
+    executor.timeout_seconds = 60
+    assert asyncio.run(executor.run(os.getpid)) != os.getpid()
+    assert executor.in_flight == 0
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from services import ocr_pipeline, ocr_regions
+from services.ocr_regions import HEADER_BANDS, TOTALS_BANDS
+
+
+class FakeBackend:
+    def __init__(self):
+        self.images = []
+
+    def image_to_string(self, image, config):
+        self.images.append(image)
+        return "RANDOM TEXT\nSomething something"
+
+
+def page(bands):
+    gray = np.full((max(400, bands * 30 + 10), 300), 245, dtype=np.uint8)
+    for i in range(bands):
+        gray[10 + i * 30:10 + i * 30 + 12, 10:290] = 20
+    return gray
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(ocr_pipeline, "get_backend", lambda: backend)
+    monkeypatch.setattr(ocr_regions, "get_backend", lambda: backend)
+    monkeypatch.setattr(ocr_pipeline, "check_quality", lambda gray: {})
+    monkeypatch.setattr(ocr_pipeline, "orient", lambda gray, exif: (gray, {"orientation": "heuristic", "rotation": 0}))
+    # Only the full resolution pass
+    monkeypatch.setattr(ocr_pipeline, "OCR_FAST_PASS_HEIGHT", 0)
+    monkeypatch.setattr(ocr_pipeline, "OCR_REGION_PASS", True)
+    return backend
+
+
+@pytest.fixture
+def preprocess_calls(monkeypatch):
+    calls = []
+    preprocess = ocr_pipeline.preprocess
+
+    def counting_preprocess(*args, **kwargs):
+        calls.append(args[0].shape)
+        return preprocess(*args, **kwargs)
+
+    monkeypatch.setattr(ocr_pipeline, "preprocess", counting_preprocess)
+    return calls
+
+
+@pytest.mark.parametrize("bands, ocr_pass", [
+    (HEADER_BANDS + TOTALS_BANDS, "full"),  # too short to zone
+    (HEADER_BANDS + TOTALS_BANDS + 4, "regions"),
+])
+def test_full_resolution_page_is_preprocessed_once(backend, preprocess_calls, monkeypatch, bands, ocr_pass):
+    monkeypatch.setattr(ocr_pipeline, "load_grayscale", lambda source, height: (page(bands), 0))
+
+    raw_text, fields, info = ocr_pipeline.extract_text(b"receipt")
+
+    assert info["ocr_pass"] == ocr_pass
+    assert len(preprocess_calls) == 1
+    # Both passes read (crops of) that one binarized page
+    assert all(image.shape[1] == backend.images[0].shape[1] for image in backend.images)
+    assert raw_text.startswith("RANDOM TEXT")
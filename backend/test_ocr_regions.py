@@ -0,0 +1,54 @@
+import numpy as np
+
+from services import ocr_regions
+from services.ingestion_v2.engine import IngestionEngineV2
+from services.ocr_regions import HEADER_BANDS, TOTALS_BANDS, read_regions, segment_line_bands
+
+HEADER = ["FRESH MART", "MG Road Bangalore", "Ph 080 2222", "GSTIN 29ABCDE", "Date: 12/02/2026", "Bill 4411"]
+MIDDLE = ["MILK 2 x 30.00", "BREAD 45.00"]
+TOTALS = ["Sub Total 105.00", "CGST 0.00", "SGST 0.00", "Grand Total Rs 105.00", "Cash 200.00", "Change 95.00",
+          "Thank you visit again", "www.freshmart.in"]
+
+
+class FakeBackend:
+    """Answers each band group's OCR with its lines; records the configs used."""
+
+    def __init__(self):
+        self.configs = []
+
+    def image_to_string(self, image, config):
+        self.configs.append(config)
+        group = {0: HEADER, 1: TOTALS, 2: MIDDLE}[len(self.configs) - 1]
+        return "\n".join(group)
+
+
+def page(bands):
+    binary = np.full((bands * 30 + 10, 200), 255, dtype=np.uint8)
+    for i in range(bands):
+        binary[10 + i * 30:10 + i * 30 + 12, 10:190] = 0
+    return binary
+
+
+def test_segment_line_bands():
+    assert segment_line_bands(page(3)) == [(10, 22), (40, 52), (70, 82)]
+    assert segment_line_bands(np.full((50, 50), 255, dtype=np.uint8)) == []
+
+
+def test_regions_keep_the_footer_and_say_the_text_is_partial(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(ocr_regions, "get_backend", lambda: backend)
+
+    raw_text, _, fields, info = read_regions(page(HEADER_BANDS + TOTALS_BANDS + 4), IngestionEngineV2(), "--psm 6")
+
+    # Merchant and amount came from the header / totals: the middle is never read
+    assert info == {"text_scope": "regions", "regions": ["header", "totals"], "bands": HEADER_BANDS + TOTALS_BANDS + 4}
+    assert backend.configs == ["--psm 6", "--psm 6"]
+    assert raw_text.splitlines() == HEADER + TOTALS
+    assert fields.amount == 105.0
+    assert fields.merchant_name == "Fresh Mart"
+
+
+def test_small_pages_are_not_zoned(monkeypatch):
+    monkeypatch.setattr(ocr_regions, "get_backend", FakeBackend)
+
+    assert read_regions(page(HEADER_BANDS + TOTALS_BANDS), IngestionEngineV2(), "--psm 6") is None
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+from services import ocr_pipeline, quality_gate
+from services.quality_gate import LowQualityImageError, OCRCostEstimate, inspect_image
+
+
+def page(height=1600, width=700):
+    image = np.full((height, width), 240, dtype=np.uint8)
+    for i, y in enumerate(range(80, height - 100, 60)):
+        cv2.putText(image, f"ITEM {i:02d} MILK BREAD  {i * 7}.50", (30, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 20, 2)
+    return image
+
+
+def gradient(height=1600, width=700):
+    return np.tile(np.linspace(120, 250, width).astype(np.uint8), (height, 1))
+
+
+def test_a_readable_receipt_passes_at_any_size():
+    for image in (page(), cv2.resize(page(), (175, 400), interpolation=cv2.INTER_AREA)):
+        report = inspect_image(image)
+        assert report.passed, report
+
+
+@pytest.mark.parametrize("image, reason", [
+    (page() // 40 + 5, "Image too dark or washed out"),
+    (np.full((1600, 700), 240, dtype=np.uint8), "Image too dark or washed out"),
+    (gradient(), "No text found in image"),
+    (np.random.default_rng(0).integers(0, 255, (1600, 700), dtype=np.uint8), "Image does not look like a receipt"),
+    (cv2.GaussianBlur(page(), (0, 0), 5), "Image too blurry"),
+], ids=["dark", "blank", "no-text", "noise", "blurry"])
+def test_unreadable_images_are_rejected_with_a_reason(image, reason):
+    assert inspect_image(image).reason == reason
+
+
+def test_thresholds_decide_the_verdict(monkeypatch):
+    slightly_blurred = cv2.GaussianBlur(page(), (0, 0), 3)
+    sharpness = inspect_image(slightly_blurred).sharpness
+    assert inspect_image(slightly_blurred).passed
+
+    monkeypatch.setattr(quality_gate, "QUALITY_MIN_SHARPNESS", sharpness + 0.01)
+    assert inspect_image(slightly_blurred).reason == "Image too blurry"
+
+    monkeypatch.setattr(quality_gate, "QUALITY_MAX_TEXT_DENSITY", 0.05)
+    assert inspect_image(page()).reason == "Image does not look like a receipt"
+
+
+def test_check_quality_raises_with_the_scores(monkeypatch):
+    with pytest.raises(LowQualityImageError) as rejected:
+        ocr_pipeline.check_quality(gradient())
+    assert str(rejected.value) == "No text found in image"
+    assert rejected.value.scores["text_density"] == 0.0
+    assert "inspect_ms" in rejected.value.scores
+
+    assert set(ocr_pipeline.check_quality(page())["quality"]) >= {"sharpness", "contrast", "text_density"}
+
+    monkeypatch.setattr(ocr_pipeline, "QUALITY_GATE", False)
+    assert ocr_pipeline.check_quality(gradient()) == {}
+
+
+def test_ocr_cost_estimate_is_an_ewma():
+    estimate = OCRCostEstimate(alpha=0.5)
+    assert estimate.cpu_ms is None
+
+    estimate.observe(100.0)
+    estimate.observe(200.0)
+    assert estimate.cpu_ms == 150.0
@@ -0,0 +1,202 @@
+import random
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+import pytest
+from models.ingestion_log_orm import IngestionLog
+from models.user_orm import User
+from services.ingestion_service import process_ingestion
+from services import receipt_dedupe
+from services.ingestion_v2.receipt_model import ExtractedFields
+from services.receipt_dedupe import BKTree, DuplicateIndex, check_duplicate, dhash, hamming, to_signed, to_unsigned
+
+
+def receipt(seed, height=1200, width=500):
+    """Dark table, white paper, rows of 'text' blocks at seeded positions."""
+    rng = np.random.default_rng(seed)
+    image = np.full((height + 200, width + 200), 40, dtype=np.uint8)
+    image[100:100 + height, 100:100 + width] = 245
+    for y in range(140, 60 + height, 40):
+        x = 130
+        while x < width:
+            w = int(rng.integers(20, 120))
+            image[y:y + 18, x:min(x + w, 70 + width)] = 30
+            x += w + int(rng.integers(15, 60))
+    return image
+
+
+@pytest.fixture
+def db(session_factory, monkeypatch):
+    # check_duplicate's index must not remember another test's database
+    monkeypatch.setattr(receipt_dedupe, "duplicate_index", DuplicateIndex())
+
+    db = session_factory()
+    db.add(User(id=1, email="dedupe@example.com"))
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_bk_tree_radius_queries_match_a_linear_scan():
+    rng = random.Random(15)
+    hashes = [rng.getrandbits(64) for _ in range(400)]
+    # Near copies: what a second photo of a receipt hashes to
+    hashes += [h ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for h in hashes[:100]]
+
+    tree = BKTree()
+    for item_id, value in enumerate(hashes):
+        tree.add(value, item_id)
+    assert tree.size == len(hashes)
+
+    for query in rng.sample(hashes, 50) + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 3, 10, 24):
+            expected = sorted((hamming(query, value), item_id) for item_id, value in enumerate(hashes)
+                              if hamming(query, value) <= radius)
+            assert tree.search(query, radius) == expected
+
+
+def test_bk_tree_keeps_every_id_of_an_exact_repeat():
+    tree = BKTree()
+    assert tree.search(0, 64) == []
+
+    tree.add(0b1011, 1)
+    tree.add(0b1011, 2)
+    tree.add(0b1010, 3)
+
+    assert tree.search(0b1011, 0) == [(0, 1), (0, 2)]
+    assert tree.search(0b1011, 1) == [(0, 1), (0, 2), (1, 3)]
+
+
+def test_dhash_survives_reframing_and_rescaling_but_tells_receipts_apart():
+    original = receipt(1)
+    # Same receipt: more table around it, photographed at a lower resolution
+    reframed = cv2.copyMakeBorder(original, 80, 20, 150, 40, cv2.BORDER_CONSTANT, value=40)
+    rescaled = cv2.resize(reframed, None, fx=0.6, fy=0.6, interpolation=cv2.INTER_AREA)
+
+    assert hamming(dhash(original), dhash(rescaled)) <= 3
+    assert hamming(dhash(original), dhash(receipt(2))) > 3
+
+
+def test_signed_round_trip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed(value)
+        assert -(1 << 63) <= signed < (1 << 63)
+        assert to_unsigned(signed) == value
+
+
+def test_index_finds_the_closest_live_original(db):
+    value = dhash(receipt(1))
+    db.add_all([
+        IngestionLog(id=1, user_id=1, input_type="ocr", status="failed", phash=to_signed(value)),
+        IngestionLog(id=2, user_id=1, input_type="ocr", status="parsed", phash=to_signed(value ^ 0b11)),
+        IngestionLog(id=3, user_id=1, input_type="ocr", status="needs_review", phash=to_signed(value ^ 0b1111)),
+    ])
+    db.commit()
+    index = DuplicateIndex(max_distance=3)
+
+    # Log 1 failed, so log 2 is the original; other users never match
+    assert index.find_original(db, 1, value).id == 2
+    assert index.find_original(db, 2, value) is None
+    assert index.find_original(db, 1, value ^ 0xFF00) is None
+
+    # Logs added later are picked up on the next lookup
+    db.add(IngestionLog(id=4, user_id=1, input_type="ocr", status="parsed", phash=to_signed(value ^ 0xF000)))
+    db.commit()
+    assert index.find_original(db, 1, value ^ 0xF000).id == 4
+
+
+def test_hashes_that_land_out_of_id_order_are_indexed(db):
+    # A batch: every log is created first, hashes arrive as OCR finishes
+    value = dhash(receipt(1))
+    old = datetime.utcnow() - timedelta(minutes=10)
+    db.add_all([IngestionLog(id=i, user_id=1, input_type="ocr", status="pending", created_at=old) for i in (100, 101, 102)])
+    db.commit()
+    index = DuplicateIndex(max_distance=3)
+
+    for log_id in (101, 102, 100):
+        db.get(IngestionLog, log_id).phash = to_signed(value ^ (0xFF << (8 * (log_id - 100))))
+        db.commit()
+        # Each upload's own lookup indexes the hashes so far
+        index.find_original(db, 1, 0)
+
+    assert index.find_original(db, 1, value ^ 0xFE).id == 100
+    assert index.find_original(db, 1, value ^ 0xFF00).id == 101
+
+
+def test_a_lower_id_committed_late_is_still_indexed(db):
+    value = dhash(receipt(1))
+    index = DuplicateIndex(max_distance=3)
+    db.add(IngestionLog(id=2, user_id=1, input_type="ocr", status="parsed", phash=to_signed(value ^ 0xFF00)))
+    db.commit()
+    assert index.find_original(db, 1, value) is None
+
+    # Log 1's transaction commits after log 2 was indexed
+    db.add(IngestionLog(id=1, user_id=1, input_type="ocr", status="parsed", phash=to_signed(value)))
+    db.commit()
+    assert index.find_original(db, 1, value).id == 1
+
+
+def test_settled_logs_are_not_read_again(db):
+    old = datetime.utcnow() - timedelta(minutes=10)
+    stale = datetime.utcnow() - timedelta(hours=2)
+    db.add_all([
+        IngestionLog(id=1, user_id=1, input_type="ocr", status="parsed", phash=to_signed(7), created_at=old),
+        IngestionLog(id=2, user_id=1, input_type="sms", status="failed", created_at=old),
+        IngestionLog(id=3, user_id=1, input_type="ocr", status="pending", created_at=stale),
+        IngestionLog(id=4, user_id=1, input_type="ocr", status="pending", created_at=old),
+        IngestionLog(id=5, user_id=1, input_type="ocr", status="parsed", phash=to_signed(9), created_at=old),
+    ])
+    db.commit()
+    index = DuplicateIndex(max_distance=0)
+
+    assert index.find_original(db, 1, 9).id == 5
+
+    # Log 4 may still get its hash: it and everything after stay unsettled
+    hashes = index._users[1]
+    assert hashes.settled_id == 3
+    assert hashes.indexed == {5}
+    assert index.find_original(db, 1, 9).id == 5
+    assert hashes.tree.size == 2
+
+
+def test_queries_run_outside_the_lock(db, monkeypatch):
+    index = DuplicateIndex(max_distance=3)
+    query = db.query
+
+    def unlocked_query(*args, **kwargs):
+        assert not index._lock.locked()
+        return query(*args, **kwargs)
+
+    db.add(IngestionLog(id=1, user_id=1, input_type="ocr", status="parsed", phash=to_signed(5)))
+    db.commit()
+    monkeypatch.setattr(db, "query", unlocked_query)
+
+    assert index.find_original(db, 1, 5).id == 1
+
+
+def test_cache_hits_reuse_the_hash_stored_for_the_same_file(db):
+    value = dhash(receipt(1))
+    db.add(IngestionLog(id=1, user_id=1, input_type="ocr", status="parsed", phash=to_signed(value),
+                        raw_payload={"metadata": {"file_path": "receipts/ab/cd/abcd.jpg"}}))
+    db.commit()
+
+    phash, original = check_duplicate(db, 1, None, "receipts/ab/cd/abcd.jpg")
+    assert (phash, original.id) == (to_signed(value), 1)
+    assert check_duplicate(db, 1, None, "receipts/ef/01/ef01.jpg") == (None, None)
+
+
+def test_a_duplicate_is_parsed_and_left_for_review(db):
+    value = dhash(receipt(1))
+    db.add(IngestionLog(id=1, user_id=1, input_type="ocr", status="parsed", phash=to_signed(value)))
+    db.commit()
+    user = db.get(User, 1)
+
+    phash, original = check_duplicate(db, 1, value ^ 0b1)
+    fields = ExtractedFields(amount=105.0, merchant_name="Fresh Mart", category_name="Groceries", confidence=0.95)
+    log = process_ingestion(db, user, "ocr", raw_text="FRESH MART", fields=fields, phash=phash,
+                            duplicate_of_id=original.id)
+
+    # Confident enough to auto-create, but a likely repeat photo: the user decides
+    assert (log.status, log.expense_id, log.duplicate_of_id) == ("needs_review", None, 1)
+    assert (log.parsed_amount, log.parsed_merchant) == (105.0, "Fresh Mart")
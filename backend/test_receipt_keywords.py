@@ -0,0 +1,114 @@
+import random
+import re
+
+from services.ingestion_v2.receipt_keywords import (
+    ADDRESS,
+    ADDRESS_KEYWORDS,
+    AMOUNT_PAYABLE,
+    CATEGORY_PREFIX,
+    CATEGORY_RULES,
+    FOOTER,
+    FOOTER_KEYWORDS,
+    GRAND_TOTAL,
+    META,
+    META_KEYWORDS,
+    NET_TOTAL,
+    TOTAL,
+    TOTAL_KEYWORDS,
+    TOTAL_WORD,
+    KeywordMatcher,
+    _trie_pattern,
+    category_for,
+    receipt_keywords,
+)
+
+LITERAL_CLASSES = {
+    TOTAL: TOTAL_KEYWORDS,
+    FOOTER: FOOTER_KEYWORDS,
+    GRAND_TOTAL: ("grand total",),
+    AMOUNT_PAYABLE: ("amount payable",),
+    NET_TOTAL: ("net total",),
+    TOTAL_WORD: ("total",),
+    **{CATEGORY_PREFIX + keyword: (keyword,) for keyword in CATEGORY_RULES},
+}
+
+
+def legacy_tags(lower):
+    """The per-class checks receipt_keywords replaced."""
+    tags = {name for name, keywords in LITERAL_CLASSES.items() if any(k in lower for k in keywords)}
+
+    # FieldClassifier._normalize'd the line before its address / meta checks
+    normalized = re.sub(r"\s+", " ", re.sub(r"[^A-Z\s.&-]", " ", lower.upper())).strip().lower()
+    if any(k in normalized for k in ADDRESS_KEYWORDS):
+        tags.add(ADDRESS)
+    if any(k in normalized for k in META_KEYWORDS):
+        tags.add(META)
+
+    return frozenset(tags)
+
+
+def random_line(rng):
+    keywords = list(TOTAL_KEYWORDS + FOOTER_KEYWORDS) + ADDRESS_KEYWORDS + META_KEYWORDS + list(CATEGORY_RULES)
+    parts = []
+    for _ in range(rng.randint(0, 6)):
+        roll = rng.random()
+        if roll < 0.4:
+            word = rng.choice(keywords)
+            # Cut keywords short now and then ("tota", "invoic")
+            parts.append(word[:rng.randint(1, len(word))] if rng.random() < 0.2 else word)
+        elif roll < 0.7:
+            parts.append(str(rng.randint(0, 99999)))
+        else:
+            parts.append("".join(rng.choice("abcdeilnorstuy#:-./&,") for _ in range(rng.randint(1, 5))))
+    seps = [" ", "", "  ", "#", ": ", "-", "."]
+    return "".join(part + rng.choice(seps) for part in parts)
+
+
+def test_tags_match_the_per_class_checks():
+    rng = random.Random(20)
+    for _ in range(5000):
+        line = random_line(rng)
+        assert receipt_keywords.tags(line) == legacy_tags(line), line
+
+
+def test_overlapping_and_nested_keywords():
+    assert receipt_keywords.tags("grand total 1,299.00") == {TOTAL, GRAND_TOTAL, TOTAL_WORD}
+    assert receipt_keywords.tags("gstin 29abcde") == {FOOTER, META}
+    # "invoice no" holds "invoice" too; "sale" overlaps "balance"'s tail
+    assert receipt_keywords.tags("tax invoice no 12") == {FOOTER, META}
+    assert receipt_keywords.tags("balesale") == {TOTAL}
+    assert receipt_keywords.tags("") == frozenset()
+    assert receipt_keywords.tags("milk 2 x 30.00") == frozenset()
+
+
+def test_loose_multi_word_keywords():
+    assert META in receipt_keywords.tags("receipt#no 4411")
+    assert META in receipt_keywords.tags("receipt : no")
+    # Only the loose classes: "grand#total" is not a grand total line
+    assert receipt_keywords.tags("grand#total") == {TOTAL, TOTAL_WORD}
+
+
+def test_category_for_follows_rule_order():
+    assert category_for(receipt_keywords.tags("cafe coffee day")) == "Food"
+    assert category_for(receipt_keywords.tags("apollo pharmacy")) == "Health"
+    assert category_for(receipt_keywords.tags("fresh supermarket")) == "Groceries"
+    assert category_for(receipt_keywords.tags("random text")) is None
+
+
+def test_trie_pattern_prefers_the_longest_keyword():
+    pattern = re.compile(_trie_pattern(["gst", "gstin", "tel", "total"]))
+
+    assert pattern.fullmatch("gstin")
+    assert pattern.match("gstin no").group() == "gstin"
+    assert pattern.match("gst no").group() == "gst"
+    assert not pattern.match("gs")
+
+
+def test_custom_classes():
+    matcher = KeywordMatcher({"a": ("new york",), "b": ("yo",)}, loose=("a",))
+
+    assert matcher.tags("new york") == {"a", "b"}
+    assert matcher.tags("new # york") == {"a", "b"}
+    # "-" is kept by the old normalization, so it still separates nothing
+    assert matcher.tags("new-york") == {"b"}
+    assert matcher.tags("newyork") == {"b"}
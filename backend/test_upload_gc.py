@@ -0,0 +1,123 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from models.ingestion_log_orm import IngestionLog
+from models.user_orm import User
+from services import upload_gc
+from services.storage import LocalStorage, receipt_key, thumbnail_key
+from services.upload_gc import UploadGC
+
+OLD = time.time() - 3 * 24 * 3600
+
+
+class BoolOr:
+    """Postgres bool_or for SQLite."""
+
+    def __init__(self):
+        self.value = False
+
+    def step(self, value):
+        self.value = self.value or bool(value)
+
+    def finalize(self):
+        return self.value
+
+
+@pytest.fixture
+def db(session_factory, monkeypatch):
+    engine = session_factory.kw["bind"]
+    # StaticPool: the one connection every session uses
+    engine.raw_connection().driver_connection.create_aggregate("bool_or", 1, BoolOr)
+    monkeypatch.setattr(upload_gc, "SessionLocal", session_factory)
+
+    db = session_factory()
+    db.add(User(id=1, email="gc@example.com"))
+    db.commit()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(tmp_path / "uploads")
+
+
+def store(storage, name, tmp_path, modified=OLD):
+    src = tmp_path / f"{name}.part"
+    src.write_bytes(name.encode())
+    key = receipt_key(hashlib.sha256(name.encode()).hexdigest(), ".jpg")
+    storage.put_file(src, key)
+    os.utime(storage.local_path(key), (modified, modified))
+    return key
+
+
+def log(db, key, status, days_old=0, expense_id=None):
+    db.add(IngestionLog(
+        user_id=1,
+        input_type="ocr",
+        raw_payload={"metadata": {"file_path": key}},
+        status=status,
+        expense_id=expense_id,
+        created_at=datetime.utcnow() - timedelta(days=days_old),
+    ))
+    db.commit()
+
+
+def collect(storage, tmp_path, **kwargs):
+    return UploadGC(storage=storage, checkpoint_path=tmp_path / "checkpoint.json", **kwargs).run()
+
+
+def test_reclaims_unreferenced_and_expired_receipts(db, storage, tmp_path):
+    orphan = store(storage, "orphan", tmp_path)
+    failed = store(storage, "failed", tmp_path)
+    log(db, failed, "failed", days_old=60)
+
+    thumb_src = tmp_path / "thumb.part"
+    thumb_src.write_bytes(b"webp")
+    storage.put_file(thumb_src, thumbnail_key(orphan))
+    os.utime(storage.local_path(thumbnail_key(orphan)), (OLD, OLD))
+
+    stats, finished = collect(storage, tmp_path)
+
+    assert finished
+    assert (stats.removed, stats.thumbnails_removed, stats.errors) == (2, 1, 0)
+    assert not storage.exists(orphan)
+    assert not storage.exists(failed)
+    assert not storage.exists(thumbnail_key(orphan))
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_never_removes_a_key_another_log_still_needs(db, storage, tmp_path):
+    # Same bytes uploaded twice: one log failed long ago, the other is live
+    shared = store(storage, "shared", tmp_path)
+    log(db, shared, "failed", days_old=60)
+    log(db, shared, "needs_review")
+
+    expense = store(storage, "expense", tmp_path)
+    log(db, expense, "duplicate", days_old=60)
+    log(db, expense, "parsed", days_old=60, expense_id=7)
+
+    recent = store(storage, "recent", tmp_path)
+    log(db, recent, "failed", days_old=2)
+
+    fresh = store(storage, "fresh", tmp_path, modified=time.time())
+
+    stats, _ = collect(storage, tmp_path)
+
+    assert stats.removed == 0
+    assert all(storage.exists(key) for key in (shared, expense, recent, fresh))
+
+
+def test_dry_run_and_archive_mode(db, storage, tmp_path):
+    orphan = store(storage, "orphan", tmp_path)
+
+    stats, _ = collect(storage, tmp_path, dry_run=True)
+    assert stats.removed == 1
+    assert storage.exists(orphan)
+
+    collect(storage, tmp_path, mode="archive")
+    assert not storage.exists(orphan)
+    assert storage.exists(upload_gc.ARCHIVE_PREFIX + orphan)